@@ -1,50 +1,238 @@
 import pandas as pd
 import numpy as np
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Dict
 from data_processor import process_data
 from signal_generator import generate_signals
-from ml_model import predict_market_movement
-from risk_manager import assess_risk
+from indicator_state import IndicatorState
+from risk_manager import RollingRisk
+from bar_store import BarStore
 
-def run_backtest(historical_data, initial_capital=10000, risk_per_trade=0.01):
-    df = process_data(historical_data)
-    df = generate_signals(df)
-    
-    position = 0
-    entry_price = 0
-    trades = []
-    capital = initial_capital
-    trade_size = 0
-    
-    for i in range(1, len(df)):
-        current_price = df['close'].iloc[i]
-        prediction = predict_market_movement(df.iloc[:i])
-        risk_assessment = assess_risk(df.iloc[:i], df['Signal'].iloc[:i], prediction)
-        
-        if df['Signal'].iloc[i] == 1 and position == 0 and risk_assessment['risk_level'] != 'High':
-            position = 1
-            entry_price = current_price
-            trade_size = (capital * risk_per_trade) / current_price
-        elif df['Signal'].iloc[i] == -1 and position == 1:
-            position = 0
-            exit_price = current_price
-            profit = (exit_price - entry_price) * trade_size
-            capital += profit
-            trades.append({
-                'entry_time': df.index[i-1],
-                'exit_time': df.index[i],
-                'entry_price': entry_price,
-                'exit_price': exit_price,
+# MT5 rates layout -> the CSV layout process_data and generate_signals read
+MT5_COLUMNS = {'time': 'Date', 'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+
+def normalize_columns(df):
+    """
+    Rename lowercase MT5 columns (time, open, ...) to Date, Open, ... so
+    both data layouts can be backtested
+    """
+    renames = {c: MT5_COLUMNS[c] for c in df.columns if c in MT5_COLUMNS and MT5_COLUMNS[c] not in df.columns}
+    return df.rename(columns=renames) if renames else df
+
+def index_by_date(df):
+    """
+    Index the bars by their Date column (kept as a column too), so trade
+    entry/exit times are timestamps rather than row numbers
+    """
+    return df.set_index('Date', drop=False)
+
+class LSTMModel:
+    """
+    Incremental model layer for a trained TradingLSTM: the six
+    DataProcessor.feature_frame columns come from an IndicatorState and the
+    last sequence_length scaled rows are kept in a window, so each bar costs
+    one forward pass instead of rebuilding the features of the whole history.
+    Returns None until the indicators and the window are warmed up.
+    """
+    def __init__(self, lstm):
+        self.lstm = lstm
+        self.indicators = None
+        self.window = None
+
+    def reset(self, df=None):
+        self.indicators = IndicatorState()
+        self.window = deque(maxlen=self.lstm.sequence_length)
+
+    def update(self, bar):
+        if self.indicators is None:
+            self.reset()
+        snapshot = self.indicators.update(open=bar.Open, high=bar.High, low=bar.Low, close=bar.Close, volume=bar.Volume)
+        row = np.array([bar.Close, bar.Volume, snapshot.rsi, snapshot.macd['macd'], snapshot.atr, snapshot.adx])
+        if np.isnan(row).any():
+            return None
+        # The MinMaxScaler fitted by TradingLSTM.prepare_data, applied to one row
+        self.window.append(row * self.lstm.scaler.scale_ + self.lstm.scaler.min_)
+        if len(self.window) < self.window.maxlen:
+            return None
+        return float(self.lstm.forward(np.asarray(self.window, dtype=np.float32)[None])[0, 0])
+
+class PrefixModel:
+    """
+    Adapts a predictor that takes the whole history to the step interface
+    used by BacktestEngine. Every bar re-evaluates the full prefix, so a run
+    is O(n^2); meant for checking an incremental layer against the function
+    it replaces.
+    """
+    def __init__(self, func):
+        self.func = func
+        self.df = None
+        self.i = 0
+
+    def reset(self, df):
+        self.df = df
+        self.i = 0
+
+    def update(self, bar):
+        self.i += 1
+        return self.func(self.df.iloc[:self.i])
+
+class PrefixRisk:
+    """
+    Adapts a risk function taking (history, signals, prediction) to the step
+    interface used by BacktestEngine; O(n^2) like PrefixModel
+    """
+    def __init__(self, func):
+        self.func = func
+        self.df = None
+        self.i = 0
+
+    def reset(self, df):
+        self.df = df
+        self.i = 0
+
+    def update(self, bar, signal, prediction):
+        self.i += 1
+        return self.func(self.df.iloc[:self.i], self.df['Signal'].iloc[:self.i], prediction)
+
+@dataclass
+class BacktestState:
+    capital: float
+    position: int = 0
+    entry_price: float = 0.0
+    trade_size: float = 0.0
+    trades: List[Dict] = field(default_factory=list)
+
+class BacktestEngine:
+    """
+    Event-driven backtester that walks the bars once.
+
+    The model and risk layers are step objects: ``update(bar)`` and
+    ``update(bar, signal, prediction)`` receive only the newest bar the
+    strategy is allowed to see (bar i-1 when deciding at bar i) and keep
+    their own rolling state. An optional ``reset(df)`` is called before the run.
+    """
+    def __init__(self, model=None, risk=None, initial_capital=10000, risk_per_trade=0.01):
+        self.model = model
+        self.risk = risk
+        self.initial_capital = initial_capital
+        self.risk_per_trade = risk_per_trade
+        self.state = None
+        self.index = None
+
+    def run(self, df):
+        self.state = BacktestState(capital=self.initial_capital)
+        for layer in (self.model, self.risk):
+            if hasattr(layer, 'reset'):
+                layer.reset(df)
+
+        self.index = df.index
+        close = df['Close'].to_numpy(dtype=np.float64)
+        signals = df['Signal'].to_numpy(dtype=np.float64)
+        bars = df.itertuples(index=False)
+
+        for i in range(1, len(df)):
+            self.on_bar(i, next(bars), close[i], signals[i-1], signals[i])
+
+        return self.state.trades, self.state.capital
+
+    def on_bar(self, i, bar, current_price, last_signal, signal):
+        state = self.state
+        prediction = self.model.update(bar) if self.model is not None else None
+        risk_assessment = self.risk.update(bar, last_signal, prediction) if self.risk is not None else None
+        allowed = risk_assessment is None or risk_assessment['risk_level'] != 'High'
+
+        if signal == 1 and state.position == 0 and allowed:
+            state.position = 1
+            state.entry_price = current_price
+            state.trade_size = (state.capital * self.risk_per_trade) / current_price
+        elif signal == -1 and state.position == 1:
+            state.position = 0
+            profit = (current_price - state.entry_price) * state.trade_size
+            state.capital += profit
+            state.trades.append({
+                'entry_time': self.index[i-1],
+                'exit_time': self.index[i],
+                'entry_price': state.entry_price,
+                'exit_price': current_price,
                 'profit': profit,
-                'trade_size': trade_size
+                'trade_size': state.trade_size
             })
-    
-    return trades, capital
+
+def run_vectorized_backtest(df, initial_capital=10000, risk_per_trade=0.01):
+    """
+    Signal-only version of BacktestEngine computed with array operations.
+
+    Takes a frame that already has the ``Signal`` column and returns the trades
+    as a DataFrame with the same columns as the event-driven trades list.
+    """
+    close = df['Close'].to_numpy(dtype=np.float64)
+    signals = df['Signal'].to_numpy(dtype=np.float64)
+
+    # Long-only state machine: after any +1/-1 event the position equals that event,
+    # so an event only changes the state when it differs from the previous one
+    events = np.flatnonzero((signals[1:] == 1) | (signals[1:] == -1)) + 1
+    values = signals[events]
+    previous = np.concatenate(([-1.0], values[:-1]))
+    effective = values != previous
+    entries = events[effective & (values == 1)]
+    exits = events[effective & (values == -1)]
+    entries = entries[:len(exits)]
+
+    entry_price = close[entries]
+    exit_price = close[exits]
+    growth = 1 + risk_per_trade * (exit_price / entry_price - 1)
+    capital_before = initial_capital * np.concatenate(([1.0], np.cumprod(growth)[:-1]))
+    trade_size = capital_before * risk_per_trade / entry_price
+    profit = (exit_price - entry_price) * trade_size
+    final_capital = capital_before[-1] + profit[-1] if len(profit) else float(initial_capital)
+
+    trades = pd.DataFrame({
+        'entry_time': df.index[exits - 1],
+        'exit_time': df.index[exits],
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'profit': profit,
+        'trade_size': trade_size
+    })
+    return trades, final_capital
+
+def run_backtest(historical_data, initial_capital=10000, risk_per_trade=0.01, model=None, risk=None, mode="event"):
+    """
+    Run the long-only backtest on top of the SMA/RSI signals.
+
+    ``model`` and ``risk`` are step objects (see BacktestEngine). By default
+    there is no model layer (pass LSTMModel to gate on a trained TradingLSTM)
+    and entries are blocked by RollingRisk, so the whole run is one pass over
+    the bars.
+
+    ``mode="vectorized"`` trades the ``Signal`` column alone (no model or risk
+    gating) and returns the trades as a DataFrame. In both modes entry_time and
+    exit_time are the bars' dates.
+    """
+    df = process_data(normalize_columns(historical_data))
+    df = index_by_date(generate_signals(df))
+
+    if mode == "vectorized":
+        if model is not None or risk is not None:
+            raise ValueError("Vectorized mode does not support model or risk layers")
+        return run_vectorized_backtest(df, initial_capital, risk_per_trade)
+    if mode != "event":
+        raise ValueError(f"Unknown backtest mode: {mode}")
+
+    engine = BacktestEngine(
+        model=model,
+        risk=risk if risk is not None else RollingRisk(),
+        initial_capital=initial_capital,
+        risk_per_trade=risk_per_trade
+    )
+    return engine.run(df)
 
 def calculate_performance_metrics(trades, initial_capital):
-    if not trades:
+    if trades is None or len(trades) == 0:
         return None
     
-    df_trades = pd.DataFrame(trades)
+    df_trades = trades.copy() if isinstance(trades, pd.DataFrame) else pd.DataFrame(trades)
     df_trades['return'] = df_trades['profit'] / initial_capital
     df_trades['cumulative_return'] = (1 + df_trades['return']).cumprod() - 1
     
@@ -66,8 +254,15 @@ def calculate_performance_metrics(trades, initial_capital):
         'avg_trade_duration': avg_trade_duration
     }
 
-def backtest_strategy(historical_data, initial_capital=10000):
-    trades, final_capital = run_backtest(historical_data, initial_capital)
+def load_stored_bars(symbol, timeframe, start=None, end=None, root='bar_store'):
+    """
+    A date range (start <= time < end) of the bar store written by the API,
+    in the layout run_backtest expects
+    """
+    return BarStore(root, readonly=True).series(symbol, timeframe).to_frame(start, end, csv=True)
+
+def backtest_strategy(historical_data, initial_capital=10000, mode="event"):
+    trades, final_capital = run_backtest(historical_data, initial_capital, mode=mode)
     performance_metrics = calculate_performance_metrics(trades, initial_capital)
     return trades, final_capital, performance_metrics
 
@@ -0,0 +1,287 @@
+import os
+import logging
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+# pandas is imported where it is needed: the API only stores MT5 rates
+# arrays, and importing pandas would dominate its start-up time
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Same fields as the rates array returned by mt5.copy_rates_*
+COLUMNS = (
+    ('time', np.dtype('<i8')),
+    ('open', np.dtype('<f8')),
+    ('high', np.dtype('<f8')),
+    ('low', np.dtype('<f8')),
+    ('close', np.dtype('<f8')),
+    ('tick_volume', np.dtype('<i8')),
+    ('spread', np.dtype('<i4')),
+    ('real_volume', np.dtype('<i8')),
+)
+CSV_COLUMNS = {'Date': 'time', 'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'tick_volume'}
+
+MAGIC = b'SCBARS01'
+HEADER_SIZE = 64
+CAPACITY_STEP = 1 << 12
+
+TimeLike = Union[int, str, 'pd.Timestamp', np.datetime64, None]
+
+def _to_epoch_seconds(value: TimeLike) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    import pandas as pd
+    return pd.Timestamp(value).value // 10**9
+
+def _layout(capacity: int) -> Tuple[Dict[str, int], int]:
+    offsets = {}
+    offset = HEADER_SIZE
+    for name, dtype in COLUMNS:
+        offsets[name] = offset
+        offset += capacity * dtype.itemsize
+    return offsets, offset
+
+class BarSeries:
+    """
+    Append-only columnar bars for one symbol/timeframe in a single memory-mapped file.
+
+    The file holds a small header (row count, capacity) followed by one
+    fixed-capacity block per column, so every column is a contiguous array
+    and slicing returns views into the mapping. Time is in epoch seconds and
+    strictly increasing, which makes date-range lookups a binary search.
+    """
+    def __init__(self, path: str, readonly: bool = False, initial_capacity: int = 1 << 16):
+        self.path = path
+        self.readonly = readonly
+        if not os.path.exists(path):
+            if readonly:
+                raise FileNotFoundError(path)
+            self._create(path, self._round_capacity(initial_capacity))
+        self._map()
+
+    @staticmethod
+    def _round_capacity(capacity: int) -> int:
+        return max(CAPACITY_STEP, -(-capacity // CAPACITY_STEP) * CAPACITY_STEP)
+
+    @staticmethod
+    def _create(path: str, capacity: int):
+        _, size = _layout(capacity)
+        with open(path, 'wb') as f:
+            f.write(MAGIC + np.array([0, capacity], dtype='<i8').tobytes())
+            f.truncate(size)
+
+    def _unmap(self):
+        """
+        Release this object's mapping of the file. Windows cannot replace or
+        resize a file while it is mapped; views handed out by slice()/tail()
+        keep the mapping alive until they are released.
+        """
+        mm = self._mm
+        self._mm = self._header = None
+        self.columns = {}
+        mapping = getattr(mm, '_mmap', None)
+        del mm
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                pass
+
+    def _map(self):
+        self._mm = np.memmap(self.path, dtype=np.uint8, mode='r' if self.readonly else 'r+')
+        if bytes(self._mm[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{self.path} is not a bar store file")
+        self._header = self._mm[len(MAGIC):len(MAGIC) + 16].view('<i8')
+        self.capacity = int(self._header[1])
+        offsets, _ = _layout(self.capacity)
+        self.columns = {
+            name: self._mm[offsets[name]:offsets[name] + self.capacity * dtype.itemsize].view(dtype)
+            for name, dtype in COLUMNS
+        }
+
+    def __len__(self) -> int:
+        return int(self._header[0])
+
+    def refresh(self):
+        """
+        Pick up rows appended by another process (remapping if the file grew)
+        """
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        capacity = int(np.frombuffer(header, dtype='<i8', count=2, offset=len(MAGIC))[1])
+        if capacity != self.capacity:
+            self._unmap()
+            self._map()
+
+    @property
+    def time(self) -> np.ndarray:
+        return self.columns['time'][:len(self)]
+
+    @property
+    def last_time(self) -> Optional[int]:
+        n = len(self)
+        return int(self.columns['time'][n - 1]) if n else None
+
+    def _grow(self, required: int):
+        capacity = self._round_capacity(max(required, self.capacity * 2))
+        n = len(self)
+        tmp_path = self.path + '.tmp'
+        self._create(tmp_path, capacity)
+        new = np.memmap(tmp_path, dtype=np.uint8, mode='r+')
+        offsets, _ = _layout(capacity)
+        for name, dtype in COLUMNS:
+            new[offsets[name]:offsets[name] + n * dtype.itemsize].view(dtype)[:] = self.columns[name][:n]
+        new[len(MAGIC):len(MAGIC) + 16].view('<i8')[0] = n
+        new.flush()
+        del new
+
+        self._unmap()
+        try:
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # Still mapped elsewhere (Windows); keep the old file usable
+            os.remove(tmp_path)
+            self._map()
+            raise
+        self._map()
+
+    def append(self, rates) -> int:
+        """
+        Append bars (an MT5 rates array or a DataFrame with the same fields).
+
+        Bars older than the last stored one are ignored and a bar with the same
+        time replaces the last row, so re-sending an updated last candle is safe.
+        Returns the number of rows written.
+        """
+        if self.readonly:
+            raise PermissionError("BarSeries opened read-only")
+        data = self._columns_from(rates)
+        times = data['time']
+        last = self.last_time
+        start = 0 if last is None else int(np.searchsorted(times, last, side='left'))
+        if start == len(times):
+            return 0
+
+        n = len(self)
+        row = n - 1 if last is not None and times[start] == last else n
+        count = len(times) - start
+        if row + count > self.capacity:
+            self._grow(row + count)
+
+        for name, _ in COLUMNS:
+            if name in data:
+                self.columns[name][row:row + count] = data[name][start:]
+            else:
+                self.columns[name][row:row + count] = 0
+        self._mm.flush()
+        self._header[0] = row + count
+        self._mm.flush()
+        return count
+
+    def truncate(self, count: int = 0):
+        """
+        Keep only the first `count` rows
+        """
+        if self.readonly:
+            raise PermissionError("BarSeries opened read-only")
+        self._header[0] = min(max(count, 0), len(self))
+        self._mm.flush()
+
+    @staticmethod
+    def _columns_from(rates) -> Dict[str, np.ndarray]:
+        if isinstance(rates, np.ndarray):
+            fields = {name: rates[name] for name in rates.dtype.names}
+        else:
+            rates = rates.rename(columns=CSV_COLUMNS)
+            fields = {name: rates[name].to_numpy() for name in rates.columns}
+
+        data = {name: np.asarray(fields[name]).astype(dtype, copy=False) for name, dtype in COLUMNS[1:] if name in fields}
+        times = np.asarray(fields['time'])
+        if np.issubdtype(times.dtype, np.datetime64) or times.dtype == object:
+            import pandas as pd
+            times = pd.to_datetime(times).to_numpy(dtype='datetime64[s]').astype('<i8')
+        data['time'] = times.astype('<i8', copy=False)
+        if np.any(np.diff(data['time']) <= 0):
+            raise ValueError("Bars must be sorted by strictly increasing time")
+        return data
+
+    def slice(self, start: TimeLike = None, end: TimeLike = None) -> Dict[str, np.ndarray]:
+        """
+        Zero-copy views of the bars with start <= time < end
+        """
+        times = self.time
+        lo = 0 if start is None else int(np.searchsorted(times, _to_epoch_seconds(start), side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, _to_epoch_seconds(end), side='left'))
+        return {name: column[lo:hi] for name, column in self.columns.items()}
+
+    def tail(self, count: int) -> Dict[str, np.ndarray]:
+        """
+        Zero-copy views of the last `count` bars
+        """
+        n = len(self)
+        return {name: column[max(n - count, 0):n] for name, column in self.columns.items()}
+
+    def to_frame(self, start: TimeLike = None, end: TimeLike = None, csv: bool = False) -> 'pd.DataFrame':
+        """
+        Copy a date range into a DataFrame shaped like MarketDataFetcher.fetch_ohlcv
+        output, or with csv=True like the CSV exports (Date, Open, ..., Volume)
+        """
+        import pandas as pd
+        df = pd.DataFrame(self.slice(start, end))
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        if csv:
+            df = df[list(CSV_COLUMNS.values())].rename(columns={v: k for k, v in CSV_COLUMNS.items()})
+        return df
+
+    def iter_frames(self, chunk_rows: int, csv: bool = False):
+        """
+        to_frame() of consecutive blocks of chunk_rows bars
+        """
+        times = self.time
+        for lo in range(0, len(times), chunk_rows):
+            hi = lo + chunk_rows
+            yield self.to_frame(int(times[lo]), int(times[hi]) if hi < len(times) else None, csv)
+
+    def flush(self):
+        self._mm.flush()
+
+class BarStore:
+    """
+    Directory of BarSeries files, one per symbol/timeframe
+    """
+    def __init__(self, root: str = 'bar_store', readonly: bool = False):
+        self.root = root
+        self.readonly = readonly
+        self._series: Dict[Tuple[str, str], BarSeries] = {}
+        if not readonly:
+            os.makedirs(root, exist_ok=True)
+
+    def path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, f'{symbol}_{timeframe}.bars')
+
+    def series(self, symbol: str, timeframe: str) -> BarSeries:
+        key = (symbol, timeframe)
+        if key not in self._series:
+            self._series[key] = BarSeries(self.path(symbol, timeframe), readonly=self.readonly)
+        return self._series[key]
+
+    def append(self, symbol: str, timeframe: str, rates) -> int:
+        count = self.series(symbol, timeframe).append(rates)
+        logger.info(f"Stored {count} bars for {symbol} {timeframe}")
+        return count
+
+    def slice(self, symbol: str, timeframe: str, start: TimeLike = None, end: TimeLike = None) -> Dict[str, np.ndarray]:
+        return self.series(symbol, timeframe).slice(start, end)
+
+    def import_csv(self, path: str, symbol: str, timeframe: str) -> int:
+        """
+        Load a CSV export (Date/Open/High/Low/Close[/Volume]) into the store
+        """
+        import pandas as pd
+        df = pd.read_csv(path, parse_dates=['Date']).sort_values('Date')
+        return self.append(symbol, timeframe, df)
@@ -0,0 +1,404 @@
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - POSIX only
+    resource = None
+
+import numpy as np
+import pandas as pd
+
+try:
+    from backend.module_families import ROOT_DIR, use_family
+except ImportError:  # run as a script from backend/
+    from module_families import ROOT_DIR, use_family
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# Seconds per bar for the MetaTrader5 TIMEFRAME_* values used by the API
+TIMEFRAME_SECONDS = {1: 60, 5: 300, 15: 900, 30: 1800, 16385: 3600, 16388: 14400, 16408: 86400}
+
+def synthetic_ohlcv(n: int, seed: int = 0, freq: str = 'min', capitalized: bool = False) -> pd.DataFrame:
+    """
+    Random-walk OHLCV bars. capitalized=True gives the CSV layout used in
+    src/ (Date, Open, ...), otherwise the lowercase MT5 layout (time, open, ...).
+    """
+    rng = np.random.default_rng(seed)
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 2e-4, n)))
+    open_ = np.concatenate([[1.1], close[:-1]])
+    wick = np.abs(rng.normal(0, 1e-4, (2, n)))
+    df = pd.DataFrame({
+        'time': pd.date_range('2020-01-01', periods=n, freq=freq),
+        'open': open_,
+        'high': np.maximum(open_, close) + wick[0],
+        'low': np.minimum(open_, close) - wick[1],
+        'close': close,
+        'volume': rng.integers(1, 500, n).astype(np.float64),
+    })
+    if capitalized:
+        df.columns = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+    return df
+
+def synthetic_rates(n: int, seed: int = 0, end: Optional[int] = None, bar_seconds: int = 60,
+                    dtype: Optional[np.dtype] = None) -> np.ndarray:
+    """
+    The bars of synthetic_ohlcv as MT5 rates records, the last one opening at `end`
+    """
+    end = int(time.time()) // bar_seconds * bar_seconds if end is None else end
+    df = synthetic_ohlcv(n, seed)
+    rates = np.zeros(n, dtype=dtype or [('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+                                        ('close', '<f8'), ('tick_volume', '<u8'), ('spread', '<i4'),
+                                        ('real_volume', '<u8')])
+    rates['time'] = end - bar_seconds * np.arange(n)[::-1]
+    for name in ('open', 'high', 'low', 'close'):
+        rates[name] = df[name].to_numpy()
+    rates['tick_volume'] = df['volume'].to_numpy()
+    rates['spread'] = 2
+    return rates
+
+def synthetic_ticks(n: int, seed: int = 0, start_msc: Optional[int] = None) -> np.ndarray:
+    """
+    Random-walk bid/ask ticks as MT5 tick records, on average 100 ms apart
+    """
+    rng = np.random.default_rng(seed)
+    start_msc = time.time_ns() // 1_000_000 if start_msc is None else start_msc
+    ticks = np.zeros(n, dtype=[('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'),
+                               ('volume', '<u8'), ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8')])
+    ticks['time_msc'] = start_msc + np.cumsum(rng.integers(1, 200, n))
+    ticks['time'] = ticks['time_msc'] // 1000
+    ticks['bid'] = 1.1 + np.cumsum(rng.normal(0, 2e-5, n))
+    ticks['ask'] = ticks['bid'] + 2e-5 * rng.integers(1, 4, n)
+    ticks['volume'] = rng.integers(1, 10, n)
+    ticks['volume_real'] = ticks['volume']
+    return ticks
+
+def stub_mt5(rates: np.ndarray, seed: int = 0) -> types.ModuleType:
+    """
+    A MetaTrader5 stand-in serving the given M1 rates (scaled to the requested
+    timeframe) and synthetic ticks, so the API can be measured without a terminal
+    """
+    mt5 = types.ModuleType('MetaTrader5')
+    mt5.TIMEFRAME_M1, mt5.TIMEFRAME_M5, mt5.TIMEFRAME_M15, mt5.TIMEFRAME_M30 = 1, 5, 15, 30
+    mt5.TIMEFRAME_H1, mt5.TIMEFRAME_H4, mt5.TIMEFRAME_D1 = 16385, 16388, 16408
+    mt5.COPY_TICKS_ALL = -1
+    mt5.BOOK_TYPE_SELL, mt5.BOOK_TYPE_BUY = 1, 2
+
+    def bars(timeframe):
+        scaled = rates.copy()
+        step = TIMEFRAME_SECONDS.get(timeframe, 60)
+        scaled['time'] = rates['time'][-1] // step * step - step * np.arange(len(rates))[::-1]
+        return scaled
+
+    def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+        series = bars(timeframe)
+        return series[max(len(series) - start_pos - count, 0):len(series) - start_pos]
+
+    def copy_rates_range(symbol, timeframe, date_from, date_to):
+        series = bars(timeframe)
+        lo, hi = np.searchsorted(series['time'], [int(date_from.timestamp()), int(date_to.timestamp())], side='left')
+        return series[lo:hi + 1]
+
+    def copy_ticks_from(symbol, date_from, count, flags):
+        return synthetic_ticks(min(count, 1000), seed)
+
+    mt5.initialize = lambda *args, **kwargs: True
+    mt5.login = lambda *args, **kwargs: True
+    mt5.shutdown = lambda: None
+    mt5.last_error = lambda: (1, 'Success')
+    mt5.terminal_info = lambda: types.SimpleNamespace(_asdict=lambda: {'name': 'stub'})
+    mt5.copy_rates_from_pos = copy_rates_from_pos
+    mt5.copy_rates_range = copy_rates_range
+    mt5.copy_ticks_from = copy_ticks_from
+    mt5.market_book_add = lambda symbol: True
+    mt5.market_book_get = lambda symbol: ()
+    return mt5
+
+# Each setup runs in the benchmark process and returns (make_input, run):
+# make_input() builds a fresh, untimed argument; run(arg) is the timed call
+
+def _process_data(rows, seed):
+    from data_processor import process_data
+    df = synthetic_ohlcv(rows, seed, capitalized=True)
+    return df.copy, process_data
+
+def _calculate_rsi(rows, seed):
+    from data_processor import calculate_rsi
+    close = synthetic_ohlcv(rows, seed, capitalized=True)['Close']
+    return lambda: close, calculate_rsi
+
+def _generate_signals(rows, seed):
+    from data_processor import process_data
+    from signal_generator import generate_signals
+    df = process_data(synthetic_ohlcv(rows, seed, capitalized=True))
+    return df.copy, generate_signals
+
+def _analyze_performance(rows, seed):
+    from data_processor import process_data
+    from signal_generator import generate_signals
+    from performance_analyzer import analyze_performance
+    df = generate_signals(process_data(synthetic_ohlcv(rows, seed, capitalized=True)))
+    return df.copy, analyze_performance
+
+def _calculate_indicators(rows, seed):
+    from data_processor import DataProcessor
+    df = synthetic_ohlcv(rows, seed)
+    return lambda: df, DataProcessor().calculate_indicators
+
+def _prepare_model_data(rows, seed):
+    from data_processor import DataProcessor
+    processor = DataProcessor()
+    df = synthetic_ohlcv(rows, seed)
+    indicators = processor.calculate_indicators(df)
+    return lambda: df, lambda df: processor.prepare_model_data(df, indicators)
+
+def _run_backtest(rows, seed):
+    from backtester import run_backtest
+    df = synthetic_ohlcv(rows, seed, capitalized=True)
+    return df.copy, run_backtest
+
+def _run_backtest_vectorized(rows, seed):
+    from backtester import run_backtest
+    df = synthetic_ohlcv(rows, seed, capitalized=True)
+    return df.copy, lambda df: run_backtest(df, mode='vectorized')
+
+def _risk_metrics(rows, seed):
+    from risk_manager import RiskManager
+    returns = synthetic_ohlcv(rows, seed)['close'].pct_change().to_numpy()[1:]
+    return lambda: returns, RiskManager().calculate_metrics
+
+def _market_data(rows, seed, cached):
+    sys.modules['MetaTrader5'] = stub_mt5(synthetic_rates(rows, seed), seed)
+    # The stub needs no account; set before load_dotenv so a local .env is not used
+    for name in ('MT5_LOGIN', 'MT5_PASSWORD', 'MT5_SERVER'):
+        os.environ[name] = ''
+    from fastapi.testclient import TestClient
+    from backend import main
+
+    client = TestClient(main.app)
+    url = f'/market-data/EURUSD?timeframe=M1&num_candles={rows}'
+
+    def make_input():
+        if not cached:
+            main.market_data_cache.clear()
+            main.history_sync.invalidate()
+        return url
+
+    def run(url):
+        response = client.get(url)
+        if response.status_code != 200:
+            # httpx errors do not pickle back to the parent process
+            raise RuntimeError(f'HTTP {response.status_code}: {response.text[:200]}')
+        return response.content
+
+    return make_input, run
+
+def _market_data_cold(rows, seed):
+    return _market_data(rows, seed, cached=False)
+
+def _market_data_cached(rows, seed):
+    return _market_data(rows, seed, cached=True)
+
+@dataclass
+class Case:
+    name: str
+    family: str
+    setup: Callable
+    max_rows: Optional[int] = None
+
+CASES = {case.name: case for case in (
+    Case('process_data', 'src', _process_data),
+    Case('calculate_rsi', 'src', _calculate_rsi),
+    Case('generate_signals', 'src', _generate_signals),
+    Case('analyze_performance', 'src', _analyze_performance),
+    Case('calculate_indicators', 'backend', _calculate_indicators),
+    Case('prepare_model_data', 'backend', _prepare_model_data),
+    # The event loop runs Python code per bar
+    Case('run_backtest', 'src', _run_backtest, max_rows=1_000_000),
+    Case('run_backtest_vectorized', 'src', _run_backtest_vectorized),
+    Case('risk_metrics', 'backend', _risk_metrics),
+    # HistorySync keeps at most 100000 bars per symbol/timeframe
+    Case('market_data_cold', 'api', _market_data_cold, max_rows=100_000),
+    Case('market_data_cached', 'api', _market_data_cached, max_rows=100_000),
+)}
+
+def _max_rss_mb() -> Optional[float]:
+    if resource is None:
+        # Windows: the peak working set, when psutil is available
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2**20
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+def run_case(name: str, rows: int, repeats: int = 5, seed: int = 0) -> Dict:
+    """
+    Time one case in the current process: a warm-up call, then `repeats`
+    timed calls, then one call under tracemalloc for the peak allocation
+    """
+    case = CASES[name]
+    use_family(case.family)
+    make_input, run = case.setup(rows, seed)
+
+    run(make_input())
+    times = []
+    for _ in range(repeats):
+        arg = make_input()
+        gc.collect()
+        start = time.perf_counter()
+        run(arg)
+        times.append(time.perf_counter() - start)
+
+    arg = make_input()
+    gc.collect()
+    tracemalloc.start()
+    run(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = float(np.median(times))
+    return {
+        'status': 'ok',
+        'rows': rows,
+        'repeats': repeats,
+        'times': times,
+        'min': min(times),
+        'median': median,
+        'rows_per_second': rows / median if median > 0 else None,
+        'peak_alloc_mb': peak / 2**20,
+        'max_rss_mb': _max_rss_mb(),
+    }
+
+def _isolated(name: str, rows: int, repeats: int, seed: int) -> Dict:
+    """
+    run_case in a fresh interpreter, so imports, caches and peak RSS of one
+    case do not leak into the next; failures are recorded, not raised
+    """
+    case = CASES[name]
+    if case.max_rows is not None and rows > case.max_rows:
+        return {'status': 'skipped', 'rows': rows, 'reason': f'more than {case.max_rows} rows'}
+    try:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            return executor.submit(run_case, name, rows, repeats, seed).result()
+    except BrokenProcessPool as e:
+        return {'status': 'crashed', 'rows': rows, 'error': f'Benchmark process died: {e}'}
+    except Exception as e:
+        return {'status': 'error', 'rows': rows, 'error': f'{type(e).__name__}: {e}'}
+
+def _metadata(repeats: int, seed: int) -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeats': repeats,
+        'seed': seed,
+    }
+
+def run_benchmarks(cases: Optional[List[str]] = None, sizes: Optional[List[str]] = None,
+                   repeats: int = 5, seed: int = 0) -> Dict:
+    """
+    Run the selected cases (default all) at the selected sizes (labels of
+    SIZES, default 10k and 1m). Inputs are generated from `seed`, so runs on
+    the same machine measure the same work.
+    """
+    cases = cases or list(CASES)
+    sizes = sizes or ['10k', '1m']
+    report = {'meta': _metadata(repeats, seed), 'results': {}}
+    for name in cases:
+        report['results'][name] = {}
+        for size in sizes:
+            result = _isolated(name, SIZES[size], repeats, seed)
+            report['results'][name][size] = result
+            if result['status'] == 'ok':
+                print(f"{name:<26}{size:>5}  median {result['median'] * 1000:10.2f} ms  "
+                      f"peak {result['peak_alloc_mb']:9.1f} MB")
+            else:
+                print(f"{name:<26}{size:>5}  {result['status']}: {result.get('error') or result.get('reason')}")
+    return report
+
+def compare(report: Dict, baseline: Dict, threshold: float = 0.10) -> List[Dict]:
+    """
+    Median time and peak allocation of every case/size measured in both
+    runs, relative to the baseline; changes beyond `threshold` are flagged
+    """
+    rows = []
+    for name, sizes in report['results'].items():
+        for size, result in sizes.items():
+            base = baseline.get('results', {}).get(name, {}).get(size)
+            if result.get('status') != 'ok' or not base or base.get('status') != 'ok':
+                continue
+            time_ratio = result['median'] / base['median'] if base['median'] else np.inf
+            memory_ratio = result['peak_alloc_mb'] / base['peak_alloc_mb'] if base['peak_alloc_mb'] else 1.0
+            worst = max(time_ratio, memory_ratio)
+            if worst > 1 + threshold:
+                verdict = 'regression'
+            elif time_ratio < 1 - threshold:
+                verdict = 'improvement'
+            else:
+                verdict = 'unchanged'
+            rows.append({'case': name, 'size': size, 'time_ratio': time_ratio,
+                         'memory_ratio': memory_ratio, 'verdict': verdict})
+    return rows
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the trading hot paths')
+    parser.add_argument('--cases', default=','.join(CASES), help='comma-separated case names')
+    parser.add_argument('--sizes', default='10k,1m', help=f'comma-separated sizes from {",".join(SIZES)}')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='compare against this results file; exit 1 on a regression')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed slowdown/growth vs the baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='also write the results to --baseline')
+    args = parser.parse_args()
+    cases, sizes = args.cases.split(','), args.sizes.split(',')
+    unknown = [name for name in cases if name not in CASES] + [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown case or size: {', '.join(unknown)}")
+    if args.baseline and not args.save_baseline and not os.path.exists(args.baseline):
+        parser.error(f"baseline {args.baseline} does not exist; pass --save-baseline to create it")
+
+    report = run_benchmarks(cases, sizes, args.repeats, args.seed)
+
+    regressions = []
+    if args.baseline and not args.save_baseline:
+        with open(args.baseline) as f:
+            report['comparison'] = compare(report, json.load(f), args.threshold)
+        for row in report['comparison']:
+            print(f"{row['case']:<26}{row['size']:>5}  time x{row['time_ratio']:.2f}  "
+                  f"memory x{row['memory_ratio']:.2f}  {row['verdict']}")
+        regressions = [row for row in report['comparison'] if row['verdict'] == 'regression']
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    sys.exit(1 if regressions else 0)
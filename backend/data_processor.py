@@ -1,8 +1,10 @@
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Optional
-import talib
 from dataclasses import dataclass
+from indicator_state import IndicatorState, INDICATOR_PARAMS
+from sequence_builder import build_sequences
+from metrics import timed
 
 @dataclass
 class TechnicalIndicators:
@@ -25,6 +27,7 @@ class DataProcessor:
         """
         return all(col in df.columns for col in self.required_columns)
     
+    @timed('calculate_indicators')
     def calculate_indicators(self, df: pd.DataFrame) -> Optional[TechnicalIndicators]:
         """
         Calculate all technical indicators
@@ -32,16 +35,19 @@ class DataProcessor:
         if not self.validate_data(df):
             raise ValueError("DataFrame missing required columns")
         
+        # Imported on first use, so importing this module stays cheap
+        import talib
+        
         try:
             # Moving Averages
-            sma_20 = talib.SMA(df['close'], timeperiod=20)
-            ema_20 = talib.EMA(df['close'], timeperiod=20)
+            sma_20 = talib.SMA(df['close'], **INDICATOR_PARAMS['sma'])
+            ema_20 = talib.EMA(df['close'], **INDICATOR_PARAMS['ema'])
             
             # RSI
-            rsi = talib.RSI(df['close'], timeperiod=14)
+            rsi = talib.RSI(df['close'], **INDICATOR_PARAMS['rsi'])
             
             # MACD
-            macd, signal, hist = talib.MACD(df['close'])
+            macd, signal, hist = talib.MACD(df['close'], **INDICATOR_PARAMS['macd'])
             macd_dict = {
                 'macd': macd,
                 'signal': signal,
@@ -49,7 +55,7 @@ class DataProcessor:
             }
             
             # Bollinger Bands
-            upper, middle, lower = talib.BBANDS(df['close'])
+            upper, middle, lower = talib.BBANDS(df['close'], **INDICATOR_PARAMS['bbands'])
             bollinger_dict = {
                 'upper': upper,
                 'middle': middle,
@@ -57,13 +63,13 @@ class DataProcessor:
             }
             
             # ATR
-            atr = talib.ATR(df['high'], df['low'], df['close'], timeperiod=14)
+            atr = talib.ATR(df['high'], df['low'], df['close'], **INDICATOR_PARAMS['atr'])
             
             # ADX
-            adx = talib.ADX(df['high'], df['low'], df['close'], timeperiod=14)
+            adx = talib.ADX(df['high'], df['low'], df['close'], **INDICATOR_PARAMS['adx'])
             
             # Stochastic
-            slowk, slowd = talib.STOCH(df['high'], df['low'], df['close'])
+            slowk, slowd = talib.STOCH(df['high'], df['low'], df['close'], **INDICATOR_PARAMS['stoch'])
             stoch_dict = {
                 'k': slowk,
                 'd': slowd
@@ -84,14 +90,20 @@ class DataProcessor:
             print(f"Error calculating indicators: {str(e)}")
             return None
     
-    def prepare_model_data(self, 
-                          df: pd.DataFrame, 
-                          indicators: TechnicalIndicators,
-                          sequence_length: int = 60) -> tuple:
+    def init_indicator_state(self, df: pd.DataFrame, params: Optional[Dict[str, Dict]] = None) -> IndicatorState:
         """
-        Prepare data for LSTM model
+        Build an incremental indicator state primed with the bars in df,
+        to be advanced with IndicatorState.update() as new candles arrive
+        """
+        if not self.validate_data(df):
+            raise ValueError("DataFrame missing required columns")
+        return IndicatorState.from_frame(df, params)
+    
+    def feature_frame(self, df: pd.DataFrame, indicators: TechnicalIndicators) -> pd.DataFrame:
         """
-        feature_data = pd.DataFrame({
+        The LSTM input features (target first), without the indicator warm-up rows
+        """
+        return pd.DataFrame({
             'close': df['close'],
             'volume': df['volume'],
             'rsi': indicators.rsi,
@@ -99,13 +111,19 @@ class DataProcessor:
             'atr': indicators.atr,
             'adx': indicators.adx
         }).dropna()
+    
+    def prepare_model_data(self, 
+                          df: pd.DataFrame, 
+                          indicators: TechnicalIndicators,
+                          sequence_length: int = 60) -> tuple:
+        """
+        Prepare data for LSTM model
+        """
+        feature_data = self.feature_frame(df, indicators)
         
-        # Create sequences
-        sequences = []
-        targets = []
-        
-        for i in range(len(feature_data) - sequence_length):
-            sequences.append(feature_data.iloc[i:i+sequence_length].values)
-            targets.append(feature_data['close'].iloc[i+sequence_length])
+        # Create sequences as strided views over the feature matrix
+        values = feature_data.to_numpy(dtype=np.float64)
+        sequences = build_sequences(values, sequence_length)
+        targets = values[sequence_length:, 0]
         
-        return np.array(sequences), np.array(targets)
\ No newline at end of file
+        return sequences, targets
\ No newline at end of file
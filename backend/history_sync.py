@@ -0,0 +1,156 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+from backend.bar_store import BarStore, COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# fetch_latest(symbol, tf, count) -> last `count` bars, like copy_rates_from_pos(..., 0, count)
+LatestFetcher = Callable[[str, int, int], Optional[np.ndarray]]
+# fetch_range(symbol, tf, date_from, date_to) -> bars in [date_from, date_to], like copy_rates_range
+RangeFetcher = Callable[[str, int, datetime, datetime], Optional[np.ndarray]]
+
+RATES_DTYPE = np.dtype(list(COLUMNS))
+
+class HistorySync:
+    """
+    Keeps the recent bars of each symbol/timeframe in memory and tops them up
+    incrementally.
+
+    The first request for a series downloads the window; later requests only
+    ask the terminal for bars from the last cached time onwards, which returns
+    the (possibly revised) last bar plus anything newer, including bars missed
+    while disconnected. If the terminal no longer has the last cached bar, the
+    history changed underneath us and the window is downloaded again. When the
+    terminal has fewer bars than requested, that count is remembered and later
+    requests up to it are only topped up. At most max_bars bars are kept per
+    series; larger requests are clamped to it with a warning.
+    Optionally new bars are also written to a BarStore, which seeds the cache
+    after a restart.
+
+    Calls are blocking; run them on the MT5 gateway thread.
+    """
+    def __init__(self,
+                 fetch_latest: LatestFetcher,
+                 fetch_range: RangeFetcher,
+                 store: Optional[BarStore] = None,
+                 timeframes: Optional[Dict[str, int]] = None,
+                 max_bars: int = 100000):
+        self.fetch_latest = fetch_latest
+        self.fetch_range = fetch_range
+        self.store = store
+        self.max_bars = max_bars
+        self._names = {tf: name for name, tf in (timeframes or {}).items()}
+        self._cache: Dict[Tuple[str, int], np.ndarray] = {}
+        # Largest count the terminal could not fill, per series
+        self._exhausted: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def cached(self, symbol: str, tf: int) -> Optional[np.ndarray]:
+        return self._cache.get((symbol, tf))
+
+    def get_rates(self, symbol: str, tf: int, num_candles: int = 1000) -> Optional[np.ndarray]:
+        """
+        The last num_candles bars, fetching only what the cache is missing
+        """
+        if num_candles > self.max_bars:
+            logger.warning(f"Requested {num_candles} bars of {symbol} {self._name(tf)}; "
+                           f"serving the last {self.max_bars} (max_bars)")
+            num_candles = self.max_bars
+
+        with self._lock:
+            key = (symbol, tf)
+            rates = self._cache.get(key)
+            if rates is None and self.store is not None:
+                rates = self._load_store(symbol, tf, num_candles)
+
+            if rates is None or (len(rates) < num_candles and self._exhausted.get(key, 0) < num_candles):
+                rates = self._download(symbol, tf, num_candles, rates)
+            else:
+                rates = self._top_up(symbol, tf, num_candles, rates)
+            if rates is None:
+                return None
+
+            if len(rates) > self.max_bars:
+                rates = rates[-self.max_bars:]
+            self._cache[key] = rates
+            return rates[-num_candles:]
+
+    def invalidate(self, symbol: Optional[str] = None, tf: Optional[int] = None):
+        with self._lock:
+            for key in list(self._cache):
+                if (symbol is None or key[0] == symbol) and (tf is None or key[1] == tf):
+                    del self._cache[key]
+                    self._exhausted.pop(key, None)
+
+    def _download(self, symbol: str, tf: int, num_candles: int, cached: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        latest = self.fetch_latest(symbol, tf, max(num_candles, 1))
+        if latest is None:
+            return cached
+        if len(latest) < num_candles:
+            self._exhausted[(symbol, tf)] = num_candles
+        else:
+            self._exhausted.pop((symbol, tf), None)
+        self._persist(symbol, tf, latest)
+        return self._merge(cached, latest)
+
+    def _top_up(self, symbol: str, tf: int, num_candles: int, cached: np.ndarray) -> Optional[np.ndarray]:
+        last_time = int(cached['time'][-1])
+        date_from = datetime.fromtimestamp(last_time, tz=timezone.utc)
+        # Bar times are in server time, which may run ahead of UTC
+        date_to = datetime.now(timezone.utc) + timedelta(days=1)
+        new = self.fetch_range(symbol, tf, date_from, date_to)
+        if new is None or not len(new):
+            return cached
+        if int(new['time'][0]) != last_time:
+            logger.info(f"History of {symbol} {self._name(tf)} changed; downloading {num_candles} bars again")
+            self._reset_store(symbol, tf)
+            return self._download(symbol, tf, num_candles, None)
+        self._persist(symbol, tf, new)
+        return self._merge(cached, new)
+
+    @staticmethod
+    def _merge(cached: Optional[np.ndarray], new: np.ndarray) -> np.ndarray:
+        """
+        Cached bars older than the first new bar, followed by the new bars.
+        Cached bars that end before the new ones start are dropped: nothing
+        proves there is no gap between them.
+        """
+        if cached is None or not len(cached) or cached['time'][-1] < new['time'][0]:
+            return np.array(new)
+        if new.dtype != cached.dtype:
+            new = new.astype(cached.dtype)
+        keep = int(np.searchsorted(cached['time'], new['time'][0], side='left'))
+        return np.concatenate([cached[:keep], new])
+
+    def _name(self, tf: int) -> str:
+        return self._names.get(tf, str(tf))
+
+    def _load_store(self, symbol: str, tf: int, num_candles: int) -> Optional[np.ndarray]:
+        columns = self.store.series(symbol, self._name(tf)).tail(max(num_candles, self.max_bars))
+        if not len(columns['time']):
+            return None
+        rates = np.empty(len(columns['time']), dtype=RATES_DTYPE)
+        for name, _ in COLUMNS:
+            rates[name] = columns[name]
+        return rates
+
+    def _persist(self, symbol: str, tf: int, rates: np.ndarray):
+        if self.store is None or not len(rates):
+            return
+        try:
+            series = self.store.series(symbol, self._name(tf))
+            last = series.last_time
+            if last is not None and last < int(rates['time'][0]):
+                # Same rule as _merge: never leave a hole in the stored history
+                series.truncate(0)
+            series.append(rates)
+        except Exception as e:
+            logger.error(f"Failed to store bars for {symbol} {self._name(tf)}: {str(e)}")
+
+    def _reset_store(self, symbol: str, tf: int):
+        if self.store is not None:
+            self.store.series(symbol, self._name(tf)).truncate(0)
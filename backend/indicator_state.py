@@ -0,0 +1,340 @@
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import pandas as pd
+
+NAN = float('nan')
+
+# Parameters shared with DataProcessor.calculate_indicators (talib keyword names)
+INDICATOR_PARAMS = {
+    'sma': {'timeperiod': 20},
+    'ema': {'timeperiod': 20},
+    'rsi': {'timeperiod': 14},
+    'macd': {'fastperiod': 12, 'slowperiod': 26, 'signalperiod': 9},
+    'bbands': {'timeperiod': 20, 'nbdevup': 2.0, 'nbdevdn': 2.0},
+    'atr': {'timeperiod': 14},
+    'adx': {'timeperiod': 14},
+    'stoch': {'fastk_period': 5, 'slowk_period': 3, 'slowd_period': 3},
+}
+
+@dataclass
+class IndicatorSnapshot:
+    sma: float
+    ema: float
+    rsi: float
+    macd: Dict[str, float]
+    bollinger: Dict[str, float]
+    atr: float
+    adx: float
+    stoch: Dict[str, float]
+
+def _is_zero(value: float) -> bool:
+    return -1e-8 < value < 1e-8
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+class RollingSMA:
+    """
+    Simple moving average over a fixed window with a running total
+    """
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self.total += x
+        if len(self.window) == self.period:
+            self.value = self.total / self.period
+        return self.value
+
+class RollingEMA:
+    """
+    EMA seeded with the SMA of the first `period` values, like talib
+    """
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.seed = []
+        self.value = NAN
+
+    def seed_with(self, values) -> float:
+        self.seed = None
+        self.value = sum(values) / self.period
+        return self.value
+
+    def update(self, x: float) -> float:
+        if self.seed is not None:
+            self.seed.append(x)
+            if len(self.seed) == self.period:
+                self.seed_with(self.seed)
+            return self.value
+        self.value = (x - self.value) * self.k + self.value
+        return self.value
+
+class RollingRSI:
+    """
+    Wilder RSI, seeded with the average gain/loss of the first `period` changes
+    """
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = None
+        self.count = 0
+        self.gain = 0.0
+        self.loss = 0.0
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        if self.prev_close is None:
+            self.prev_close = close
+            return self.value
+
+        change = close - self.prev_close
+        self.prev_close = close
+        self.count += 1
+
+        if self.count <= self.period:
+            if change < 0:
+                self.loss -= change
+            else:
+                self.gain += change
+            if self.count < self.period:
+                return self.value
+            self.loss /= self.period
+            self.gain /= self.period
+        else:
+            self.loss *= self.period - 1
+            self.gain *= self.period - 1
+            if change < 0:
+                self.loss -= change
+            else:
+                self.gain += change
+            self.loss /= self.period
+            self.gain /= self.period
+
+        total = self.gain + self.loss
+        self.value = 100.0 * (self.gain / total) if not _is_zero(total) else 0.0
+        return self.value
+
+class RollingMACD:
+    """
+    MACD with talib's alignment: both EMAs start on the bar where the slow one is seeded
+    """
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.slow_period = slow
+        self.fast_ema = RollingEMA(fast)
+        self.slow_ema = RollingEMA(slow)
+        self.signal_ema = RollingEMA(signal)
+        self.window = deque(maxlen=slow)
+        self.value = {'macd': NAN, 'signal': NAN, 'histogram': NAN}
+
+    def update(self, close: float) -> Dict[str, float]:
+        if self.window is not None:
+            self.window.append(close)
+            if len(self.window) < self.slow_period:
+                return self.value
+            self.slow_ema.seed_with(self.window)
+            self.fast_ema.seed_with(list(self.window)[-self.fast_ema.period:])
+            self.window = None
+        else:
+            self.slow_ema.update(close)
+            self.fast_ema.update(close)
+
+        macd = self.fast_ema.value - self.slow_ema.value
+        signal = self.signal_ema.update(macd)
+        if not math.isnan(signal):
+            self.value = {'macd': macd, 'signal': signal, 'histogram': macd - signal}
+        return self.value
+
+class RollingBollinger:
+    """
+    Bollinger Bands over an SMA with the population standard deviation
+    """
+    def __init__(self, period: int = 20, nbdevup: float = 2.0, nbdevdn: float = 2.0):
+        self.period = period
+        self.nbdevup = nbdevup
+        self.nbdevdn = nbdevdn
+        self.sma = RollingSMA(period)
+        self.total_sq = 0.0
+        self.value = {'upper': NAN, 'middle': NAN, 'lower': NAN}
+
+    def update(self, close: float) -> Dict[str, float]:
+        window = self.sma.window
+        if len(window) == self.period:
+            self.total_sq -= window[0] * window[0]
+        middle = self.sma.update(close)
+        self.total_sq += close * close
+        if math.isnan(middle):
+            return self.value
+
+        variance = self.total_sq / self.period - middle * middle
+        deviation = math.sqrt(variance) if variance >= 1e-8 else 0.0
+        self.value = {
+            'upper': middle + deviation * self.nbdevup,
+            'middle': middle,
+            'lower': middle - deviation * self.nbdevdn
+        }
+        return self.value
+
+class RollingATR:
+    """
+    Wilder ATR seeded with the mean true range of the first `period` bars
+    """
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = None
+        self.seed = []
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.prev_close is None:
+            self.prev_close = close
+            return self.value
+
+        tr = _true_range(high, low, self.prev_close)
+        self.prev_close = close
+        if self.seed is not None:
+            self.seed.append(tr)
+            if len(self.seed) == self.period:
+                self.value = sum(self.seed) / self.period
+                self.seed = None
+            return self.value
+
+        self.value = (self.value * (self.period - 1) + tr) / self.period
+        return self.value
+
+class RollingADX:
+    """
+    Wilder ADX: directional movement and true range sums over period-1 bars,
+    then the average of the first `period` DX values seeds the ADX
+    """
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev = None
+        self.count = 0
+        self.plus_dm = 0.0
+        self.minus_dm = 0.0
+        self.tr = 0.0
+        self.sum_dx = 0.0
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.prev is None:
+            self.prev = (high, low, close)
+            return self.value
+
+        prev_high, prev_low, prev_close = self.prev
+        self.prev = (high, low, close)
+        diff_plus = high - prev_high
+        diff_minus = prev_low - low
+        tr = _true_range(high, low, prev_close)
+        self.count += 1
+        n = self.period
+
+        if self.count >= n:
+            self.minus_dm -= self.minus_dm / n
+            self.plus_dm -= self.plus_dm / n
+        if diff_minus > 0 and diff_plus < diff_minus:
+            self.minus_dm += diff_minus
+        elif diff_plus > 0 and diff_plus > diff_minus:
+            self.plus_dm += diff_plus
+        self.tr = self.tr - self.tr / n + tr if self.count >= n else self.tr + tr
+
+        if self.count < n:
+            return self.value
+
+        dx = None
+        if not _is_zero(self.tr):
+            minus_di = 100.0 * (self.minus_dm / self.tr)
+            plus_di = 100.0 * (self.plus_dm / self.tr)
+            di_total = minus_di + plus_di
+            if not _is_zero(di_total):
+                dx = 100.0 * (abs(minus_di - plus_di) / di_total)
+
+        if self.count < 2 * n - 1:
+            self.sum_dx += dx or 0.0
+        elif self.count == 2 * n - 1:
+            self.sum_dx += dx or 0.0
+            self.value = self.sum_dx / n
+        elif dx is not None:
+            self.value = (self.value * (n - 1) + dx) / n
+        return self.value
+
+class RollingStochastic:
+    """
+    Slow stochastic: fast %K over `fastk` bars, smoothed by SMAs into %K and %D
+    """
+    def __init__(self, fastk: int = 5, slowk: int = 3, slowd: int = 3):
+        self.highs = deque(maxlen=fastk)
+        self.lows = deque(maxlen=fastk)
+        self.slowk = RollingSMA(slowk)
+        self.slowd = RollingSMA(slowd)
+        self.value = {'k': NAN, 'd': NAN}
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        self.highs.append(high)
+        self.lows.append(low)
+        if len(self.highs) < self.highs.maxlen:
+            return self.value
+
+        lowest = min(self.lows)
+        diff = (max(self.highs) - lowest) / 100.0
+        fast_k = (close - lowest) / diff if diff != 0.0 else 0.0
+        k = self.slowk.update(fast_k)
+        if math.isnan(k):
+            return self.value
+        d = self.slowd.update(k)
+        if not math.isnan(d):
+            self.value = {'k': k, 'd': d}
+        return self.value
+
+class IndicatorState:
+    """
+    Incremental version of DataProcessor.calculate_indicators.
+
+    Each update() takes one new bar and advances all eight indicators in O(1),
+    with the same parameters (INDICATOR_PARAMS) and warm-up conventions as the
+    talib calls, so the values match the last row of a full recomputation.
+    """
+    def __init__(self, params: Optional[Dict[str, Dict]] = None):
+        params = INDICATOR_PARAMS if params is None else params
+        self.sma = RollingSMA(params['sma']['timeperiod'])
+        self.ema = RollingEMA(params['ema']['timeperiod'])
+        self.rsi = RollingRSI(params['rsi']['timeperiod'])
+        self.macd = RollingMACD(params['macd']['fastperiod'], params['macd']['slowperiod'], params['macd']['signalperiod'])
+        self.bollinger = RollingBollinger(params['bbands']['timeperiod'], params['bbands']['nbdevup'], params['bbands']['nbdevdn'])
+        self.atr = RollingATR(params['atr']['timeperiod'])
+        self.adx = RollingADX(params['adx']['timeperiod'])
+        self.stoch = RollingStochastic(params['stoch']['fastk_period'], params['stoch']['slowk_period'], params['stoch']['slowd_period'])
+        self.bars = 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, params: Optional[Dict[str, Dict]] = None) -> 'IndicatorState':
+        """
+        Build a state primed with the bars of an OHLCV DataFrame
+        """
+        state = cls(params)
+        for high, low, close in zip(df['high'].to_numpy(float), df['low'].to_numpy(float), df['close'].to_numpy(float)):
+            state.update(high=high, low=low, close=close)
+        return state
+
+    def update(self, open: float = NAN, high: float = NAN, low: float = NAN,
+               close: float = NAN, volume: float = 0.0) -> IndicatorSnapshot:
+        self.bars += 1
+        return IndicatorSnapshot(
+            sma=self.sma.update(close),
+            ema=self.ema.update(close),
+            rsi=self.rsi.update(close),
+            macd=dict(self.macd.update(close)),
+            bollinger=dict(self.bollinger.update(close)),
+            atr=self.atr.update(high, low, close),
+            adx=self.adx.update(high, low, close),
+            stoch=dict(self.stoch.update(high, low, close))
+        )
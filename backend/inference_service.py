@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ml_model import TradingLSTM
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _PendingRequest:
+    symbol: str
+    inputs: np.ndarray
+    future: asyncio.Future
+    enqueued: float
+
+class BatchedPredictor:
+    """
+    Micro-batching front end for TradingLSTM.
+
+    Concurrent predict() calls are queued and grouped into one forward pass of
+    at most max_batch_size sequences. A batch is sent as soon as it is full or
+    max_wait_ms after its first request. The forward pass runs on a dedicated
+    thread so the event loop keeps accepting requests meanwhile.
+    """
+    def __init__(self,
+                 lstm: 'TradingLSTM',
+                 max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0,
+                 latency_window: int = 10000):
+        self.lstm = lstm
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.latencies = deque(maxlen=latency_window)
+        self.batch_sizes = deque(maxlen=latency_window)
+        self.queue: Optional[asyncio.Queue] = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lstm-inference')
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_files(cls, model_path: str = 'model', scaler_path: str = 'scaler.pkl', **kwargs) -> 'BatchedPredictor':
+        from ml_model import TradingLSTM
+        lstm = TradingLSTM()
+        lstm.load(model_path, scaler_path)
+        return cls(lstm, **kwargs)
+
+    def warmup(self):
+        """
+        Run the first forward passes (graph building, memory allocation)
+        before real traffic arrives, for a single request and a full batch
+        """
+        shape = (self.lstm.sequence_length, self.lstm.n_features)
+        for batch_size in (1, self.max_batch_size):
+            self.lstm.forward(np.zeros((batch_size,) + shape, dtype=np.float32))
+        logger.info("LSTM inference warmed up")
+
+    async def start(self, warmup: bool = True):
+        if self._task is not None:
+            return
+        if warmup:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.warmup)
+        self.queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.executor.shutdown(wait=False)
+
+    async def predict(self, symbol: str, inputs: np.ndarray) -> np.ndarray:
+        """
+        Predict for one (sequence_length, n_features) sequence, or a small
+        (k, sequence_length, n_features) stack of them
+        """
+        if self._task is None:
+            raise RuntimeError("BatchedPredictor is not started")
+        inputs = np.asarray(inputs, dtype=np.float32)
+        if inputs.ndim == 2:
+            inputs = inputs[None]
+        # Checked here so one malformed request cannot fail the batch it would join
+        shape = (self.lstm.sequence_length, self.lstm.n_features)
+        if inputs.ndim != 3 or inputs.shape[1:] != shape:
+            raise ValueError(f"Expected inputs of shape {shape} or (k, {shape[0]}, {shape[1]}), got {inputs.shape}")
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(_PendingRequest(symbol, inputs, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            size = len(batch[0].inputs)
+            deadline = loop.time() + self.max_wait
+
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                size += len(request.inputs)
+
+            await self._run_batch(loop, batch)
+
+    async def _run_batch(self, loop, batch: List[_PendingRequest]):
+        try:
+            inputs = np.concatenate([request.inputs for request in batch])
+            predictions = await loop.run_in_executor(self.executor, self.lstm.forward, inputs)
+        except Exception as e:
+            logger.error(f"Batched prediction failed: {str(e)}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        done = time.perf_counter()
+        self.batch_sizes.append(len(inputs))
+        offset = 0
+        for request in batch:
+            count = len(request.inputs)
+            if not request.future.done():
+                request.future.set_result(predictions[offset:offset + count])
+            offset += count
+            self.latencies.append(done - request.enqueued)
+
+    def latency_stats(self) -> Dict[str, float]:
+        """
+        Latency percentiles (ms) and mean batch size over the recent requests
+        """
+        if not self.latencies:
+            return {'requests': 0}
+        latencies = np.fromiter(self.latencies, dtype=np.float64) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {
+            'requests': len(latencies),
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': float(latencies.max()),
+            'mean_batch_size': float(np.mean(self.batch_sizes))
+        }
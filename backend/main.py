@@ -1,9 +1,102 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from backend.mt5_manager import mt5_manager
+from backend.mt5_gateway import mt5_gateway, PRIORITY_REALTIME, PRIORITY_HISTORY
+from backend.response_cache import ResponseCache, next_bar_close
+from backend.market_data_encoding import JSON_MEDIA_TYPE, MarketDataSnapshot, MEDIA_TYPES, binary_headers, dumps, negotiate_format
+from backend.market_stream import MarketStream
+from backend.history_sync import HistorySync
+from backend.bar_store import BarStore
+from backend.order_book import OrderBookRing
+from backend.metrics import registry, profiler, stage_timer, timed
 import MetaTrader5 as mt5
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+TIMEFRAME_MAP = {
+    "M1": mt5.TIMEFRAME_M1,
+    "M5": mt5.TIMEFRAME_M5,
+    "M15": mt5.TIMEFRAME_M15,
+    "M30": mt5.TIMEFRAME_M30,
+    "H1": mt5.TIMEFRAME_H1,
+    "H4": mt5.TIMEFRAME_H4,
+    "D1": mt5.TIMEFRAME_D1,
+}
+
+# Market data responses are shared by all clients until the current bar closes
+market_data_cache = ResponseCache(max_entries=256)
+
+# Bars already downloaded stay in memory; later requests only fetch newer ones
+history_sync = HistorySync(mt5_manager.get_market_data, mt5_manager.get_market_data_range, timeframes=TIMEFRAME_MAP)
+# Downloaded bars are also written to the on-disk bar store (attached at
+# startup), which seeds the cache after a restart; empty disables it
+BAR_STORE_PATH = os.getenv('BAR_STORE_PATH', 'bar_store')
+
+# All terminal access goes through the gateway thread; the last bars and ticks
+# jump ahead of queued history pulls
+async def _fetch_rates(symbol, tf, num_candles):
+    priority = PRIORITY_REALTIME if num_candles <= 2 else PRIORITY_HISTORY
+    return await mt5_gateway.call(history_sync.get_rates, symbol, tf, num_candles, priority=priority)
+
+async def _fetch_ticks(symbol, since_msc):
+    return await mt5_gateway.call(mt5_manager.get_ticks, symbol, since_msc, priority=PRIORITY_REALTIME)
+
+# Depth-of-market history per symbol, bounded by the ring capacity
+order_books = {}
+
+# One upstream poller per symbol/timeframe feeds every WebSocket subscriber
+market_stream = MarketStream(_fetch_rates, _fetch_ticks, poll_interval=1.0)
+
+# LSTM loaded in the background after startup; TensorFlow is only imported there
+MODEL_PATH = os.getenv('MODEL_PATH', 'model')
+SCALER_PATH = os.getenv('SCALER_PATH', 'scaler.pkl')
+model_state = {"status": "not_loaded", "error": None}
+predictor = None
+_preload_task = None
+
+async def _preload_model():
+    global predictor
+    if not (os.path.exists(MODEL_PATH) and os.path.exists(SCALER_PATH)):
+        model_state["status"] = "unavailable"
+        return
+    model_state["status"] = "loading"
+    try:
+        from backend.inference_service import BatchedPredictor
+        loaded = await asyncio.to_thread(BatchedPredictor.from_files, MODEL_PATH, SCALER_PATH)
+        await loaded.start(warmup=True)
+        predictor = loaded
+        model_state["status"] = "ready"
+    except Exception as e:
+        logging.error(f"Model preload failed: {str(e)}")
+        model_state.update(status="failed", error=str(e))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Nothing slow runs at import time: the MT5 connection and the model
+    preload start here in the background, so /health answers immediately
+    """
+    global _preload_task
+    if BAR_STORE_PATH and history_sync.store is None:
+        history_sync.store = BarStore(BAR_STORE_PATH)
+    mt5_gateway.submit(mt5_manager.initialize_connection, priority=PRIORITY_REALTIME)
+    _preload_task = asyncio.create_task(_preload_model())
+
+    # Opt-in sampling profiler; can also be toggled at runtime via /profiler
+    if os.getenv('SAMPLING_PROFILER') == '1':
+        profiler.start(float(os.getenv('SAMPLING_PROFILER_INTERVAL', '0.01')))
+
+    yield
+
+    if _preload_task is not None and not _preload_task.done():
+        _preload_task.cancel()
+    if predictor is not None:
+        await predictor.stop()
+    profiler.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configuração do CORS
 app.add_middleware(
@@ -18,53 +111,130 @@ app.add_middleware(
 async def health_check():
     try:
         if not mt5_manager.connected:
-            return {"status": "error", "message": "MT5 não está conectado"}
-        return {"status": "ok", "message": "Servidor está funcionando"}
+            return {"status": "error", "message": "MT5 não está conectado", "model": model_state["status"]}
+        return {"status": "ok", "message": "Servidor está funcionando", "model": model_state["status"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/mt5-status")
 async def get_mt5_status():
-    status = mt5_manager.get_connection_status()
+    status = await mt5_gateway.call(mt5_manager.get_connection_status, priority=PRIORITY_REALTIME)
     if not status["connected"]:
         raise HTTPException(status_code=503, detail=status["last_error"])
     return status
 
 @app.get("/market-data/{symbol}")
-async def get_market_data(symbol: str, timeframe: str = "M5", num_candles: int = 1000):
-    timeframe_map = {
-        "M1": mt5.TIMEFRAME_M1,
-        "M5": mt5.TIMEFRAME_M5,
-        "M15": mt5.TIMEFRAME_M15,
-        "M30": mt5.TIMEFRAME_M30,
-        "H1": mt5.TIMEFRAME_H1,
-        "H4": mt5.TIMEFRAME_H4,
-        "D1": mt5.TIMEFRAME_D1,
-    }
+@timed("market_data_request")
+async def get_market_data(symbol: str,
+                          timeframe: str = "M5",
+                          num_candles: int = 1000,
+                          layout: str = "records",
+                          accept: str = Header(None)):
+    """
+    Candles as JSON records (default) or parallel arrays (layout=columnar);
+    Accept: application/vnd.apache.arrow.stream or application/octet-stream
+    selects Arrow IPC or the raw MT5 rates records instead
+    """
+    tf = TIMEFRAME_MAP.get(timeframe, mt5.TIMEFRAME_M5)
     
-    tf = timeframe_map.get(timeframe, mt5.TIMEFRAME_M5)
-    data = mt5_manager.get_market_data(symbol, tf, num_candles)
+    async def load():
+        data = await _fetch_rates(symbol, tf, num_candles)
+        
+        if data is None:
+            raise HTTPException(status_code=503, detail="Failed to get market data")
+        
+        return MarketDataSnapshot(data, symbol, timeframe)
     
-    if data is None:
-        raise HTTPException(status_code=503, detail="Failed to get market data")
+    snapshot = await market_data_cache.get_or_load(
+        (symbol, timeframe, num_candles), load, expires_at=next_bar_close(timeframe)
+    )
+    fmt = negotiate_format(accept, layout)
+    headers = binary_headers(snapshot.rates) if fmt == "binary" else None
+    with stage_timer("serialize_market_data"):
+        body = snapshot.body(fmt)
+    return Response(content=body, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+@app.get("/order-book/{symbol}")
+async def get_order_book(symbol: str, history: int = 0):
+    """
+    Records the current depth of market and returns its best levels and
+    features (spread, mid, microprice, imbalance, depth_imbalance, ofi);
+    history=n adds the feature columns of the last n snapshots
+    """
+    book = await mt5_gateway.call(mt5_manager.get_order_book, symbol, priority=PRIORITY_REALTIME)
+    if book is None:
+        raise HTTPException(status_code=503, detail="Failed to get order book")
     
-    market_data = []
-    for candle in data:
-        market_data.append({
-            "time": candle[0],
-            "open": candle[1],
-            "high": candle[2],
-            "low": candle[3],
-            "close": candle[4],
-            "volume": candle[5],
-            "spread": candle[6]
-        })
+    ring = order_books.get(symbol)
+    if ring is None:
+        ring = order_books[symbol] = OrderBookRing()
+    ring.append_book(book)
     
-    return {
-        "market_data": market_data,
-        "symbol": symbol,
-        "timeframe": timeframe
-    }
+    response = {"symbol": symbol, "latest": ring.latest()}
+    if history > 0:
+        response["history"] = {name: values.tolist() for name, values in ring.history(history).items()}
+    return Response(content=dumps(response), media_type=JSON_MEDIA_TYPE)
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Per-stage latency histograms, recent p50/p95/p99 and error counts in
+    the Prometheus text format
+    """
+    return Response(content=registry.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.post("/profiler")
+async def toggle_profiler(enabled: bool, interval_ms: float = 10, reset: bool = False):
+    if not interval_ms >= profiler.MIN_INTERVAL * 1000:
+        raise HTTPException(status_code=400, detail=f"interval_ms must be at least {profiler.MIN_INTERVAL * 1000:g}")
+    if reset:
+        profiler.reset()
+    if enabled:
+        profiler.start(interval_ms / 1000)
+    else:
+        profiler.stop()
+    return {"running": profiler.running, "interval_ms": profiler.interval * 1000, "samples": profiler.total}
+
+@app.get("/profiler")
+async def get_profile(view: str = "top", limit: int = 50):
+    """
+    Sampled stacks as folded lines for flamegraph tools (view=folded) or
+    the functions seen most often at the top of the stack (view=top)
+    """
+    if view == "folded":
+        return Response(content=profiler.folded(limit), media_type="text/plain; charset=utf-8")
+    return {"running": profiler.running, "samples": profiler.total, "top": profiler.top_functions(limit)}
+
+@app.websocket("/ws/market-data/{symbol}")
+async def stream_market_data(websocket: WebSocket, symbol: str, timeframe: str = "M5", num_candles: int = 1000):
+    """
+    Sends a columnar snapshot, then "bar" messages (new=true for a new candle,
+    false for an update of the forming one) and "ticks" batches as they arrive
+    """
+    await websocket.accept()
+    tf = TIMEFRAME_MAP.get(timeframe, mt5.TIMEFRAME_M5)
+    subscription = await market_stream.subscribe(symbol, timeframe, tf, num_candles)
+
+    async def send_updates():
+        while True:
+            message = await subscription.queue.get()
+            await websocket.send_text(message)
+
+    async def wait_for_disconnect():
+        # Clients send nothing; reading notices the close without waiting for the next update
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.create_task(send_updates()), asyncio.create_task(wait_for_disconnect())]
+    for task in tasks:
+        # A send to a closed socket raises WebSocketDisconnect; nothing to report
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        market_stream.unsubscribe(subscription)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,129 @@
+import json
+from typing import Callable, Dict, List
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+def _pyarrow():
+    # Imported on the first Arrow response rather than at startup
+    try:
+        import pyarrow as pa
+    except ImportError:  # pragma: no cover - Arrow output is optional
+        return None
+    return pa
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+# Response field -> MT5 rates field
+FIELDS = (
+    ("time", "time"),
+    ("open", "open"),
+    ("high", "high"),
+    ("low", "low"),
+    ("close", "close"),
+    ("volume", "tick_volume"),
+    ("spread", "spread"),
+)
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+def rates_to_columns(rates: np.ndarray) -> Dict[str, List]:
+    """
+    Parallel lists, one per field, converted in bulk with ndarray.tolist()
+    """
+    return {name: rates[field].tolist() for name, field in FIELDS}
+
+def encode_records(rates: np.ndarray, symbol: str, timeframe: str) -> bytes:
+    """
+    The original per-candle layout: {"market_data": [{"time": ..., ...}, ...]}
+    """
+    columns = rates_to_columns(rates)
+    names = list(columns)
+    market_data = [dict(zip(names, row)) for row in zip(*columns.values())]
+    return dumps({"market_data": market_data, "symbol": symbol, "timeframe": timeframe})
+
+def encode_columnar(rates: np.ndarray, symbol: str, timeframe: str) -> bytes:
+    """
+    {"columns": {"time": [...], "open": [...], ...}, "length": n}
+    """
+    return dumps({
+        "columns": rates_to_columns(rates),
+        "length": len(rates),
+        "symbol": symbol,
+        "timeframe": timeframe
+    })
+
+def encode_arrow(rates: np.ndarray, symbol: str, timeframe: str) -> bytes:
+    """
+    Arrow IPC stream with one record batch; symbol/timeframe go in the schema metadata
+    """
+    pa = _pyarrow()
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    batch = pa.RecordBatch.from_arrays(
+        [pa.array(rates[field]) for _, field in FIELDS],
+        names=[name for name, _ in FIELDS]
+    )
+    batch = batch.replace_schema_metadata({"symbol": symbol, "timeframe": timeframe})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+def encode_binary(rates: np.ndarray, symbol: str, timeframe: str) -> bytes:
+    """
+    The rates array as raw little-endian records; the layout is sent in the
+    X-Rates-Dtype header (see binary_headers)
+    """
+    return np.ascontiguousarray(rates).tobytes()
+
+def binary_headers(rates: np.ndarray) -> Dict[str, str]:
+    return {"X-Rates-Dtype": json.dumps(rates.dtype.descr), "X-Rates-Count": str(len(rates))}
+
+ENCODERS: Dict[str, Callable[[np.ndarray, str, str], bytes]] = {
+    "records": encode_records,
+    "columnar": encode_columnar,
+    "arrow": encode_arrow,
+    "binary": encode_binary,
+}
+MEDIA_TYPES = {
+    "records": JSON_MEDIA_TYPE,
+    "columnar": JSON_MEDIA_TYPE,
+    "arrow": ARROW_MEDIA_TYPE,
+    "binary": BINARY_MEDIA_TYPE,
+}
+
+def negotiate_format(accept: str, layout: str = "records") -> str:
+    """
+    Pick the encoding from the Accept header, falling back to the JSON layout
+    """
+    accept = accept or ""
+    if ARROW_MEDIA_TYPE in accept and _pyarrow() is not None:
+        return "arrow"
+    if BINARY_MEDIA_TYPE in accept:
+        return "binary"
+    return "columnar" if layout == "columnar" else "records"
+
+class MarketDataSnapshot:
+    """
+    Rates fetched for one cache key, with each encoding built at most once
+    """
+    def __init__(self, rates: np.ndarray, symbol: str, timeframe: str):
+        self.rates = rates
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self._bodies: Dict[str, bytes] = {}
+
+    def body(self, fmt: str) -> bytes:
+        if fmt not in self._bodies:
+            self._bodies[fmt] = ENCODERS[fmt](self.rates, self.symbol, self.timeframe)
+        return self._bodies[fmt]
@@ -4,16 +4,27 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import MetaTrader5 as mt5
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple
 import logging
+from backend.mt5_gateway import MT5Gateway, mt5_gateway, PRIORITY_REALTIME, PRIORITY_HISTORY
+from backend.tick_aggregator import aggregate_ticks, bars_to_frame
+from backend.order_book import OrderBookRing
+from backend.metrics import timed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class MarketDataFetcher:
-    def __init__(self):
+    """
+    Async access to MT5 market data. Every terminal call runs on the shared
+    MT5 gateway thread, so awaiting these methods never blocks the event loop.
+    """
+    def __init__(self, gateway: MT5Gateway = mt5_gateway):
         self.connected = False
-        self.initialize_mt5()
+        self.gateway = gateway
+        self.order_books: Dict[str, OrderBookRing] = {}
+        self._book_symbols = set()
+        self.gateway.call_sync(self.initialize_mt5, priority=PRIORITY_REALTIME)
         
     def initialize_mt5(self) -> bool:
         try:
@@ -29,6 +40,7 @@ class MarketDataFetcher:
             logger.error(f"Error initializing MT5: {str(e)}")
             return False
     
+    @timed('fetcher_ohlcv')
     async def fetch_ohlcv(self, 
                          symbol: str,
                          timeframe: mt5.TIMEFRAME_M1,
@@ -37,13 +49,9 @@ class MarketDataFetcher:
         Fetch OHLCV data from MT5
         """
         try:
-            if not self.connected:
-                if not self.initialize_mt5():
-                    return None
-                
-            rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, num_candles)
+            rates = await self.gateway.call(self._copy_rates, symbol, timeframe, num_candles,
+                                            priority=PRIORITY_HISTORY)
             if rates is None:
-                logger.error(f"Failed to get market data: {mt5.last_error()}")
                 return None
             
             df = pd.DataFrame(rates)
@@ -54,14 +62,61 @@ class MarketDataFetcher:
             logger.error(f"Error fetching OHLCV data: {str(e)}")
             return None
     
+    @timed('fetcher_many')
+    async def fetch_many(self,
+                         requests: Sequence[Tuple[str, int, int]],
+                         max_concurrency: int = 8) -> Dict[Tuple[str, int, int], Optional[pd.DataFrame]]:
+        """
+        Fetch OHLCV data for many (symbol, timeframe, num_candles) requests at once.
+
+        Requests for the same symbol/timeframe are merged into a single fetch of
+        the largest count and the smaller ones are served from its tail. Returns
+        a DataFrame (or None on failure) per request tuple.
+        """
+        largest: Dict[Tuple[str, int], int] = {}
+        for symbol, timeframe, num_candles in requests:
+            if num_candles < 0:
+                raise ValueError(f"num_candles must be >= 0, got {num_candles} for {symbol}")
+            key = (symbol, timeframe)
+            largest[key] = max(largest.get(key, 0), num_candles)
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch(symbol, timeframe, num_candles):
+            async with semaphore:
+                return await self.fetch_ohlcv(symbol, timeframe, num_candles)
+        
+        frames = await asyncio.gather(*(fetch(symbol, timeframe, count)
+                                        for (symbol, timeframe), count in largest.items()))
+        fetched = dict(zip(largest, frames))
+        
+        results = {}
+        for symbol, timeframe, num_candles in requests:
+            df = fetched[(symbol, timeframe)]
+            if df is not None and len(df) > num_candles:
+                # Not iloc[-num_candles:], which is the whole frame for 0
+                df = df.iloc[len(df) - num_candles:].reset_index(drop=True)
+            results[(symbol, timeframe, num_candles)] = df
+        return results
+    
+    def _copy_rates(self, symbol: str, timeframe: int, num_candles: int) -> Optional[np.ndarray]:
+        if not self.connected:
+            if not self.initialize_mt5():
+                return None
+            
+        rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, num_candles)
+        if rates is None:
+            logger.error(f"Failed to get market data: {mt5.last_error()}")
+        return rates
+    
+    @timed('fetcher_order_book')
     async def fetch_order_book(self, symbol: str) -> Optional[Dict]:
         """
         Fetch order book data from MT5
         """
         try:
-            book = mt5.market_book_get(symbol)
+            book = await self.gateway.call(self._market_book, symbol, priority=PRIORITY_REALTIME)
             if book is None:
-                logger.error(f"Failed to get order book: {mt5.last_error()}")
                 return None
             
             asks = [{'price': ask.price, 'volume': ask.volume} 
@@ -79,14 +134,46 @@ class MarketDataFetcher:
             logger.error(f"Error fetching order book: {str(e)}")
             return None
     
+    @timed('fetcher_update_order_book')
+    async def update_order_book(self, symbol: str) -> Optional[OrderBookRing]:
+        """
+        Record the current order book in the symbol's OrderBookRing and return it
+        """
+        try:
+            book = await self.gateway.call(self._market_book, symbol, priority=PRIORITY_REALTIME)
+            if book is None:
+                return None
+            
+            ring = self.order_books.get(symbol)
+            if ring is None:
+                ring = self.order_books[symbol] = OrderBookRing()
+            ring.append_book(book)
+            return ring
+            
+        except Exception as e:
+            logger.error(f"Error updating order book: {str(e)}")
+            return None
+    
+    def _market_book(self, symbol: str):
+        # market_book_get only returns data after subscribing to the symbol's book
+        if symbol not in self._book_symbols:
+            if not mt5.market_book_add(symbol):
+                logger.error(f"Failed to subscribe to order book: {mt5.last_error()}")
+                return None
+            self._book_symbols.add(symbol)
+        book = mt5.market_book_get(symbol)
+        if book is None:
+            logger.error(f"Failed to get order book: {mt5.last_error()}")
+        return book
+    
+    @timed('fetcher_tick_data')
     async def fetch_tick_data(self, symbol: str, num_ticks: int = 1000) -> Optional[pd.DataFrame]:
         """
         Fetch latest tick data from MT5
         """
         try:
-            ticks = mt5.copy_ticks_from_pos(symbol, 0, num_ticks, mt5.COPY_TICKS_ALL)
+            ticks = await self.gateway.call(self._copy_ticks, symbol, num_ticks, priority=PRIORITY_REALTIME)
             if ticks is None:
-                logger.error(f"Failed to get tick data: {mt5.last_error()}")
                 return None
             
             df = pd.DataFrame(ticks)
@@ -97,7 +184,33 @@ class MarketDataFetcher:
             logger.error(f"Error fetching tick data: {str(e)}")
             return None
     
+    @timed('fetcher_tick_bars')
+    async def fetch_tick_bars(self, symbol: str, kind: str = 'time', size: float = 5,
+                              num_ticks: int = 10000) -> Optional[pd.DataFrame]:
+        """
+        Sub-minute bars built from the latest ticks (see tick_aggregator.aggregate_ticks)
+        """
+        try:
+            ticks = await self.gateway.call(self._copy_ticks, symbol, num_ticks, priority=PRIORITY_HISTORY)
+            if ticks is None:
+                return None
+            
+            return bars_to_frame(aggregate_ticks(ticks, kind, size))
+            
+        except Exception as e:
+            logger.error(f"Error building tick bars: {str(e)}")
+            return None
+    
+    def _copy_ticks(self, symbol: str, num_ticks: int) -> Optional[np.ndarray]:
+        ticks = mt5.copy_ticks_from_pos(symbol, 0, num_ticks, mt5.COPY_TICKS_ALL)
+        if ticks is None:
+            logger.error(f"Failed to get tick data: {mt5.last_error()}")
+        return ticks
+    
     def __del__(self):
         if self.connected:
-            mt5.shutdown()
-            logger.info("MT5 connection closed")
\ No newline at end of file
+            try:
+                self.gateway.submit(mt5.shutdown)
+                logger.info("MT5 connection closed")
+            except Exception:
+                pass
\ No newline at end of file
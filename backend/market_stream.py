@@ -0,0 +1,186 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import numpy as np
+from backend.market_data_encoding import FIELDS, dumps, rates_to_columns
+
+logger = logging.getLogger(__name__)
+
+RatesFetcher = Callable[[str, int, int], Awaitable[Optional[np.ndarray]]]
+TicksFetcher = Callable[[str, int], Awaitable[Optional[np.ndarray]]]
+
+TICK_FIELDS = ("time_msc", "bid", "ask", "last", "volume")
+
+class Subscription:
+    def __init__(self, feed: "_Feed", num_candles: int, queue_size: int):
+        self.feed = feed
+        self.num_candles = num_candles
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def push(self, message: str):
+        """
+        Queue a message; a subscriber that fell too far behind gets its
+        backlog replaced by a fresh snapshot instead of blocking the feed
+        """
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(self.feed.snapshot_message(self.num_candles))
+
+class _Feed:
+    def __init__(self, symbol: str, timeframe: str, tf: int):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.tf = tf
+        self.rates: Optional[np.ndarray] = None
+        self.last_tick_msc = 0
+        self.subscribers: Set[Subscription] = set()
+        self.pending = 0  # subscribe calls still loading the window
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def window(self) -> int:
+        return max((s.num_candles for s in self.subscribers), default=0)
+
+    def snapshot_message(self, num_candles: int) -> str:
+        rates = self.rates[-num_candles:] if self.rates is not None else self.rates
+        return dumps({
+            "type": "snapshot",
+            "symbol": self.symbol,
+            "timeframe": self.timeframe,
+            "columns": rates_to_columns(rates) if rates is not None else {},
+        }).decode()
+
+    def bar_message(self, bar, new: bool) -> str:
+        return dumps({
+            "type": "bar",
+            "new": new,
+            "symbol": self.symbol,
+            "bar": {name: bar[field].item() for name, field in FIELDS},
+        }).decode()
+
+    def ticks_message(self, ticks: np.ndarray) -> str:
+        return dumps({
+            "type": "ticks",
+            "symbol": self.symbol,
+            "columns": {field: ticks[field].tolist() for field in TICK_FIELDS},
+        }).decode()
+
+    def broadcast(self, message: str):
+        for subscription in list(self.subscribers):
+            subscription.push(message)
+
+class MarketStream:
+    """
+    Fans live market data out to WebSocket subscribers.
+
+    Each (symbol, timeframe) has one poller that asks the terminal for the last
+    two bars and the ticks since the previous poll. Subscribers get a snapshot
+    once, then only deltas: a new bar, an update of the forming bar, or a
+    batch of new ticks. Messages are encoded once and shared by all
+    subscribers, so the cost follows the update rate rather than history
+    length times clients.
+    """
+    def __init__(self,
+                 fetch_rates: RatesFetcher,
+                 fetch_ticks: Optional[TicksFetcher] = None,
+                 poll_interval: float = 1.0,
+                 queue_size: int = 256):
+        self.fetch_rates = fetch_rates
+        self.fetch_ticks = fetch_ticks
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._feeds: Dict[Tuple[str, str], _Feed] = {}
+
+    async def subscribe(self, symbol: str, timeframe: str, tf: int, num_candles: int = 1000) -> Subscription:
+        key = (symbol, timeframe)
+        feed = self._feeds.get(key)
+        if feed is None:
+            feed = self._feeds[key] = _Feed(symbol, timeframe, tf)
+
+        subscription = Subscription(feed, num_candles, self.queue_size)
+        # While the window loads the feed counts as in use, so an unsubscribe
+        # of its last subscriber does not tear it down under this call
+        feed.pending += 1
+        try:
+            if feed.rates is None or len(feed.rates) < num_candles:
+                await self._load_window(feed, max(num_candles, feed.window))
+            feed.subscribers.add(subscription)
+        finally:
+            feed.pending -= 1
+            self._release(feed)
+        subscription.push(feed.snapshot_message(num_candles))
+
+        if feed.task is None:
+            feed.task = asyncio.create_task(self._poll(feed))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        feed = subscription.feed
+        feed.subscribers.discard(subscription)
+        self._release(feed)
+
+    def _release(self, feed: _Feed):
+        """
+        Stop the poller and drop the feed once nobody is subscribed or subscribing
+        """
+        if feed.subscribers or feed.pending:
+            return
+        if feed.task is not None:
+            feed.task.cancel()
+            feed.task = None
+        if self._feeds.get((feed.symbol, feed.timeframe)) is feed:
+            del self._feeds[(feed.symbol, feed.timeframe)]
+
+    async def _load_window(self, feed: _Feed, count: int):
+        rates = await self.fetch_rates(feed.symbol, feed.tf, count)
+        if rates is not None:
+            feed.rates = np.array(rates)
+
+    async def _poll(self, feed: _Feed):
+        while True:
+            try:
+                await self._poll_once(feed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Market stream poll failed for {feed.symbol} {feed.timeframe}: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _poll_once(self, feed: _Feed):
+        latest = await self.fetch_rates(feed.symbol, feed.tf, 2)
+        if latest is not None and len(latest):
+            if feed.rates is None or not len(feed.rates) or latest['time'][0] > feed.rates['time'][-1]:
+                # Missed at least one complete bar: resynchronize everyone
+                await self._load_window(feed, feed.window)
+                for subscription in list(feed.subscribers):
+                    subscription.push(feed.snapshot_message(subscription.num_candles))
+            else:
+                self._apply_bars(feed, latest)
+
+        if self.fetch_ticks is not None:
+            ticks = await self.fetch_ticks(feed.symbol, feed.last_tick_msc)
+            if ticks is not None and len(ticks):
+                if feed.last_tick_msc:
+                    ticks = ticks[ticks['time_msc'] > feed.last_tick_msc]
+                if len(ticks):
+                    feed.last_tick_msc = int(ticks['time_msc'][-1])
+                    feed.broadcast(feed.ticks_message(ticks))
+
+    def _apply_bars(self, feed: _Feed, latest: np.ndarray):
+        for i in range(len(latest)):
+            bar = latest[i]
+            last = feed.rates[-1]
+            if bar['time'] < last['time']:
+                continue
+            if bar['time'] == last['time']:
+                if bar.tolist() != last.tolist():
+                    feed.rates[-1] = bar
+                    feed.broadcast(feed.bar_message(bar, new=False))
+            else:
+                kept = feed.rates[1:] if len(feed.rates) >= feed.window else feed.rates
+                feed.rates = np.concatenate([kept, latest[i:i + 1]])
+                feed.broadcast(feed.bar_message(bar, new=True))
@@ -0,0 +1,272 @@
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# This module is imported as backend.metrics by the API and as metrics by the
+# flat-import modules (data_processor, ml_model, risk_manager); register it
+# under both names so every stage lands in the same registry
+sys.modules.setdefault('metrics', sys.modules[__name__])
+sys.modules.setdefault('backend.metrics', sys.modules[__name__])
+
+# Histogram upper bounds in seconds, 100 us .. 30 s
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class StageStats:
+    """
+    Latency of one pipeline stage: cumulative Prometheus histogram counts plus
+    the most recent `window` samples for exact p50/p95/p99.
+
+    observe() is a bisect and a few integer updates; a lost count under a rare
+    thread race is accepted in exchange for not taking a lock on the hot path.
+    """
+    def __init__(self, window: int = 2048, buckets: Sequence[float] = BUCKETS):
+        self.buckets = tuple(buckets)
+        self.recent = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+        self.recent.clear()
+
+    def observe(self, seconds: float, error: bool = False):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        if error:
+            self.errors += 1
+        self.recent.append(seconds)
+
+    def quantiles(self, quantiles: Sequence[float] = QUANTILES) -> Dict[float, float]:
+        if not self.recent:
+            return {q: float('nan') for q in quantiles}
+        values = np.percentile(np.fromiter(self.recent, dtype=np.float64), [q * 100 for q in quantiles])
+        return dict(zip(quantiles, values.tolist()))
+
+class MetricsRegistry:
+    def __init__(self, window: int = 2048):
+        self.window = window
+        self.stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name: str) -> StageStats:
+        stats = self.stages.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self.stages.setdefault(name, StageStats(self.window))
+        return stats
+
+    def observe(self, name: str, seconds: float, error: bool = False):
+        self.stage(name).observe(seconds, error)
+
+    def reset(self):
+        # In place: timed() wrappers keep a reference to their StageStats
+        for stats in list(self.stages.values()):
+            stats.reset()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Count, mean and p50/p95/p99 (ms) per stage
+        """
+        summary = {}
+        for name, stats in sorted(self.stages.items()):
+            quantiles = stats.quantiles()
+            summary[name] = {
+                'count': stats.count,
+                'errors': stats.errors,
+                'mean_ms': stats.sum / stats.count * 1000 if stats.count else float('nan'),
+                **{f'p{int(q * 100)}_ms': value * 1000 for q, value in quantiles.items()},
+            }
+        return summary
+
+    def render_prometheus(self) -> str:
+        """
+        The registry in the Prometheus text exposition format
+        """
+        lines = [
+            '# HELP stage_latency_seconds Latency of backend pipeline stages',
+            '# TYPE stage_latency_seconds histogram',
+        ]
+        stages = sorted(self.stages.items())
+        for name, stats in stages:
+            cumulative = 0
+            for bound, count in zip(stats.buckets + (float('inf'),), stats.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'stage_latency_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'stage_latency_seconds_sum{{stage="{name}"}} {stats.sum!r}')
+            lines.append(f'stage_latency_seconds_count{{stage="{name}"}} {stats.count}')
+
+        lines += [
+            f'# HELP stage_latency_recent_seconds Latency quantiles over the last {self.window} calls per stage',
+            '# TYPE stage_latency_recent_seconds gauge',
+        ]
+        for name, stats in stages:
+            if not stats.recent:
+                continue
+            for q, value in stats.quantiles().items():
+                lines.append(f'stage_latency_recent_seconds{{stage="{name}",quantile="{q}"}} {value!r}')
+
+        lines += [
+            '# HELP stage_errors_total Calls of a stage that raised',
+            '# TYPE stage_errors_total counter',
+        ]
+        for name, stats in stages:
+            lines.append(f'stage_errors_total{{stage="{name}"}} {stats.errors}')
+        return '\n'.join(lines) + '\n'
+
+# Shared by every instrumented module
+registry = MetricsRegistry()
+
+@contextmanager
+def stage_timer(name: str, metrics: MetricsRegistry = registry):
+    stats = metrics.stage(name)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stats.observe(time.perf_counter() - start, error=True)
+        raise
+    stats.observe(time.perf_counter() - start)
+
+def timed(name: str, metrics: MetricsRegistry = registry):
+    """
+    Decorator recording each call of a function or coroutine function as stage `name`
+    """
+    def decorator(fn):
+        stats = metrics.stage(name)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException:
+                    stats.observe(time.perf_counter() - start, error=True)
+                    raise
+                stats.observe(time.perf_counter() - start)
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                stats.observe(time.perf_counter() - start, error=True)
+                raise
+            stats.observe(time.perf_counter() - start)
+            return result
+        return wrapper
+    return decorator
+
+class SamplingProfiler:
+    """
+    Opt-in statistical profiler: a daemon thread snapshots the stacks of all
+    other threads every `interval` seconds and counts them in folded form
+    ("thread;outer;...;inner count"), ready for flamegraph tools. Nothing
+    runs while it is stopped. Readers copy the counts under a lock, so they
+    can be called while sampling continues.
+    """
+    # Shorter intervals turn the sampler into a busy loop holding the GIL
+    MIN_INTERVAL = 0.001
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        self.interval = self._check_interval(interval)
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self.total = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def _check_interval(cls, interval: float) -> float:
+        if not interval >= cls.MIN_INTERVAL:
+            raise ValueError(f"Sampling interval must be at least {cls.MIN_INTERVAL * 1000:g} ms")
+        return interval
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None):
+        if interval is not None:
+            interval = self._check_interval(interval)
+        if self.running:
+            return
+        if interval is not None:
+            self.interval = interval
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+            self.total = 0
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stacks.append(';'.join(reversed(stack)))
+            with self._lock:
+                self.samples.update(stacks)
+                self.total += 1
+
+    def snapshot(self) -> Counter:
+        """
+        Copy of the sample counts, safe to iterate while sampling continues
+        """
+        with self._lock:
+            return self.samples.copy()
+
+    def folded(self, limit: Optional[int] = None) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.snapshot().most_common(limit))
+
+    def top_functions(self, limit: int = 20) -> List[Dict]:
+        """
+        Innermost frames by share of samples (self time)
+        """
+        leaves = Counter()
+        for stack, count in self.snapshot().items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [{'function': name, 'samples': count, 'share': count / total}
+                for name, count in leaves.most_common(limit)]
+
+profiler = SamplingProfiler()
@@ -1,21 +1,25 @@
 import numpy as np
-import tensorflow as tf
-from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout, BatchNormalization
-from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
-import joblib
+from sequence_builder import build_sequences
+from metrics import timed
+
+def _keras():
+    # TensorFlow takes seconds to import, so it is only loaded when a model is built or loaded
+    import tensorflow as tf
+    return tf.keras
 
 class TradingLSTM:
     def __init__(self, sequence_length=60, n_features=6):
         self.sequence_length = sequence_length
         self.n_features = n_features
         self.model = None
+        from sklearn.preprocessing import MinMaxScaler
         self.scaler = MinMaxScaler(feature_range=(0, 1))
         
     def build_model(self):
-        model = Sequential([
+        keras = _keras()
+        LSTM, Dense, Dropout, BatchNormalization = (keras.layers.LSTM, keras.layers.Dense,
+                                                    keras.layers.Dropout, keras.layers.BatchNormalization)
+        model = keras.models.Sequential([
             LSTM(128, return_sequences=True, input_shape=(self.sequence_length, self.n_features)),
             BatchNormalization(),
             Dropout(0.2),
@@ -38,25 +42,23 @@ class TradingLSTM:
             Dense(1)
         ])
         
-        optimizer = Adam(learning_rate=0.001)
+        optimizer = keras.optimizers.Adam(learning_rate=0.001)
         model.compile(optimizer=optimizer, loss='mse', metrics=['mae'])
         self.model = model
         return model
     
     def prepare_data(self, data):
         scaled_data = self.scaler.fit_transform(data)
-        X, y = [], []
-        
-        for i in range(self.sequence_length, len(scaled_data)):
-            X.append(scaled_data[i-self.sequence_length:i])
-            y.append(scaled_data[i, 0])  # Assuming first column is the target
-            
-        return np.array(X), np.array(y)
+        X = build_sequences(scaled_data, self.sequence_length)
+        y = scaled_data[self.sequence_length:, 0]  # Assuming first column is the target
+        return X, y
     
-    def train(self, X_train, y_train, validation_split=0.2, epochs=100, batch_size=32):
+    def train(self, X_train, y_train, validation_split=0.2, epochs=100, batch_size=32,
+              checkpoint_path='best_model.h5', verbose=1):
+        keras = _keras()
         callbacks = [
-            EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True),
-            ModelCheckpoint('best_model.h5', monitor='val_loss', save_best_only=True)
+            keras.callbacks.EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True),
+            keras.callbacks.ModelCheckpoint(checkpoint_path, monitor='val_loss', save_best_only=True)
         ]
         
         history = self.model.fit(
@@ -65,18 +67,38 @@ class TradingLSTM:
             epochs=epochs,
             batch_size=batch_size,
             callbacks=callbacks,
-            verbose=1
+            verbose=verbose
         )
         return history
     
+    def unscale_target(self, predictions):
+        """
+        Scaled predictions of the target (column 0) back in price units. The
+        scaler is fitted on all n_features columns, so inverse_transform cannot
+        take the single predicted column.
+        """
+        return (predictions.reshape(-1, 1) - self.scaler.min_[0]) / self.scaler.scale_[0]
+    
+    @timed('model_predict')
     def predict(self, X):
         predictions = self.model.predict(X)
-        return self.scaler.inverse_transform(predictions.reshape(-1, 1))
+        return self.unscale_target(predictions)
+    
+    @timed('model_forward')
+    def forward(self, X):
+        """
+        Single forward pass without the per-call overhead of model.predict,
+        for callers that already batch their inputs
+        """
+        predictions = self.model(X, training=False).numpy()
+        return self.unscale_target(predictions)
     
     def save(self, model_path='model', scaler_path='scaler.pkl'):
+        import joblib
         self.model.save(model_path)
         joblib.dump(self.scaler, scaler_path)
     
     def load(self, model_path='model', scaler_path='scaler.pkl'):
-        self.model = tf.keras.models.load_model(model_path)
+        import joblib
+        self.model = _keras().models.load_model(model_path)
         self.scaler = joblib.load(scaler_path)
\ No newline at end of file
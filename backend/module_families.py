@@ -0,0 +1,27 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+
+# Both directories have a data_processor module, so tests and benchmark cases
+# pick which one wins, the same way their callers do
+FAMILY_PATHS = {
+    'src': [SRC_DIR, BACKEND_DIR],
+    'backend': [BACKEND_DIR, SRC_DIR],
+    'api': [ROOT_DIR, BACKEND_DIR],
+}
+
+def use_family(family: str):
+    """
+    Put the directories of a module family first on sys.path and drop a
+    data_processor already imported from the other directory
+    """
+    for path in reversed(FAMILY_PATHS[family]):
+        while path in sys.path:
+            sys.path.remove(path)
+        sys.path.insert(0, path)
+    module = sys.modules.get('data_processor')
+    if module is not None and os.path.dirname(os.path.abspath(module.__file__)) != FAMILY_PATHS[family][0]:
+        del sys.modules['data_processor']
@@ -0,0 +1,197 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+STATISTICS = ('total_return', 'max_drawdown', 'var_95', 'cvar_95', 'kelly_fraction')
+
+# Draws per batch (paths x horizon), bounding worker memory
+BATCH_ELEMENTS = 2_000_000
+
+def returns_from(source, initial_capital: float = 10000) -> np.ndarray:
+    """
+    Per-trade returns from a returns array/Series or from trades (a list of
+    dicts or DataFrame with 'profit', as produced by run_backtest), using the
+    same profit / initial_capital convention as calculate_performance_metrics
+    """
+    if isinstance(source, pd.Series):
+        return source.to_numpy(dtype=np.float64)
+    if isinstance(source, np.ndarray):
+        return source.astype(np.float64)
+    trades = source if isinstance(source, pd.DataFrame) else pd.DataFrame(source)
+    return (trades['profit'] / initial_capital).to_numpy(dtype=np.float64)
+
+def params_from_metrics(metrics: Dict, initial_capital: float = 10000) -> Tuple[float, float]:
+    """
+    (mean, std) of per-trade returns implied by calculate_performance_metrics output:
+    mean = expectancy / initial_capital and sharpe_ratio = mean / std * sqrt(252)
+    """
+    mean = metrics['expectancy'] / initial_capital
+    sharpe = metrics['sharpe_ratio']
+    if not sharpe:
+        raise ValueError("Cannot infer the return volatility from a zero Sharpe ratio")
+    return mean, abs(mean * np.sqrt(252) / sharpe)
+
+def path_statistics(paths: np.ndarray, confidence: float = 0.95) -> Dict[str, np.ndarray]:
+    """
+    Per-path total return, max drawdown, VaR/CVaR and Kelly fraction, with the
+    RiskManager definitions, for a (n_paths, horizon) array of returns
+    """
+    horizon = paths.shape[1]
+    equity = np.cumprod(1 + paths, axis=1)
+    total_return = equity[:, -1] - 1
+    peak = np.maximum.accumulate(equity, axis=1)
+    max_drawdown = 1 - np.divide(equity, peak, out=peak).min(axis=1)
+
+    # np.percentile's linear interpolation from the two order statistics around it
+    position = (horizon - 1) * (1 - confidence)
+    lo = int(position)
+    hi = min(lo + 1, horizon - 1)
+    ordered = np.partition(paths, [lo, hi], axis=1)
+    var = ordered[:, lo] + (ordered[:, hi] - ordered[:, lo]) * (position - lo)
+    tail = paths <= var[:, None]
+    cvar = np.where(tail, paths, 0.0).sum(axis=1) / tail.sum(axis=1)
+
+    n_wins = np.count_nonzero(paths > 0, axis=1)
+    n_losses = np.count_nonzero(paths < 0, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        win_rate = n_wins / horizon
+        avg_win = np.maximum(paths, 0.0).sum(axis=1) / n_wins
+        avg_loss = np.abs(np.minimum(paths, 0.0).sum(axis=1) / n_losses)
+        kelly = (win_rate * avg_win - (1 - win_rate) * avg_loss) / avg_win
+
+    return {
+        'total_return': total_return,
+        'max_drawdown': max_drawdown,
+        'var_95': var,
+        'cvar_95': cvar,
+        'kelly_fraction': kelly,
+    }
+
+def block_bootstrap_paths(returns: np.ndarray, n_paths: int, horizon: int, block_size: int,
+                          rng: np.random.Generator) -> np.ndarray:
+    """
+    Circular block bootstrap: each path glues random blocks of consecutive
+    returns, keeping short-range dependence such as streaks
+    """
+    n_blocks = -(-horizon // block_size)
+    starts = rng.integers(0, len(returns), size=(n_paths, n_blocks))
+    index = (starts[:, :, None] + np.arange(block_size)) % len(returns)
+    return returns[index.reshape(n_paths, -1)[:, :horizon]]
+
+def parametric_paths(mean: float, std: float, n_paths: int, horizon: int,
+                     rng: np.random.Generator, df: Optional[float] = None) -> np.ndarray:
+    """
+    i.i.d. normal returns, or Student-t with `df` degrees of freedom scaled to the same std
+    """
+    if df is None:
+        return rng.normal(mean, std, size=(n_paths, horizon))
+    scale = std * np.sqrt((df - 2) / df) if df > 2 else std
+    return mean + scale * rng.standard_t(df, size=(n_paths, horizon))
+
+def _simulate_chunk(args) -> Dict[str, np.ndarray]:
+    method, source, n_paths, horizon, block_size, df, confidence, seed = args
+    rng = np.random.default_rng(seed)
+    batch = max(1, BATCH_ELEMENTS // horizon)
+    results = []
+    for start in range(0, n_paths, batch):
+        count = min(batch, n_paths - start)
+        if method == 'bootstrap':
+            paths = block_bootstrap_paths(source, count, horizon, block_size, rng)
+        else:
+            paths = parametric_paths(source[0], source[1], count, horizon, rng, df)
+        results.append(path_statistics(paths, confidence))
+    return {name: np.concatenate([r[name] for r in results]) for name in STATISTICS}
+
+def summarize(statistics: Dict[str, np.ndarray], ci: float = 0.95) -> Dict[str, Dict[str, float]]:
+    """
+    Mean, median and the central `ci` interval of each statistic (NaNs ignored)
+    """
+    lower, upper = (1 - ci) / 2 * 100, (1 + ci) / 2 * 100
+    summary = {}
+    for name, values in statistics.items():
+        values = values[np.isfinite(values)]
+        if not len(values):
+            summary[name] = {'mean': np.nan, 'median': np.nan, 'lower': np.nan, 'upper': np.nan}
+            continue
+        lo, median, hi = np.percentile(values, [lower, 50, upper])
+        summary[name] = {'mean': float(values.mean()), 'median': float(median), 'lower': float(lo), 'upper': float(hi)}
+    return summary
+
+def run_monte_carlo(source,
+                    method: Optional[str] = None,
+                    n_paths: int = 100000,
+                    horizon: Optional[int] = None,
+                    block_size: Optional[int] = None,
+                    initial_capital: float = 10000,
+                    df: Optional[float] = None,
+                    confidence: float = 0.95,
+                    ci: float = 0.95,
+                    seed: Optional[int] = None,
+                    max_workers: Optional[int] = None,
+                    chunk_paths: int = 50000,
+                    return_paths_stats: bool = False) -> Dict:
+    """
+    Simulate n_paths trade sequences and return confidence intervals for total
+    return, max drawdown, VaR, CVaR and the Kelly fraction.
+
+    source: trade returns, run_backtest trades, or calculate_performance_metrics
+    output (parametric only; pass horizon, the number of trades to simulate).
+    method: 'bootstrap' (circular block bootstrap of the observed returns) or
+    'parametric' (normal, or Student-t when df is given, with the observed
+    mean/std); defaults to bootstrap for returns/trades and parametric for
+    metrics.
+
+    Chunks of chunk_paths run in a process pool, each with its own stream
+    from one SeedSequence, so results are reproducible for a seed regardless
+    of the number of workers.
+    """
+    if method is None:
+        method = 'parametric' if isinstance(source, dict) else 'bootstrap'
+    if method not in ('bootstrap', 'parametric'):
+        raise ValueError("method must be 'bootstrap' or 'parametric'")
+
+    if isinstance(source, dict):
+        if method == 'bootstrap':
+            raise ValueError("Bootstrapping needs the trade returns, not summary metrics")
+        if horizon is None:
+            raise ValueError("horizon (number of trades) is required with summary metrics")
+        mean, std = params_from_metrics(source, initial_capital)
+        n_obs = horizon
+    else:
+        returns = returns_from(source, initial_capital)
+        returns = returns[np.isfinite(returns)]
+        if len(returns) < 2:
+            raise ValueError("At least two returns are required")
+        mean, std = returns.mean(), returns.std(ddof=1)
+        n_obs = len(returns)
+
+    horizon = horizon or n_obs
+    block_size = block_size or max(1, int(round(n_obs ** (1 / 3))))
+    payload = returns if method == 'bootstrap' else (mean, std)
+
+    chunks = [min(chunk_paths, n_paths - start) for start in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(method, payload, count, horizon, block_size, df, confidence, s) for count, s in zip(chunks, seeds)]
+
+    if max_workers == 1 or len(tasks) == 1:
+        results = [_simulate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_simulate_chunk, tasks))
+
+    statistics = {name: np.concatenate([r[name] for r in results]) for name in STATISTICS}
+    report = {
+        'method': method,
+        'n_paths': n_paths,
+        'horizon': horizon,
+        'block_size': block_size if method == 'bootstrap' else None,
+        'mean_return': float(mean),
+        'std_return': float(std),
+        'prob_loss': float(np.mean(statistics['total_return'] < 0)),
+        'statistics': summarize(statistics, ci),
+    }
+    if return_paths_stats:
+        report['paths'] = statistics
+    return report
@@ -0,0 +1,161 @@
+import asyncio
+import itertools
+import logging
+import queue
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITY_REALTIME = 0   # ticks, order book, last bars, status
+PRIORITY_DEFAULT = 5
+PRIORITY_HISTORY = 10   # large copy_rates_* pulls
+
+class GatewayBusy(Exception):
+    """Raised when the gateway queue is full and the caller asked not to wait"""
+
+class MT5Gateway:
+    """
+    Serializes every MetaTrader5 call onto one dedicated worker thread.
+
+    The MT5 library is not thread-safe, so callers never touch it directly:
+    they submit a callable and get an awaitable (call) or a blocking result
+    (call_sync). Queued calls run by priority, so realtime requests overtake
+    history pulls that are still waiting. At most max_pending calls can be
+    queued; beyond that async callers wait for a slot (backpressure) and
+    callers with wait=False get GatewayBusy. A slot freed by the worker is
+    handed straight to the oldest waiting coroutine through its event loop.
+    """
+    def __init__(self, max_pending: int = 64):
+        self.max_pending = max_pending
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._waiters_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if sys.is_finalizing():
+            # Threads can no longer be started; finalizers calling in must fail fast
+            raise RuntimeError("MT5 gateway is not available during interpreter shutdown")
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='mt5-gateway', daemon=True)
+                self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """
+        Finish the calls already queued, then stop the worker
+        """
+        if self._thread is None:
+            return
+        self._queue.put((sys.maxsize, next(self._sequence), None, (), {}, None))
+        if wait:
+            self._thread.join()
+        self._thread = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            _, _, fn, args, kwargs, future = self._queue.get()
+            if fn is None:
+                break
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                self._release_slot()
+
+    def _release_slot(self):
+        """
+        Pass a freed slot to the oldest async waiter, or back to the semaphore
+        """
+        with self._waiters_lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._grant_slot, waiter)
+                    return
+                except RuntimeError:
+                    # Its event loop is closed; nobody is waiting there anymore
+                    continue
+            self._slots.release()
+
+    def _grant_slot(self, waiter: asyncio.Future):
+        # Runs on the waiter's loop; a waiter cancelled meanwhile passes the slot on
+        if waiter.done():
+            self._release_slot()
+        else:
+            waiter.set_result(None)
+
+    async def _acquire_slot(self):
+        with self._waiters_lock:
+            if self._slots.acquire(blocking=False):
+                return
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._waiters_lock:
+                queued = (loop, waiter) in self._waiters
+                if queued:
+                    self._waiters.remove((loop, waiter))
+            # Already handed a slot: give it back before leaving (a grant still
+            # in flight sees the cancelled waiter and passes it on itself)
+            if not queued and not waiter.cancelled():
+                self._release_slot()
+            raise
+
+    def _enqueue(self, priority: int, fn: Callable, args, kwargs) -> Future:
+        self.start()
+        future: Future = Future()
+        self._queue.put((priority, next(self._sequence), fn, args, kwargs, future))
+        return future
+
+    def submit(self, fn: Callable, *args, priority: int = PRIORITY_DEFAULT, **kwargs) -> Future:
+        """
+        Queue fn(*args, **kwargs) without waiting for a slot; raises GatewayBusy when full
+        """
+        if not self._slots.acquire(blocking=False):
+            raise GatewayBusy(f"MT5 gateway has {self.max_pending} pending calls")
+        return self._enqueue(priority, fn, args, kwargs)
+
+    async def call(self, fn: Callable, *args, priority: int = PRIORITY_DEFAULT,
+                   wait: bool = True, **kwargs) -> Any:
+        """
+        Run fn on the gateway thread and await its result
+        """
+        if not wait:
+            return await asyncio.wrap_future(self.submit(fn, *args, priority=priority, **kwargs))
+
+        await self._acquire_slot()
+        return await asyncio.wrap_future(self._enqueue(priority, fn, args, kwargs))
+
+    def call_sync(self, fn: Callable, *args, priority: int = PRIORITY_DEFAULT,
+                  timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Blocking variant for synchronous code; runs inline when already on the gateway thread
+        """
+        if threading.current_thread() is self._thread:
+            return fn(*args, **kwargs)
+        acquired = self._slots.acquire(timeout=timeout) if timeout is not None else self._slots.acquire()
+        if not acquired:
+            raise GatewayBusy(f"MT5 gateway has {self.max_pending} pending calls")
+        return self._enqueue(priority, fn, args, kwargs).result()
+
+# Shared by every module that talks to the terminal
+mt5_gateway = MT5Gateway()
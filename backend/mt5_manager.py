@@ -1,8 +1,9 @@
 import MetaTrader5 as mt5
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import os
 from dotenv import load_dotenv
+from backend.metrics import timed
 
 # Configurar logging
 logging.basicConfig(
@@ -12,11 +13,13 @@ logging.basicConfig(
 )
 
 class MT5Manager:
-    def __init__(self):
+    def __init__(self, connect=True):
         load_dotenv()
         self.connected = False
         self.last_error = None
-        self.initialize_connection()
+        self.book_symbols = set()
+        if connect:
+            self.initialize_connection()
 
     def initialize_connection(self):
         try:
@@ -52,6 +55,7 @@ class MT5Manager:
             "terminal_info": mt5.terminal_info()._asdict() if self.connected else None
         }
 
+    @timed('mt5_get_market_data')
     def get_market_data(self, symbol, timeframe, num_candles=1000):
         try:
             if not self.connected:
@@ -71,10 +75,87 @@ class MT5Manager:
             logging.error(self.last_error)
             return None
 
+    @timed('mt5_get_market_data_range')
+    def get_market_data_range(self, symbol, timeframe, date_from, date_to):
+        """
+        Bars with date_from <= time <= date_to (datetimes, see mt5.copy_rates_range)
+        """
+        try:
+            if not self.connected:
+                if not self.initialize_connection():
+                    return None
+            
+            rates = mt5.copy_rates_range(symbol, timeframe, date_from, date_to)
+            if rates is None:
+                self.last_error = f"Failed to get market data range: {mt5.last_error()}"
+                logging.error(self.last_error)
+                return None
+            
+            return rates
+            
+        except Exception as e:
+            self.last_error = f"Error getting market data range: {str(e)}"
+            logging.error(self.last_error)
+            return None
+
+    @timed('mt5_get_ticks')
+    def get_ticks(self, symbol, since_msc=0, count=1000):
+        """
+        Ticks newer than since_msc (epoch ms); the last minute when since_msc is 0
+        """
+        try:
+            if not self.connected:
+                if not self.initialize_connection():
+                    return None
+            
+            date_from = datetime.fromtimestamp(since_msc / 1000, tz=timezone.utc) if since_msc else datetime.now(timezone.utc) - timedelta(minutes=1)
+            ticks = mt5.copy_ticks_from(symbol, date_from, count, mt5.COPY_TICKS_ALL)
+            if ticks is None:
+                self.last_error = f"Failed to get ticks: {mt5.last_error()}"
+                logging.error(self.last_error)
+                return None
+            
+            return ticks[ticks['time_msc'] > since_msc] if since_msc else ticks
+            
+        except Exception as e:
+            self.last_error = f"Error getting ticks: {str(e)}"
+            logging.error(self.last_error)
+            return None
+
+    def get_order_book(self, symbol):
+        """
+        Current depth of market (subscribes to the symbol's book on first use)
+        """
+        try:
+            if not self.connected:
+                if not self.initialize_connection():
+                    return None
+            
+            if symbol not in self.book_symbols:
+                if not mt5.market_book_add(symbol):
+                    self.last_error = f"Failed to subscribe to order book: {mt5.last_error()}"
+                    logging.error(self.last_error)
+                    return None
+                self.book_symbols.add(symbol)
+            
+            book = mt5.market_book_get(symbol)
+            if book is None:
+                self.last_error = f"Failed to get order book: {mt5.last_error()}"
+                logging.error(self.last_error)
+                return None
+            
+            return book
+            
+        except Exception as e:
+            self.last_error = f"Error getting order book: {str(e)}"
+            logging.error(self.last_error)
+            return None
+
     def __del__(self):
         if self.connected:
             mt5.shutdown()
             logging.info("MT5 connection closed")
 
-# Criar instância global
-mt5_manager = MT5Manager()
\ No newline at end of file
+# Criar instância global; a conexão é feita no startup da API (ou na primeira
+# chamada), não na importação do módulo
+mt5_manager = MT5Manager(connect=False)
\ No newline at end of file
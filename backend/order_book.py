@@ -0,0 +1,196 @@
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# mt5.BOOK_TYPE_* values
+BOOK_TYPE_SELL = 1
+BOOK_TYPE_BUY = 2
+BOOK_TYPE_SELL_MARKET = 3
+BOOK_TYPE_BUY_MARKET = 4
+
+NAN = float('nan')
+
+FEATURES = ('spread', 'mid', 'microprice', 'imbalance', 'depth_imbalance', 'ofi')
+
+class OrderBookRing:
+    """
+    Fixed-capacity history of depth-of-market snapshots for one symbol.
+
+    Prices and volumes of the top `depth` levels (best first) and the derived
+    features live in arrays allocated once; each update overwrites the oldest
+    row in place, so memory stays bounded and no per-update objects are kept.
+    Features per snapshot:
+        spread, mid            - from the best bid/ask
+        microprice             - mid weighted by the opposite side's top volume
+        imbalance              - (bid_vol - ask_vol) / (bid_vol + ask_vol) at the top
+        depth_imbalance        - the same over all stored levels
+        ofi                    - order flow imbalance vs the previous snapshot
+    """
+    def __init__(self, capacity: int = 4096, depth: int = 10):
+        self.capacity = capacity
+        self.depth = depth
+        self.time_msc = np.zeros(capacity, dtype=np.int64)
+        self.bid_price = np.full((capacity, depth), np.nan)
+        self.bid_volume = np.zeros((capacity, depth))
+        self.ask_price = np.full((capacity, depth), np.nan)
+        self.ask_volume = np.zeros((capacity, depth))
+        self.features = {name: np.full(capacity, np.nan) for name in FEATURES}
+        self._next = 0
+        self._count = 0
+        self._prev_top = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _begin_row(self) -> int:
+        row = self._next
+        self.bid_price[row] = np.nan
+        self.bid_volume[row] = 0.0
+        self.ask_price[row] = np.nan
+        self.ask_volume[row] = 0.0
+        return row
+
+    def append(self, bid_prices: Sequence[float], bid_volumes: Sequence[float],
+               ask_prices: Sequence[float], ask_volumes: Sequence[float],
+               time_msc: Optional[int] = None) -> int:
+        """
+        Record one snapshot given per-side levels, best price first
+        """
+        row = self._begin_row()
+        nb = min(len(bid_prices), self.depth)
+        na = min(len(ask_prices), self.depth)
+        self.bid_price[row, :nb] = bid_prices[:nb]
+        self.bid_volume[row, :nb] = bid_volumes[:nb]
+        self.ask_price[row, :na] = ask_prices[:na]
+        self.ask_volume[row, :na] = ask_volumes[:na]
+        return self._commit(
+            row, time_msc,
+            float(bid_prices[0]) if nb else NAN, float(bid_volumes[0]) if nb else 0.0,
+            float(ask_prices[0]) if na else NAN, float(ask_volumes[0]) if na else 0.0,
+            float(sum(bid_volumes[:nb])), float(sum(ask_volumes[:na]))
+        )
+
+    def append_book(self, book, time_msc: Optional[int] = None) -> int:
+        """
+        Record the tuple returned by mt5.market_book_get. MT5 lists the book
+        from the highest price down, so asks come worst-first and bids best-first.
+        """
+        row = self._begin_row()
+        asks = 0
+        for entry in book:
+            if entry.type in (BOOK_TYPE_SELL, BOOK_TYPE_SELL_MARKET):
+                asks += 1
+        a = min(asks, self.depth) - 1
+        skip = asks - self.depth
+        b = 0
+        ask = bid = NAN
+        ask_vol = bid_vol = ask_depth = bid_depth = 0.0
+        ask_prices, ask_volumes = self.ask_price[row], self.ask_volume[row]
+        bid_prices, bid_volumes = self.bid_price[row], self.bid_volume[row]
+        for entry in book:
+            if entry.type in (BOOK_TYPE_SELL, BOOK_TYPE_SELL_MARKET):
+                if skip > 0:
+                    skip -= 1
+                elif a >= 0:
+                    ask_prices[a] = ask = entry.price
+                    ask_volumes[a] = ask_vol = entry.volume
+                    ask_depth += ask_vol
+                    a -= 1
+            elif b < self.depth:
+                bid_prices[b] = entry.price
+                bid_volumes[b] = entry.volume
+                if b == 0:
+                    bid, bid_vol = entry.price, entry.volume
+                bid_depth += entry.volume
+                b += 1
+        return self._commit(row, time_msc, bid, bid_vol, ask, ask_vol, bid_depth, ask_depth)
+
+    def _commit(self, row: int, time_msc: Optional[int], bid: float, bid_vol: float,
+                ask: float, ask_vol: float, bid_depth: float, ask_depth: float) -> int:
+        self.time_msc[row] = time.time_ns() // 1_000_000 if time_msc is None else time_msc
+        self._update_features(row, bid, bid_vol, ask, ask_vol, bid_depth, ask_depth)
+        self._next = (row + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        return row
+
+    def _update_features(self, row: int, bid: float, bid_vol: float, ask: float, ask_vol: float,
+                         bid_depth: float, ask_depth: float):
+        """
+        Plain float arithmetic on the top of book; no arrays are allocated per update
+        """
+        f = self.features
+        mid = (ask + bid) / 2
+        top = bid_vol + ask_vol
+        total = bid_depth + ask_depth
+        f['spread'][row] = ask - bid
+        f['mid'][row] = mid
+        f['microprice'][row] = (ask * bid_vol + bid * ask_vol) / top if top > 0 else mid
+        f['imbalance'][row] = (bid_vol - ask_vol) / top if top > 0 else 0.0
+        f['depth_imbalance'][row] = (bid_depth - ask_depth) / total if total > 0 else 0.0
+
+        ofi = 0.0
+        if self._prev_top is not None:
+            prev_bid, prev_bid_vol, prev_ask, prev_ask_vol = self._prev_top
+            if bid >= prev_bid:
+                ofi += bid_vol
+            if bid <= prev_bid:
+                ofi -= prev_bid_vol
+            if ask <= prev_ask:
+                ofi -= ask_vol
+            if ask >= prev_ask:
+                ofi += prev_ask_vol
+        f['ofi'][row] = ofi
+        self._prev_top = (bid, bid_vol, ask, ask_vol)
+
+    def _order(self, count: Optional[int]) -> np.ndarray:
+        count = self._count if count is None else min(count, self._count)
+        return (self._next - count + np.arange(count)) % self.capacity
+
+    def latest(self) -> Optional[Dict]:
+        """
+        Most recent snapshot: best levels and features
+        """
+        if not self._count:
+            return None
+        row = (self._next - 1) % self.capacity
+        snapshot = {
+            'time_msc': int(self.time_msc[row]),
+            'bid': float(self.bid_price[row, 0]),
+            'ask': float(self.ask_price[row, 0]),
+            'bid_volume': float(self.bid_volume[row, 0]),
+            'ask_volume': float(self.ask_volume[row, 0]),
+        }
+        snapshot.update({name: float(values[row]) for name, values in self.features.items()})
+        return snapshot
+
+    def history(self, count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Copies of the newest `count` snapshots' times and features, oldest first
+        """
+        order = self._order(count)
+        columns = {'time_msc': self.time_msc[order]}
+        columns.update({name: values[order] for name, values in self.features.items()})
+        return columns
+
+    def levels(self, count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Copies of the (count, depth) price/volume ladders, oldest first
+        """
+        order = self._order(count)
+        return {
+            'bid_price': self.bid_price[order],
+            'bid_volume': self.bid_volume[order],
+            'ask_price': self.ask_price[order],
+            'ask_volume': self.ask_volume[order],
+        }
+
+    def to_frame(self, count: Optional[int] = None) -> 'pd.DataFrame':
+        # Only needed for analysis; the API serves history() arrays
+        import pandas as pd
+        df = pd.DataFrame(self.history(count))
+        df['time'] = pd.to_datetime(df.pop('time_msc'), unit='ms')
+        return df.set_index('time')
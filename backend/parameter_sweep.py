@@ -0,0 +1,109 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from data_processor import process_data
+from signal_generator import generate_signals
+from backtester import index_by_date, normalize_columns, run_vectorized_backtest, calculate_performance_metrics
+
+PROCESS_PARAMS = ('sma_fast', 'sma_slow', 'rsi_period')
+SIGNAL_PARAMS = ('sma_fast', 'sma_slow', 'rsi_overbought', 'rsi_oversold', 'exit_threshold', 'min_distance')
+BACKTEST_PARAMS = ('risk_per_trade',)
+
+# Per-worker state, set once by _init_worker
+_shm = None
+_base_frame = None
+
+def _share_frame(df: pd.DataFrame):
+    """
+    Copy the Date column and the numeric columns into one shared memory block
+    """
+    columns = [c for c in df.columns if c != 'Date' and pd.api.types.is_numeric_dtype(df[c])]
+    n = len(df)
+    shm = shared_memory.SharedMemory(create=True, size=max((len(columns) + 1) * n * 8, 1))
+    block = np.ndarray((len(columns) + 1, n), dtype=np.float64, buffer=shm.buf)
+    block[0].view(np.int64)[:] = pd.to_datetime(df['Date']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+    for k, column in enumerate(columns, start=1):
+        block[k] = df[column].to_numpy(dtype=np.float64)
+    return shm, columns, n
+
+def _init_worker(shm_name: str, columns: List[str], n: int):
+    """
+    Wrap the shared block in a DataFrame without copying it. The block is made
+    read-only, so a stray in-place write fails instead of corrupting the data
+    the other workers see.
+    """
+    global _shm, _base_frame
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray((len(columns) + 1, n), dtype=np.float64, buffer=_shm.buf)
+    block.flags.writeable = False
+    data = {'Date': block[0].view('datetime64[ns]')}
+    data.update({column: block[k] for k, column in enumerate(columns, start=1)})
+    _base_frame = pd.DataFrame(data, copy=False)
+
+def _run_combination(params: Dict, initial_capital: float) -> Dict:
+    # Shallow copy: the price columns stay views of the shared block, and the
+    # columns process_data and generate_signals assign (Date, Return, RSI,
+    # SMA_*, Signal) only replace references in this task's frame
+    df = process_data(_base_frame.copy(deep=False), **{k: params[k] for k in PROCESS_PARAMS if k in params})
+    df = generate_signals(df.reset_index(drop=True), **{k: params[k] for k in SIGNAL_PARAMS if k in params})
+    df = index_by_date(df)
+
+    trades, final_capital = run_vectorized_backtest(
+        df, initial_capital, **{k: params[k] for k in BACKTEST_PARAMS if k in params}
+    )
+    metrics = calculate_performance_metrics(trades, initial_capital) or {}
+    return {**params, **metrics, 'num_trades': len(trades), 'final_capital': final_capital}
+
+def parameter_grid(grid: Dict[str, List]) -> List[Dict]:
+    """
+    Expand {param: [values]} into the list of all combinations
+    """
+    known = set(PROCESS_PARAMS) | set(SIGNAL_PARAMS) | set(BACKTEST_PARAMS)
+    unknown = set(grid) - known
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def run_parameter_sweep(historical_data: pd.DataFrame,
+                        grid: Dict[str, List],
+                        initial_capital: float = 10000,
+                        max_workers: Optional[int] = None,
+                        rank_by: str = 'sharpe_ratio',
+                        ascending: bool = False) -> pd.DataFrame:
+    """
+    Backtest every combination of the grid in a process pool and rank the results.
+
+    The price data is placed in shared memory once; workers attach to it instead
+    of receiving a pickled copy of the DataFrame with every task. Each row of the
+    result holds the parameters, calculate_performance_metrics output, the number
+    of trades and the final capital. Both the CSV layout (Date, Open, ...) and
+    the MT5 layout (time, open, ...) are accepted.
+    """
+    combinations = parameter_grid(grid)
+    if not combinations:
+        return pd.DataFrame()
+
+    max_workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(combinations) // (max_workers * 4))
+    shm, columns, n = _share_frame(normalize_columns(historical_data))
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_worker,
+                                 initargs=(shm.name, columns, n)) as executor:
+            results = list(executor.map(_run_combination, combinations,
+                                        itertools.repeat(initial_capital), chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results = pd.DataFrame(results)
+    if rank_by in results:
+        results = results.sort_values(rank_by, ascending=ascending, na_position='last')
+    return results.reset_index(drop=True)
@@ -0,0 +1,215 @@
+import math
+from statistics import NormalDist
+from typing import Dict, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+Exposures = Union[Mapping[str, float], Sequence[float], np.ndarray]
+
+class RollingCovariance:
+    """
+    Covariance of per-symbol returns, updated by one rank-1 step per bar.
+
+    With halflife=None it covers the last `window` bars exactly: running sums
+    of returns and cross-products gain the new row and lose the one leaving
+    the ring buffer (re-summed from the buffer every `window` updates to keep
+    rounding drift out). With a halflife (in bars) it is an exponentially
+    weighted covariance instead and keeps no history.
+    """
+    def __init__(self, n_assets: int, window: int = 500, halflife: Optional[float] = None):
+        self.n_assets = n_assets
+        self.window = window
+        self.halflife = halflife
+        self.count = 0
+        if halflife is None:
+            self.buffer = np.zeros((window, n_assets))
+            self.sums = np.zeros(n_assets)
+            self.cross = np.zeros((n_assets, n_assets))
+        else:
+            self.decay = 0.5 ** (1.0 / halflife)
+            self.mean = np.zeros(n_assets)
+            self.cov = np.zeros((n_assets, n_assets))
+
+    @property
+    def n_obs(self) -> int:
+        return min(self.count, self.window) if self.halflife is None else self.count
+
+    def update(self, returns: np.ndarray):
+        x = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+        if self.halflife is not None:
+            if self.count == 0:
+                self.mean[:] = x
+            else:
+                diff = x - self.mean
+                self.mean += (1 - self.decay) * diff
+                self.cov *= self.decay
+                self.cov += self.decay * (1 - self.decay) * np.outer(diff, diff)
+            self.count += 1
+            return
+
+        row = self.count % self.window
+        if self.count >= self.window:
+            old = self.buffer[row]
+            self.sums -= old
+            self.cross -= np.outer(old, old)
+        self.buffer[row] = x
+        self.sums += x
+        self.cross += np.outer(x, x)
+        self.count += 1
+        if self.count % self.window == 0:
+            self.sums = self.buffer.sum(axis=0)
+            self.cross = self.buffer.T @ self.buffer
+
+    def observations(self) -> np.ndarray:
+        """
+        The returns in the rolling window, oldest first (rolling mode only)
+        """
+        if self.halflife is not None:
+            raise ValueError("An exponentially weighted covariance keeps no history")
+        n = self.n_obs
+        start = (self.count - n) % self.window
+        return np.roll(self.buffer, -start, axis=0)[:n]
+
+    def covariance(self) -> np.ndarray:
+        if self.halflife is not None:
+            return self.cov.copy()
+        n = self.n_obs
+        if n < 2:
+            return np.zeros((self.n_assets, self.n_assets))
+        return (self.cross - np.outer(self.sums, self.sums) / n) / (n - 1)
+
+    def ledoit_wolf(self) -> np.ndarray:
+        """
+        Ledoit-Wolf shrinkage towards a scaled identity, from the window's returns
+        """
+        X = self.observations()
+        n, k = X.shape
+        X = X - X.mean(axis=0)
+        S = X.T @ X / n
+        mu = np.trace(S) / k
+        target = mu * np.eye(k)
+        d2 = np.sum((S - target) ** 2)
+        if d2 == 0:
+            return S
+        b2 = (np.sum(np.sum(X ** 2, axis=1) ** 2) / n - np.sum(S ** 2)) / n
+        delta = min(b2, d2) / d2
+        return delta * target + (1 - delta) * S
+
+class PortfolioRisk:
+    """
+    Portfolio VaR/CVaR and risk contributions across symbols.
+
+    Exposures are signed position values per symbol (account currency); losses
+    are reported as positive amounts over one bar. Parametric figures use the
+    zero-mean normal approximation z * sqrt(w' S w); historical figures use the
+    window's returns (rolling mode). Every method accepts a single exposure
+    vector (k,) or a batch (m, k) and evaluates the batch in one matrix product,
+    so screening many candidate orders costs about as much as one.
+
+    shrinkage: None for the sample covariance, a float in [0, 1] to blend it
+    with its diagonal, or "ledoit_wolf" (rolling mode).
+    """
+    def __init__(self, symbols: Sequence[str], window: int = 500, halflife: Optional[float] = None,
+                 confidence: float = 0.95, shrinkage: Union[None, float, str] = None):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.confidence = confidence
+        self.shrinkage = shrinkage
+        # statistics.NormalDist instead of scipy.stats, which is slow to import
+        self.z = NormalDist().inv_cdf(confidence)
+        # E[Z | Z > z] for the normal CVaR
+        self.cvar_factor = NormalDist().pdf(self.z) / (1 - confidence)
+        self.estimator = RollingCovariance(len(self.symbols), window, halflife)
+        self._cov = None
+
+    def update(self, returns: Union[Mapping[str, float], Sequence[float], np.ndarray]):
+        """
+        Add one bar of returns; symbols missing from a mapping count as 0
+        """
+        if isinstance(returns, Mapping):
+            returns = self.vector(returns)
+        self.estimator.update(returns)
+        self._cov = None
+
+    def vector(self, exposures: Exposures) -> np.ndarray:
+        if isinstance(exposures, Mapping):
+            vec = np.zeros(len(self.symbols))
+            for symbol, value in exposures.items():
+                vec[self.index[symbol]] = value
+            return vec
+        return np.asarray(exposures, dtype=np.float64)
+
+    def covariance(self) -> np.ndarray:
+        if self._cov is None:
+            if self.shrinkage == 'ledoit_wolf':
+                cov = self.estimator.ledoit_wolf()
+            else:
+                cov = self.estimator.covariance()
+                if self.shrinkage:
+                    cov = (1 - self.shrinkage) * cov + self.shrinkage * np.diag(np.diag(cov))
+            self._cov = cov
+        return self._cov
+
+    def volatility(self, exposures: Exposures) -> np.ndarray:
+        w = self.vector(exposures)
+        cov = self.covariance()
+        return np.sqrt(np.maximum(np.einsum('...i,ij,...j->...', w, cov, w), 0.0))
+
+    def var(self, exposures: Exposures) -> np.ndarray:
+        return self.z * self.volatility(exposures)
+
+    def cvar(self, exposures: Exposures) -> np.ndarray:
+        return self.cvar_factor * self.volatility(exposures)
+
+    def historical_var_cvar(self, exposures: Exposures):
+        """
+        Empirical VaR and CVaR of the window's P&L for each exposure vector
+        """
+        w = self.vector(exposures)
+        pnl = self.estimator.observations() @ np.atleast_2d(w).T
+        var = -np.percentile(pnl, (1 - self.confidence) * 100, axis=0)
+        tail = pnl <= -var
+        cvar = -np.sum(np.where(tail, pnl, 0.0), axis=0) / np.maximum(tail.sum(axis=0), 1)
+        if w.ndim == 1:
+            return float(var[0]), float(cvar[0])
+        return var, cvar
+
+    def contributions(self, exposures: Exposures) -> Dict[str, np.ndarray]:
+        """
+        Marginal VaR (dVaR/dw) and component VaR (w * marginal, sums to VaR) per symbol
+        """
+        w = self.vector(exposures)
+        sigma_w = w @ self.covariance()
+        vol = self.volatility(w)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            marginal = self.z * sigma_w / np.expand_dims(vol, -1)
+        marginal = np.nan_to_num(marginal)
+        return {'marginal': marginal, 'component': w * marginal, 'var': self.z * vol}
+
+    def check_orders(self, exposures: Exposures, orders: Exposures, var_limit: float):
+        """
+        VaR after adding each order (a (k,) or (m, k) exposure change) to the
+        current exposures, and whether it stays within var_limit
+        """
+        after = self.vector(exposures) + self.vector(orders)
+        var = self.var(after)
+        return var <= var_limit, var
+
+    def max_order(self, exposures: Exposures, symbol: str, var_limit: float, side: int = 1) -> float:
+        """
+        Largest exposure that can be added to `symbol` in direction `side`
+        (+1 buy, -1 sell) while the portfolio VaR stays within var_limit
+        """
+        w = self.vector(exposures)
+        cov = self.covariance()
+        i = self.index[symbol]
+        # sigma^2(t) = w'Sw + 2 t side (Sw)_i + t^2 S_ii <= (var_limit / z)^2
+        a = cov[i, i]
+        b = 2 * side * (w @ cov[:, i])
+        c = w @ cov @ w - (var_limit / self.z) ** 2
+        if a <= 0:
+            return math.inf if b <= 0 else max(-c / b, 0.0)
+        disc = b * b - 4 * a * c
+        if disc < 0:
+            return 0.0
+        return max((-b + math.sqrt(disc)) / (2 * a), 0.0)
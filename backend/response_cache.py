@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+TIMEFRAME_SECONDS = {
+    "M1": 60,
+    "M5": 5 * 60,
+    "M15": 15 * 60,
+    "M30": 30 * 60,
+    "H1": 60 * 60,
+    "H4": 4 * 60 * 60,
+    "D1": 24 * 60 * 60,
+}
+
+def next_bar_close(timeframe: str, now: Optional[float] = None) -> float:
+    """
+    Epoch time at which the current bar of the timeframe closes
+    """
+    period = TIMEFRAME_SECONDS.get(timeframe, TIMEFRAME_SECONDS["M5"])
+    now = time.time() if now is None else now
+    return (now // period + 1) * period
+
+class ResponseCache:
+    """
+    LRU cache whose entries expire at an absolute time, with single-flight loading:
+    concurrent misses for the same key share one loader call instead of each
+    hitting the backend.
+    """
+    def __init__(self, max_entries: int = 256, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], expires_at: float) -> Any:
+        """
+        Return the cached value for key, or await loader() once for all
+        concurrent callers and cache its result until expires_at.
+        Exceptions from the loader are propagated and not cached.
+
+        The load runs in its own task, so a caller that is cancelled (e.g. its
+        client disconnected) stops waiting without cancelling the load the
+        other callers share.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader, expires_at))
+            # Retrieve the exception even when every caller has gone away
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], expires_at: float) -> Any:
+        try:
+            value = await loader()
+            self.set(key, value, expires_at)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -1,8 +1,11 @@
 import numpy as np
-from scipy import stats
+from bisect import bisect_right, insort
+from collections import deque
 from dataclasses import dataclass
 from typing import List, Dict, Optional
+import math
 import pandas as pd
+from metrics import timed
 
 @dataclass
 class RiskMetrics:
@@ -18,6 +21,7 @@ class RiskManager:
     def __init__(self, risk_free_rate: float = 0.02):
         self.risk_free_rate = risk_free_rate
         
+    @timed('risk_metrics')
     def calculate_metrics(self, returns: np.ndarray) -> RiskMetrics:
         volatility = self._calculate_volatility(returns)
         var_95 = self._calculate_var(returns, 0.95)
@@ -91,4 +95,223 @@ class RiskManager:
             return 0  # No trading in high risk conditions
         
         position_size = capital * adjusted_risk * kelly_adjusted
-        return min(position_size, capital * 0.2)  # Never risk more than 20% of capital
\ No newline at end of file
+        return min(position_size, capital * 0.2)  # Never risk more than 20% of capital
+
+class _DrawdownTree:
+    """
+    Segment tree over the log-equity of a sliding window. Each node keeps
+    (max, min, best) where best is the largest drop from an earlier max to a
+    later min inside the node, so the window's max drawdown is one query.
+    """
+    EMPTY = (-math.inf, math.inf, 0.0)
+
+    def __init__(self, window: int):
+        self.size = 1
+        while self.size < window:
+            self.size *= 2
+        self.nodes = [self.EMPTY] * (2 * self.size)
+
+    @staticmethod
+    def _combine(left, right):
+        return (max(left[0], right[0]), min(left[1], right[1]),
+                max(left[2], right[2], left[0] - right[1]))
+
+    def set(self, pos: int, value: float):
+        i = pos + self.size
+        self.nodes[i] = (value, value, 0.0)
+        i //= 2
+        while i:
+            self.nodes[i] = self._combine(self.nodes[2 * i], self.nodes[2 * i + 1])
+            i //= 2
+
+    def query(self, lo: int, hi: int):
+        """
+        Combined node for positions lo..hi (inclusive), in order
+        """
+        left, right = self.EMPTY, self.EMPTY
+        lo += self.size
+        hi += self.size + 1
+        while lo < hi:
+            if lo & 1:
+                left = self._combine(left, self.nodes[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                right = self._combine(self.nodes[hi], right)
+            lo //= 2
+            hi //= 2
+        return self._combine(left, right)
+
+class RollingRiskState:
+    """
+    Incremental RiskManager.calculate_metrics over the last `window` returns.
+
+    Each update costs O(log w): mean/variance by sliding Welford, VaR/CVaR
+    from a sorted copy of the window (bisect), max drawdown from a segment
+    tree over log-equity, and running win/loss tallies for Kelly. metrics()
+    matches calculate_metrics on the same window up to float rounding.
+
+    A return of -100% or worse is ruin: equity goes to zero and stays there,
+    and the window's max drawdown is 1.0 until that return leaves the window.
+    """
+    def __init__(self, window: int = 252, confidence: float = 0.95, risk_free_rate: float = 0.02):
+        self.window = window
+        self.confidence = confidence
+        self.manager = RiskManager(risk_free_rate)
+        self.returns = deque()
+        self.sorted_returns: List[float] = []
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.wins = 0
+        self.losses = 0
+        self.win_sum = 0.0
+        self.loss_sum = 0.0
+        self.log_equity = 0.0
+        self._tree = _DrawdownTree(window)
+        self._count = 0
+        self._ruin: Optional[int] = None
+        # Drawdown of the whole run, not just the window
+        self.equity = 1.0
+        self.peak = 1.0
+
+    def __len__(self) -> int:
+        return len(self.returns)
+
+    def update(self, r: float) -> 'RollingRiskState':
+        r = float(r)
+        if len(self.returns) == self.window:
+            self._remove(self.returns.popleft())
+
+        self.returns.append(r)
+        insort(self.sorted_returns, r)
+        n = len(self.returns)
+        delta = r - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (r - self.mean)
+        if r > 0:
+            self.wins += 1
+            self.win_sum += r
+        elif r < 0:
+            self.losses += 1
+            self.loss_sum += r
+
+        if r <= -1:
+            # log1p is undefined here; later windows measure drawdown from a fresh start
+            self._ruin = self._count
+            self.log_equity = 0.0
+        else:
+            self.log_equity += math.log1p(r)
+        self._tree.set(self._count % self.window, self.log_equity)
+        self._count += 1
+
+        self.equity = max(self.equity * (1 + r), 0.0)
+        self.peak = max(self.peak, self.equity)
+        return self
+
+    def _remove(self, r: float):
+        del self.sorted_returns[bisect_right(self.sorted_returns, r) - 1]
+        n = len(self.returns)
+        if n == 0:
+            self.mean = self.m2 = 0.0
+        else:
+            delta = r - self.mean
+            self.mean -= delta / n
+            self.m2 -= delta * (r - self.mean)
+        if r > 0:
+            self.wins -= 1
+            self.win_sum -= r
+        elif r < 0:
+            self.losses -= 1
+            self.loss_sum -= r
+
+    @property
+    def std(self) -> float:
+        n = len(self.returns)
+        return math.sqrt(max(self.m2, 0.0) / n) if n else float('nan')
+
+    @property
+    def current_drawdown(self) -> float:
+        return (self.peak - self.equity) / self.peak
+
+    def var(self) -> float:
+        """
+        np.percentile (linear interpolation) of the window
+        """
+        s = self.sorted_returns
+        position = (len(s) - 1) * (1 - self.confidence)
+        lo = int(position)
+        hi = min(lo + 1, len(s) - 1)
+        return s[lo] + (s[hi] - s[lo]) * (position - lo)
+
+    def cvar(self, var: Optional[float] = None) -> float:
+        var = self.var() if var is None else var
+        k = bisect_right(self.sorted_returns, var)
+        return math.fsum(self.sorted_returns[:k]) / k if k else float('nan')
+
+    def max_drawdown(self) -> float:
+        n = len(self.returns)
+        if self._ruin is not None and self._ruin >= self._count - n:
+            return 1.0
+        end = (self._count - 1) % self.window
+        start = (self._count - n) % self.window
+        if start <= end:
+            node = self._tree.query(start, end)
+        else:
+            node = _DrawdownTree._combine(self._tree.query(start, self.window - 1), self._tree.query(0, end))
+        return -math.expm1(-node[2])
+
+    def kelly_fraction(self) -> float:
+        n = len(self.returns)
+        if not self.wins or not self.losses:
+            return float('nan')
+        win_rate = self.wins / n
+        avg_win = self.win_sum / self.wins
+        avg_loss = abs(self.loss_sum / self.losses)
+        return (win_rate * avg_win - (1 - win_rate) * avg_loss) / avg_win
+
+    def metrics(self) -> RiskMetrics:
+        std = self.std
+        volatility = std * np.sqrt(252)
+        var_95 = self.var()
+        sharpe_ratio = np.sqrt(252) * (self.mean - self.manager.risk_free_rate / 252) / std if std > 0 else float('nan')
+        return RiskMetrics(
+            var_95=var_95,
+            cvar_95=self.cvar(var_95),
+            volatility=volatility,
+            sharpe_ratio=sharpe_ratio,
+            max_drawdown=self.max_drawdown(),
+            kelly_fraction=self.kelly_fraction(),
+            risk_level=self.manager._assess_risk_level(volatility, var_95, sharpe_ratio)
+        )
+
+# RiskMetrics.risk_level -> the levels BacktestEngine checks
+RISK_LEVELS = {"Alto": "High", "Médio-Alto": "Medium-High", "Médio": "Medium", "Baixo": "Low"}
+
+class RollingRisk:
+    """
+    BacktestEngine risk layer backed by RollingRiskState: feeds each bar's
+    close-to-close return and blocks entries while the window's risk level is "Alto".
+    `column` is the bar field holding the close (the backtester's CSV layout by default).
+    """
+    def __init__(self, window: int = 252, min_periods: int = 20, risk_free_rate: float = 0.02,
+                 column: str = 'Close'):
+        self.window = window
+        self.min_periods = min_periods
+        self.risk_free_rate = risk_free_rate
+        self.column = column
+        self.state = RollingRiskState(window, risk_free_rate=risk_free_rate)
+        self.prev_close = None
+
+    def reset(self, df=None):
+        self.state = RollingRiskState(self.window, risk_free_rate=self.risk_free_rate)
+        self.prev_close = None
+
+    def update(self, bar, signal, prediction):
+        close = getattr(bar, self.column)
+        if self.prev_close is not None and self.prev_close != 0:
+            self.state.update(close / self.prev_close - 1)
+        self.prev_close = close
+        if len(self.state) < self.min_periods:
+            return None
+        metrics = self.state.metrics()
+        return {'risk_level': RISK_LEVELS[metrics.risk_level], 'metrics': metrics}
@@ -1,8 +1,16 @@
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
 import random  # For demonstration purposes
+from functools import lru_cache
 
-nltk.download('vader_lexicon', quiet=True)
+@lru_cache(maxsize=1)
+def get_sentiment_analyzer():
+    """
+    VADER analyzer, created on first use so that importing this module
+    neither imports nltk nor downloads the lexicon
+    """
+    import nltk
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    nltk.download('vader_lexicon', quiet=True)
+    return SentimentIntensityAnalyzer()
 
 def get_market_sentiment():
     # In a real scenario, you would fetch and analyze actual market news
@@ -0,0 +1,65 @@
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def build_sequences(values: np.ndarray, sequence_length: int, count: Optional[int] = None) -> np.ndarray:
+    """
+    Return the (N, sequence_length, n_features) windows of a 2D array as a
+    strided view, without copying. Window i covers rows i .. i+sequence_length-1.
+
+    By default N leaves out the last window, so every window has a following
+    row to use as its target. The view is read-only.
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, None]
+    n_windows = max(len(values) - sequence_length, 0) if count is None else count
+    if n_windows == 0:
+        return np.empty((0, sequence_length, values.shape[1]), dtype=values.dtype)
+
+    windows = sliding_window_view(values, sequence_length, axis=0)
+    return windows.transpose(0, 2, 1)[:n_windows]
+
+def iter_sequence_batches(values: np.ndarray,
+                          targets: np.ndarray,
+                          sequence_length: int,
+                          batch_size: int = 32,
+                          shuffle: bool = False,
+                          seed: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield (X, y) batches built from the windows of values, where y holds the
+    target aligned with each window. Only one batch is materialized at a time,
+    so values can be an np.memmap larger than RAM.
+    """
+    windows = build_sequences(values, sequence_length, count=len(targets))
+    order = np.arange(len(targets))
+    if shuffle:
+        np.random.default_rng(seed).shuffle(order)
+
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        if not shuffle:
+            batch = slice(batch[0], batch[-1] + 1)
+        yield np.ascontiguousarray(windows[batch]), np.asarray(targets[batch])
+
+def make_sequence_dataset(values: np.ndarray,
+                          targets: np.ndarray,
+                          sequence_length: int,
+                          batch_size: int = 32,
+                          shuffle: bool = False,
+                          seed: Optional[int] = None):
+    """
+    Wrap iter_sequence_batches in a batched, prefetching tf.data.Dataset
+    """
+    import tensorflow as tf
+
+    n_features = 1 if np.ndim(values) == 1 else np.shape(values)[1]
+    dataset = tf.data.Dataset.from_generator(
+        lambda: iter_sequence_batches(values, targets, sequence_length, batch_size, shuffle, seed),
+        output_signature=(
+            tf.TensorSpec(shape=(None, sequence_length, n_features), dtype=tf.as_dtype(np.asarray(values[:1]).dtype)),
+            tf.TensorSpec(shape=(None,), dtype=tf.as_dtype(np.asarray(targets[:1]).dtype))
+        )
+    )
+    return dataset.prefetch(tf.data.experimental.AUTOTUNE)
@@ -1,32 +1,95 @@
 import numpy as np
+from dataclasses import dataclass, field
+from typing import List, Optional
 
-def generate_signals(df):
+@dataclass
+class SignalCarry:
+    """
+    State generate_signals hands from one chunk of a file to the next:
+    profit-target levels of entries whose exit has not been reached yet
+    """
+    pending_levels: List[float] = field(default_factory=list)
+
+def find_first_crossing(values, starts, levels):
+    """
+    For each (start, level) pair, return the first index j >= start with
+    values[j] >= level, or -1 if there is none.
+
+    Uses a sparse table of range maxima and descends it in power-of-two steps,
+    so every query costs O(log n) and all queries run as array operations.
+    """
+    values = np.where(np.isnan(values), -np.inf, values)
+    starts = np.asarray(starts, dtype=np.int64)
+    levels = np.asarray(levels, dtype=np.float64)
+    n = len(values)
+    if n == 0 or len(starts) == 0:
+        return np.full(len(starts), -1, dtype=np.int64)
+
+    # table[k][p] = max(values[p:p + 2**k])
+    table = [values]
+    while 2 ** len(table) <= n:
+        previous = table[-1]
+        step = 2 ** (len(table) - 1)
+        table.append(np.maximum(previous[:-step], previous[step:]))
+
+    position = starts.copy()
+    for k in range(len(table) - 1, -1, -1):
+        block = table[k]
+        inside = position + 2 ** k <= n
+        below = block[np.minimum(position, len(block) - 1)] < levels
+        position += np.where(inside & below, 2 ** k, 0)
+
+    found = position < n
+    found[found] = values[position[found]] >= levels[found]
+    return np.where(found, position, -1)
+
+def generate_signals(df, sma_fast=20, sma_slow=50, rsi_overbought=70, rsi_oversold=30,
+                     exit_threshold=0.01, min_distance=0.0010,
+                     carry: Optional[SignalCarry] = None, start: int = 0):
+    """
+    With ``carry``, df is one chunk of a longer series: rows before ``start``
+    are overlap from the previous chunk (context for the crossover and
+    distance filters, not traded again), pending exits from earlier chunks
+    are placed first, and entries still waiting for their exit are left in
+    ``carry`` for the next chunk.
+    """
     df['Signal'] = 0
     
     # Generate signals based on SMA crossover
-    df['Signal'] = np.where(df['SMA_20'] > df['SMA_50'], 1, 0)
+    df['Signal'] = np.where(df[f'SMA_{sma_fast}'] > df[f'SMA_{sma_slow}'], 1, 0)
     df['Signal'] = df['Signal'].diff()
     
     # Filter signals based on RSI
-    df.loc[(df['Signal'] == 1) & (df['RSI'] > 70), 'Signal'] = 0
-    df.loc[(df['Signal'] == -1) & (df['RSI'] < 30), 'Signal'] = 0
+    df.loc[(df['Signal'] == 1) & (df['RSI'] > rsi_overbought), 'Signal'] = 0
+    df.loc[(df['Signal'] == -1) & (df['RSI'] < rsi_oversold), 'Signal'] = 0
+    
+    signal = df['Signal'].to_numpy(dtype=np.float64, copy=True)
+    close = df['Close'].to_numpy(dtype=np.float64)
+    high = df['High'].to_numpy(dtype=np.float64)
+    
+    # Entries from earlier chunks come first, as they would in one pass
+    if carry is not None and carry.pending_levels:
+        levels = np.asarray(carry.pending_levels, dtype=np.float64)
+        pending_exits = find_first_crossing(high, np.full(len(levels), start), levels)
+        for exit_ in pending_exits[pending_exits >= 0]:
+            signal[exit_] = -1
+        carry.pending_levels = levels[pending_exits < 0].tolist()
     
-    # Add exit signals
-    exit_threshold = 0.01  # 1% profit target
-    for i in range(len(df)):
-        if df['Signal'].iloc[i] == 1:
-            entry_price = df['Close'].iloc[i]
-            exit_price = entry_price * (1 + exit_threshold)
-            for j in range(i + 1, len(df)):
-                if df['High'].iloc[j] >= exit_price:
-                    df.loc[j, 'Signal'] = -1
-                    break
+    # Add exit signals at the exit_threshold profit target: the first later bar
+    # whose high reaches it. An exit landing on a later entry replaces that entry.
+    entries = np.flatnonzero(signal[start:] == 1) + start
+    levels = close[entries] * (1 + exit_threshold)
+    exits = find_first_crossing(high, entries + 1, levels)
+    for entry, exit_, level in zip(entries, exits, levels):
+        if signal[entry] == 1:
+            if exit_ >= 0:
+                signal[exit_] = -1
+            elif carry is not None:
+                carry.pending_levels.append(float(level))
     
     # Filter out signals that are too close
-    min_distance = 0.0010
-    for i in range(1, len(df)):
-        if df['Signal'].iloc[i] != 0:
-            if abs(df['Close'].iloc[i] - df['Close'].iloc[i-1]) < min_distance:
-                df.loc[i, 'Signal'] = 0
+    too_close = np.abs(np.diff(close)) < min_distance
+    signal[1:][(signal[1:] != 0) & too_close] = 0
     
-    return df
\ No newline at end of file
+    df['Signal'] = signal
+    return df
@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from backend.benchmarks import stub_mt5, synthetic_rates
+
+# The stub needs no account; set before load_dotenv so a local .env is not used
+RATES = synthetic_rates(2000)
+sys.modules['MetaTrader5'] = stub_mt5(RATES)
+for name in ('MT5_LOGIN', 'MT5_PASSWORD', 'MT5_SERVER'):
+    os.environ[name] = ''
+os.environ['BAR_STORE_PATH'] = ''
+
+import numpy as np
+from fastapi.testclient import TestClient
+from backend import main
+from backend.market_data_encoding import ARROW_MEDIA_TYPE, BINARY_MEDIA_TYPE, FIELDS, JSON_MEDIA_TYPE
+
+@pytest.fixture
+def client():
+    main.market_data_cache.clear()
+    main.history_sync.invalidate()
+    return TestClient(main.app)
+
+def decode(response):
+    """
+    Columns of a /market-data response in any of its encodings
+    """
+    media_type = response.headers['content-type']
+    if media_type == ARROW_MEDIA_TYPE:
+        import pyarrow as pa
+        table = pa.ipc.open_stream(response.content).read_all()
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+    if media_type == BINARY_MEDIA_TYPE:
+        dtype = np.dtype([tuple(field) for field in json.loads(response.headers['X-Rates-Dtype'])])
+        rates = np.frombuffer(response.content, dtype=dtype)
+        return {name: rates[field] for name, field in FIELDS}
+    payload = response.json()
+    if 'columns' in payload:
+        return payload['columns']
+    return {name: [row[name] for row in payload['market_data']] for name, _ in FIELDS}
+
+@pytest.mark.parametrize('layout', ['records', 'columnar'])
+@pytest.mark.parametrize('accept,media_type', [
+    (None, JSON_MEDIA_TYPE),
+    ('application/json', JSON_MEDIA_TYPE),
+    ('*/*', JSON_MEDIA_TYPE),
+    (ARROW_MEDIA_TYPE, ARROW_MEDIA_TYPE),
+    (f'{ARROW_MEDIA_TYPE}, application/json;q=0.5', ARROW_MEDIA_TYPE),
+    (BINARY_MEDIA_TYPE, BINARY_MEDIA_TYPE),
+])
+def test_market_data_encodings(client, accept, media_type, layout):
+    if media_type == ARROW_MEDIA_TYPE:
+        pytest.importorskip('pyarrow')
+    headers = {'Accept': accept} if accept else {}
+    response = client.get(f'/market-data/EURUSD?timeframe=M1&num_candles=100&layout={layout}', headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers['content-type'] == media_type
+
+    columns = decode(response)
+    if media_type == JSON_MEDIA_TYPE:
+        assert ('columns' in response.json()) == (layout == 'columnar')
+    for name, field in FIELDS:
+        np.testing.assert_array_equal(np.asarray(columns[name]), RATES[field][-100:], err_msg=name)
+
+def test_stream_unsubscribes_when_the_client_disconnects(client):
+    with client.websocket_connect('/ws/market-data/EURUSD?timeframe=M1&num_candles=100') as websocket:
+        snapshot = json.loads(websocket.receive_text())
+        assert snapshot['type'] == 'snapshot'
+        assert len(snapshot['columns']['close']) == 100
+        assert ('EURUSD', 'M1') in main.market_stream._feeds
+
+        # Nothing is sent after the snapshot; the close frame alone must end the stream
+        websocket.close()
+        deadline = time.monotonic() + 5
+        while ('EURUSD', 'M1') in main.market_stream._feeds and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert ('EURUSD', 'M1') not in main.market_stream._feeds
+
+@pytest.mark.parametrize('interval_ms', [0, -5, 0.01])
+def test_profiler_rejects_tiny_intervals(client, interval_ms):
+    response = client.post(f'/profiler?enabled=true&interval_ms={interval_ms}')
+    assert response.status_code == 400
+    assert not main.profiler.running
+
+def test_profiler_toggle(client):
+    response = client.post('/profiler?enabled=true&interval_ms=5&reset=true')
+    assert response.json()['running'] and response.json()['interval_ms'] == 5
+    time.sleep(0.05)
+    assert client.get('/profiler?view=top').json()['samples'] > 0
+    assert client.get('/profiler?view=folded').status_code == 200
+    assert not client.post('/profiler?enabled=false').json()['running']
+
+def test_lifespan_starts_and_stops_background_work(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, 'MODEL_PATH', str(tmp_path / 'missing'))
+    monkeypatch.setenv('SAMPLING_PROFILER', '1')
+    with TestClient(main.app) as client:
+        assert main.profiler.running
+        deadline = time.monotonic() + 5
+        while main.model_state['status'] != 'unavailable' and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert client.get('/health').json()['model'] == 'unavailable'
+    assert not main.profiler.running
+    assert main._preload_task.done()
@@ -0,0 +1,214 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.module_families import use_family
+
+# The backtester runs on src/data_processor (CSV layout)
+use_family('src')
+
+from backtester import (BacktestEngine, LSTMModel, PrefixRisk, backtest_strategy, calculate_performance_metrics,
+                        index_by_date, load_stored_bars, run_backtest, run_vectorized_backtest)
+from bar_store import BarStore
+from data_processor import process_data
+from indicator_state import IndicatorState
+from ml_model import TradingLSTM
+from risk_manager import RiskManager, RISK_LEVELS
+from signal_generator import generate_signals
+
+def price_data(n=1500, seed=7):
+    """
+    Daily-like random walk whose volatility switches between calm and wild
+    regimes, so RollingRisk blocks some entries and allows others
+    """
+    rng = np.random.default_rng(seed)
+    volatility = np.where((np.arange(n) // 250) % 2 == 0, 0.004, 0.03)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, volatility)))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    wick = np.abs(rng.normal(0, volatility / 2, (2, n))) * close
+    return pd.DataFrame({
+        'Date': pd.date_range('2015-01-01', periods=n, freq='D'),
+        'Open': open_,
+        'High': np.maximum(open_, close) + wick[0],
+        'Low': np.minimum(open_, close) - wick[1],
+        'Close': close,
+        'Volume': rng.integers(100, 1000, n).astype(np.float64),
+    })
+
+def prefix_risk(history, signals, prediction, window=252, min_periods=20):
+    """
+    Whole-history version of RollingRisk: RiskManager.calculate_metrics over
+    the last `window` returns of the prefix
+    """
+    returns = history['Close'].pct_change().to_numpy()[1:][-window:]
+    if len(returns) < min_periods:
+        return None
+    with np.errstate(all='ignore'):
+        return {'risk_level': RISK_LEVELS[RiskManager().calculate_metrics(returns).risk_level]}
+
+def legacy_backtest(historical_data, assess, initial_capital=10000, risk_per_trade=0.01):
+    """
+    The original run_backtest loop: risk is re-evaluated on the full prefix every bar
+    """
+    df = index_by_date(generate_signals(process_data(historical_data)))
+    position = 0
+    entry_price = 0
+    trades = []
+    capital = initial_capital
+    trade_size = 0
+
+    for i in range(1, len(df)):
+        current_price = df['Close'].iloc[i]
+        risk_assessment = assess(df.iloc[:i], df['Signal'].iloc[:i], None)
+        allowed = risk_assessment is None or risk_assessment['risk_level'] != 'High'
+
+        if df['Signal'].iloc[i] == 1 and position == 0 and allowed:
+            position = 1
+            entry_price = current_price
+            trade_size = (capital * risk_per_trade) / current_price
+        elif df['Signal'].iloc[i] == -1 and position == 1:
+            position = 0
+            profit = (current_price - entry_price) * trade_size
+            capital += profit
+            trades.append({
+                'entry_time': df.index[i-1],
+                'exit_time': df.index[i],
+                'entry_price': entry_price,
+                'exit_price': current_price,
+                'profit': profit,
+                'trade_size': trade_size
+            })
+    return trades, capital
+
+def assert_same_trades(actual, expected):
+    actual, expected = pd.DataFrame(actual), pd.DataFrame(expected)
+    assert len(actual) == len(expected)
+    assert list(actual['entry_time']) == list(expected['entry_time'])
+    assert list(actual['exit_time']) == list(expected['exit_time'])
+    for column in ('entry_price', 'exit_price', 'profit', 'trade_size'):
+        np.testing.assert_allclose(actual[column].to_numpy(float), expected[column].to_numpy(float), rtol=1e-9)
+
+def test_engine_matches_legacy_loop():
+    data = price_data()
+    expected_trades, expected_capital = legacy_backtest(data.copy(), prefix_risk)
+    ungated_trades, _ = legacy_backtest(data.copy(), lambda *args: None)
+    # The risk layer must actually block entries for the comparison to mean anything
+    assert 0 < len(expected_trades) < len(ungated_trades)
+
+    trades, capital = run_backtest(data.copy())
+    assert_same_trades(trades, expected_trades)
+    assert np.isclose(capital, expected_capital, rtol=1e-12)
+
+    # The O(n^2) adapter over the whole-history function gives the same run
+    df = index_by_date(generate_signals(process_data(data.copy())))
+    trades, capital = BacktestEngine(risk=PrefixRisk(prefix_risk)).run(df)
+    assert_same_trades(trades, expected_trades)
+
+def test_engine_without_layers_trades_every_signal():
+    data = price_data()
+    expected_trades, expected_capital = legacy_backtest(data.copy(), lambda *args: None)
+    df = index_by_date(generate_signals(process_data(data.copy())))
+    trades, capital = BacktestEngine().run(df)
+    assert_same_trades(trades, expected_trades)
+    assert np.isclose(capital, expected_capital, rtol=1e-12)
+
+def test_run_backtest_accepts_mt5_layout():
+    data = price_data()
+    expected_trades, expected_capital = run_backtest(data.copy())
+    assert len(expected_trades) > 0
+    mt5_layout = data.rename(columns=str.lower).rename(columns={'date': 'time'})
+    trades, capital = run_backtest(mt5_layout)
+    assert_same_trades(trades, expected_trades)
+    assert capital == expected_capital
+
+def test_vectorized_matches_event_engine():
+    for seed in range(5):
+        df = generate_signals(process_data(price_data(seed=seed)))
+        expected_trades, expected_capital = BacktestEngine().run(df)
+        trades, capital = run_vectorized_backtest(df)
+        assert len(trades) > 0
+        assert_same_trades(trades, expected_trades)
+        assert np.isclose(capital, expected_capital, rtol=1e-12)
+
+    trades, capital = run_backtest(price_data(), mode='vectorized')
+    assert_same_trades(trades, BacktestEngine().run(index_by_date(generate_signals(process_data(price_data()))))[0])
+
+def test_run_backtest_on_stored_bars(tmp_path):
+    data = price_data()
+    BarStore(str(tmp_path)).append('EURUSD', 'D1', data)
+    stored = load_stored_bars('EURUSD', 'D1', root=str(tmp_path))
+    pd.testing.assert_frame_equal(stored[list(data.columns)], data, check_dtype=False)
+
+    expected_trades, expected_capital = run_backtest(data.copy())
+    trades, capital = run_backtest(stored)
+    assert_same_trades(trades, expected_trades)
+    assert capital == expected_capital
+
+def test_backtest_strategy_in_both_modes():
+    data = price_data()
+    df = index_by_date(generate_signals(process_data(data.copy())))
+    # Event mode gates entries with RollingRisk, vectorized mode trades every signal
+    for mode, engine in (('event', BacktestEngine(risk=PrefixRisk(prefix_risk))), ('vectorized', BacktestEngine())):
+        trades, capital, metrics = backtest_strategy(data.copy(), mode=mode)
+        expected_trades, expected_capital = engine.run(df)
+        assert len(trades) > 0
+        assert_same_trades(trades, expected_trades)
+        assert np.isclose(capital, expected_capital, rtol=1e-12)
+        expected = calculate_performance_metrics(expected_trades, 10000)
+        assert metrics.keys() == expected.keys()
+        for key in metrics:
+            assert np.isclose(metrics[key], expected[key], rtol=1e-9), (mode, key)
+        # Daily bars: every trade is held from one bar to the next
+        assert metrics['avg_trade_duration'] == 24 * 60
+
+class LastCloseModel:
+    """
+    Stands in for the Keras model: predicts the last scaled close in each window
+    """
+    class Output:
+        def __init__(self, values):
+            self.values = values
+
+        def numpy(self):
+            return self.values
+
+    def __call__(self, X, training=False):
+        return self.Output(np.asarray(X)[:, -1, :1])
+
+class RecordingLSTMModel(LSTMModel):
+    def reset(self, df=None):
+        super().reset(df)
+        self.bars = []
+        self.predictions = []
+
+    def update(self, bar):
+        prediction = super().update(bar)
+        self.bars.append(bar)
+        self.predictions.append(prediction)
+        return prediction
+
+def test_run_backtest_with_lstm_model():
+    pytest.importorskip('sklearn')
+    data = price_data()
+    # Fit the scaler the way training does: prepare_data over the model's feature rows
+    indicators = IndicatorState()
+    rows = []
+    for bar in data.itertuples(index=False):
+        snapshot = indicators.update(open=bar.Open, high=bar.High, low=bar.Low, close=bar.Close, volume=bar.Volume)
+        rows.append([bar.Close, bar.Volume, snapshot.rsi, snapshot.macd['macd'], snapshot.atr, snapshot.adx])
+    rows = np.array(rows)
+    lstm = TradingLSTM(sequence_length=10, n_features=6)
+    lstm.prepare_data(rows[~np.isnan(rows).any(axis=1)])
+    lstm.model = LastCloseModel()
+
+    model = RecordingLSTMModel(lstm)
+    trades, capital = run_backtest(data.copy(), model=model)
+    expected_trades, expected_capital = run_backtest(data.copy())
+    assert_same_trades(trades, expected_trades)
+    assert capital == expected_capital
+
+    # Once warmed up, every bar gets a prediction in price units
+    ready = [i for i, prediction in enumerate(model.predictions) if prediction is not None]
+    assert ready and ready == list(range(ready[0], len(model.predictions)))
+    np.testing.assert_allclose([model.predictions[i] for i in ready],
+                               [model.bars[i].Close for i in ready], rtol=1e-5)
@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.benchmarks import synthetic_rates
+from backend.module_families import use_family
+
+use_family('backend')
+
+import bar_store
+from bar_store import BarSeries, BarStore
+
+def mapped_paths():
+    with open('/proc/self/maps') as f:
+        return {line.split(None, 5)[-1].strip() for line in f if len(line.split()) == 6}
+
+def test_append_and_slice_views(tmp_path):
+    series = BarSeries(str(tmp_path / 'EURUSD_M1.bars'))
+    rates = synthetic_rates(1000, end=1_700_000_000)
+    assert series.append(rates) == 1000
+    assert len(series) == 1000
+
+    start, end = int(rates['time'][100]), int(rates['time'][200])
+    window = series.slice(start, end)
+    np.testing.assert_array_equal(window['close'], rates['close'][100:200])
+    assert np.shares_memory(window['close'], series._mm)
+    np.testing.assert_array_equal(series.tail(5)['time'], rates['time'][-5:])
+
+    # Re-sending the last bar replaces it; older bars are ignored
+    updated = rates[-2:].copy()
+    updated['close'] += 1
+    assert series.append(updated) == 1
+    assert len(series) == 1000
+    assert series.columns['close'][999] == updated['close'][-1]
+
+def test_grow_keeps_data_and_releases_the_old_mapping(tmp_path, monkeypatch):
+    path = str(tmp_path / 'EURUSD_M1.bars')
+    series = BarSeries(path, initial_capacity=bar_store.CAPACITY_STEP)
+    rates = synthetic_rates(3 * bar_store.CAPACITY_STEP, end=1_700_000_000)
+
+    replace = os.replace
+    def checked_replace(src, dst):
+        # Windows refuses to replace a mapped file; check nothing maps it here
+        if os.path.exists('/proc/self/maps'):
+            assert os.path.abspath(dst) not in mapped_paths()
+        replace(src, dst)
+    monkeypatch.setattr(bar_store.os, 'replace', checked_replace)
+
+    for block in np.array_split(rates, 6):
+        series.append(block)
+    assert series.capacity >= len(rates)
+    np.testing.assert_array_equal(series.time, rates['time'])
+    np.testing.assert_array_equal(series.columns['close'][:len(series)], rates['close'])
+
+    reopened = BarSeries(path, readonly=True)
+    np.testing.assert_array_equal(reopened.time, rates['time'])
+
+def test_failed_replace_keeps_the_series_usable(tmp_path, monkeypatch):
+    path = str(tmp_path / 'EURUSD_M1.bars')
+    series = BarSeries(path, initial_capacity=bar_store.CAPACITY_STEP)
+    rates = synthetic_rates(2 * bar_store.CAPACITY_STEP, end=1_700_000_000)
+    series.append(rates[:100])
+
+    def locked(src, dst):
+        raise PermissionError("file is mapped by another process")
+    monkeypatch.setattr(bar_store.os, 'replace', locked)
+    with pytest.raises(PermissionError):
+        series.append(rates[100:])
+    assert not os.path.exists(path + '.tmp')
+    np.testing.assert_array_equal(series.time, rates['time'][:100])
+
+def test_csv_layout_round_trip(tmp_path):
+    store = BarStore(str(tmp_path))
+    df = pd.DataFrame({
+        'Date': pd.date_range('2024-01-01', periods=500, freq='h'),
+        'Open': np.linspace(1.0, 2.0, 500),
+        'High': np.linspace(1.1, 2.1, 500),
+        'Low': np.linspace(0.9, 1.9, 500),
+        'Close': np.linspace(1.05, 2.05, 500),
+        'Volume': np.arange(500, dtype=np.float64),
+    })
+    store.append('EURUSD', 'H1', df)
+
+    series = store.series('EURUSD', 'H1')
+    pd.testing.assert_frame_equal(series.to_frame(csv=True), df, check_dtype=False)
+    chunks = list(series.iter_frames(128, csv=True))
+    assert [len(chunk) for chunk in chunks] == [128, 128, 128, 116]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df, check_dtype=False)
+
+    window = series.to_frame('2024-01-02', '2024-01-03', csv=True)
+    assert len(window) == 24 and window['Date'].iloc[0] == pd.Timestamp('2024-01-02')
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from backend.benchmarks import synthetic_ohlcv
+from backend.module_families import use_family
+
+# The batch runner is the src/ pipeline (CSV layout)
+use_family('src')
+
+from bar_store import BarStore
+from batch_runner import OVERLAP_ROWS, process_file, process_file_chunked, process_file_in_memory
+from performance_analyzer import PerformanceAccumulator, analyze_performance
+
+def test_bar_store_file_matches_csv(tmp_path):
+    df = synthetic_ohlcv(5000, seed=1, capitalized=True)
+    csv_file = tmp_path / 'EURUSD_M1.csv'
+    df.to_csv(csv_file, index=False)
+    BarStore(str(tmp_path)).append('EURUSD', 'M1', df)
+    bars_file = tmp_path / 'EURUSD_M1.bars'
+
+    expected = process_file(str(csv_file))
+    for in_memory_bytes in (1 << 40, 0):
+        result = process_file(str(bars_file), charts_path=str(tmp_path), chunk_rows=1000,
+                              in_memory_bytes=in_memory_bytes)
+        assert result['status'] == 'ok', result.get('traceback')
+        assert result['rows'] == expected['rows']
+        for name in ('total_return', 'num_trades', 'win_rate', 'profit_factor', 'sharpe_ratio'):
+            assert np.isclose(result[name], expected[name], rtol=1e-9), name
+    assert (tmp_path / 'EURUSD_M1.html').exists()
+
+METRICS = ('total_return', 'num_trades', 'win_rate', 'profit_factor', 'sharpe_ratio')
+
+def volatile_ohlcv(n, seed):
+    """
+    synthetic_ohlcv with moves large enough to pass generate_signals' min_distance
+    """
+    df = synthetic_ohlcv(n, seed, freq='h', capitalized=True)
+    for name in ('Open', 'High', 'Low', 'Close'):
+        df[name] = 1.1 * (df[name] / 1.1) ** 8
+    return df
+
+def test_chunked_matches_in_memory(tmp_path):
+    df = volatile_ohlcv(6000, seed=2)
+    csv_file = tmp_path / 'EURUSD_M1.csv'
+    df.to_csv(csv_file, index=False)
+
+    expected, rows, chunks = process_file_in_memory(str(csv_file))
+    assert expected['num_trades'] > 10 and chunks == 1
+    # Chunks shorter than the overlap, around it, and much longer
+    for chunk_rows in (10, 37, OVERLAP_ROWS, 997, 8000):
+        metrics, rows, chunks = process_file_chunked(str(csv_file), chunk_rows)
+        assert rows == len(df) and chunks == -(-len(df) // chunk_rows)
+        for name in METRICS:
+            assert np.isclose(metrics[name], expected[name], rtol=1e-9), (chunk_rows, name)
+
+def test_chunked_rejects_unsorted_files(tmp_path):
+    df = synthetic_ohlcv(3000, seed=2, capitalized=True)
+    csv_file = tmp_path / 'EURUSD_M1.csv'
+    pd.concat([df.iloc[1500:], df.iloc[:1500]]).to_csv(csv_file, index=False)
+    result = process_file(str(csv_file), chunk_rows=1000, in_memory_bytes=0)
+    assert result['status'] == 'failed' and 'sorted' in result['error']
+
+def test_performance_accumulator_matches_analyze_performance():
+    rng = np.random.default_rng(3)
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 1e-3, 5000)))
+    signal = rng.choice([-1.0, 0.0, 0.0, 0.0, 1.0], len(close))
+    signal[0] = np.nan
+    expected = analyze_performance(pd.DataFrame({'Signal': signal, 'Close': close}))
+
+    for bounds in ([], [1], [1000, 1001, 2500], list(range(100, 5000, 100))):
+        accumulator = PerformanceAccumulator()
+        for s, c in zip(np.split(signal, bounds), np.split(close, bounds)):
+            accumulator.update(s, c)
+        result = accumulator.result()
+        for name in METRICS:
+            assert np.isclose(result[name], expected[name], rtol=1e-9, equal_nan=True), (bounds, name)
@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from backend.benchmarks import ROOT_DIR, _isolated
+
+def test_imports_without_the_resource_module():
+    # As on Windows, where resource does not exist
+    code = ("import sys; sys.modules['resource'] = None\n"
+            "from backend import benchmarks\n"
+            "import json; print(json.dumps(benchmarks._max_rss_mb()))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    rss = json.loads(result.stdout.strip().splitlines()[-1])
+    assert rss is None or rss > 0
+
+@pytest.mark.parametrize('name', ['run_backtest', 'run_backtest_vectorized'])
+def test_backtest_cases_run(name):
+    result = _isolated(name, 2000, repeats=1, seed=0)
+    assert result['status'] == 'ok', result.get('error')
+    assert result['median'] > 0 and result['max_rss_mb'] > 0
+
+def test_missing_baseline_is_an_error(tmp_path):
+    # Run as a script, the way CI compares against a stored baseline
+    command = [sys.executable, 'backend/benchmarks.py', '--cases', 'run_backtest_vectorized', '--sizes', '10k',
+               '--repeats', '1', '--output', str(tmp_path / 'results.json')]
+    baseline = str(tmp_path / 'baseline.json')
+    result = subprocess.run(command + ['--baseline', baseline], cwd=ROOT_DIR, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 2
+    assert '--save-baseline' in result.stderr
+
+    result = subprocess.run(command + ['--baseline', baseline, '--save-baseline'], cwd=ROOT_DIR,
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+    result = subprocess.run(command + ['--baseline', baseline, '--threshold', '100'], cwd=ROOT_DIR,
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+    assert 'comparison' in json.loads((tmp_path / 'results.json').read_text())
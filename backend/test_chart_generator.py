@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from backend.benchmarks import synthetic_ohlcv
+from backend.module_families import use_family
+
+use_family('src')
+
+import chart_generator
+from chart_generator import ChartAccumulator, bucket_ohlc, bucket_starts, create_chart, epoch_ms, lttb
+from data_processor import process_data
+from signal_generator import generate_signals
+
+@pytest.fixture(scope='module')
+def frame():
+    df = synthetic_ohlcv(9000, seed=4, freq='h', capitalized=True)
+    for name in ('Open', 'High', 'Low', 'Close'):
+        df[name] = 1.1 * (df[name] / 1.1) ** 8
+    return generate_signals(process_data(df))
+
+@pytest.fixture
+def figures(monkeypatch):
+    """
+    The arguments create_chart/ChartAccumulator.write pass to the plotly figure
+    """
+    captured = []
+    monkeypatch.setattr(chart_generator, '_write_figure',
+                        lambda candles, lines, buys, sells, metrics, output_file: captured.append((candles, lines, buys, sells)))
+    return captured
+
+def assert_buckets_match_rows(buckets, df):
+    """
+    Every candle is the OHLC of the rows between its first and last time, and together they cover df
+    """
+    time = epoch_ms(df['Date'])
+    first = np.searchsorted(time, buckets['time'])
+    last = np.searchsorted(time, buckets['end'])
+    np.testing.assert_array_equal(first[1:], last[:-1] + 1)
+    assert first[0] == 0 and last[-1] == len(df) - 1
+    for name, column, reduce in (('open', 'Open', 'first'), ('high', 'High', 'max'),
+                                 ('low', 'Low', 'min'), ('close', 'Close', 'last')):
+        groups = df[column].groupby(np.repeat(np.arange(len(first)), last - first + 1))
+        np.testing.assert_array_equal(buckets[name], getattr(groups, reduce)().to_numpy(), err_msg=name)
+
+def test_bucket_starts_are_near_equal():
+    for n, n_buckets in ((10, 3), (1000, 7), (5, 10), (2001, 2000)):
+        starts = bucket_starts(n, n_buckets)
+        sizes = np.diff(np.append(starts, n))
+        assert starts[0] == 0 and len(starts) == min(n, n_buckets)
+        assert sizes.max() - sizes.min() <= 1
+
+def test_create_chart_buckets(frame, figures):
+    create_chart(frame, {'total_return': 1.0}, 'unused.html', max_candles=700, max_line_points=500)
+    candles, lines, buys, sells = figures[0]
+    assert len(candles['time']) == 700
+    assert_buckets_match_rows(candles, frame)
+
+    # Every signal is kept
+    time = epoch_ms(frame['Date'])
+    np.testing.assert_array_equal(buys[0], time[frame['Signal'] == 1])
+    np.testing.assert_array_equal(sells[0], time[frame['Signal'] == -1])
+    assert len(buys[0]) > 0 and len(sells[0]) > 0
+    for x, y in lines:
+        assert len(x) == 500
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(10000, dtype=np.float64)
+    y = np.sin(x / 500)
+    y[4321] = 5.0
+    kept_x, kept_y = lttb(x, y, 200)
+    assert len(kept_x) == 200 and kept_x[0] == 0 and kept_x[-1] == 9999
+    assert np.all(np.diff(kept_x) > 0)
+    np.testing.assert_array_equal(kept_y, y[kept_x.astype(np.int64)])
+    assert 4321 in kept_x
+
+    short_x, short_y = lttb(x[:50], y[:50], 200)
+    np.testing.assert_array_equal(short_x, x[:50])
+
+def test_accumulator_matches_the_rows_in_any_chunking(frame, figures):
+    create_chart(frame, {'total_return': 1.0}, 'unused.html', max_candles=700)
+    _, _, expected_buys, expected_sells = figures[0]
+
+    for chunk_rows in (frame.shape[0], 1000, 333):
+        chart = ChartAccumulator(max_candles=700)
+        for start in range(0, len(frame), chunk_rows):
+            chart.update(frame.iloc[start:start + chunk_rows])
+        assert 350 <= len(chart) <= 700
+        assert_buckets_match_rows(chart.buckets, frame)
+
+        chart.write({'total_return': 1.0}, 'unused.html')
+        candles, lines, buys, sells = figures[-1]
+        np.testing.assert_array_equal(buys[0], expected_buys[0])
+        np.testing.assert_array_equal(sells[1], expected_sells[1])
+
+        # The drawn lines pass through each bucket's extremes of the moving average
+        for (column, _, _), (x, y) in zip(chart_generator.LINES, lines):
+            values = frame[column]
+            assert np.nanmin(y) == values.min() and np.nanmax(y) == values.max()
+
+def test_merged_accumulators_match_one(frame):
+    whole = ChartAccumulator(max_candles=500).update(frame)
+    left = ChartAccumulator(max_candles=500).update(frame.iloc[:4000])
+    right = ChartAccumulator(max_candles=500).update(frame.iloc[4000:])
+    left.merge(right)
+    assert 250 <= len(left) <= 500
+    assert_buckets_match_rows(left.buckets, frame)
+    assert left.buckets['high'].max() == whole.buckets['high'].max()
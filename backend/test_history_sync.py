@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from backend.bar_store import BarStore, COLUMNS
+from backend.benchmarks import synthetic_rates
+from backend.history_sync import HistorySync
+
+M1 = 1
+
+class Terminal:
+    """
+    copy_rates_from_pos / copy_rates_range over an in-memory history that tests can extend or rewrite
+    """
+    def __init__(self, n=3000):
+        self.rates = synthetic_rates(n, end=1_700_000_000)
+        self.calls = []
+
+    def fetch_latest(self, symbol, tf, count):
+        self.calls.append('latest')
+        return self.rates[-count:].copy()
+
+    def fetch_range(self, symbol, tf, date_from, date_to):
+        self.calls.append('range')
+        times = self.rates['time']
+        lo, hi = np.searchsorted(times, [date_from.timestamp(), date_to.timestamp()], side='left')
+        return self.rates[lo:hi + 1].copy()
+
+    def advance(self, count, seed=1):
+        """
+        Revise the forming bar and add `count` new ones
+        """
+        self.rates[-1]['close'] += 0.001
+        if count:
+            new = synthetic_rates(count, seed, end=int(self.rates['time'][-1]) + 60 * count)
+            self.rates = np.concatenate([self.rates, new])
+
+def assert_same_bars(actual, expected):
+    assert len(actual['time']) == len(expected)
+    for name, _ in COLUMNS:
+        np.testing.assert_array_equal(actual[name], expected[name], err_msg=name)
+
+def sync_for(terminal, **kwargs):
+    return HistorySync(terminal.fetch_latest, terminal.fetch_range, timeframes={'M1': M1}, **kwargs)
+
+def test_top_up_matches_a_full_download():
+    terminal = Terminal()
+    sync = sync_for(terminal)
+    assert_same_bars(sync.get_rates('EURUSD', M1, 500), terminal.rates[-500:])
+
+    for count in (0, 1, 7):
+        terminal.advance(count)
+        assert_same_bars(sync.get_rates('EURUSD', M1, 500), terminal.rates[-500:])
+    assert terminal.calls == ['latest', 'range', 'range', 'range']
+
+    # Smaller requests come from the cache; larger ones download the window
+    assert_same_bars(sync.get_rates('EURUSD', M1, 100), terminal.rates[-100:])
+    assert_same_bars(sync.get_rates('EURUSD', M1, 2000), terminal.rates[-2000:])
+    assert terminal.calls[-2:] == ['range', 'latest']
+
+def test_rewritten_history_is_downloaded_again():
+    terminal = Terminal()
+    sync = sync_for(terminal)
+    sync.get_rates('EURUSD', M1, 500)
+
+    # The terminal's history no longer contains the last cached bar
+    terminal.rates = synthetic_rates(3000, seed=5, end=1_700_000_000 + 30)
+    assert_same_bars(sync.get_rates('EURUSD', M1, 500), terminal.rates[-500:])
+    assert terminal.calls == ['latest', 'range', 'latest']
+
+def test_store_seeds_the_cache_after_a_restart(tmp_path):
+    terminal = Terminal()
+    sync_for(terminal, store=BarStore(str(tmp_path))).get_rates('EURUSD', M1, 500)
+    terminal.advance(3)
+
+    terminal.calls.clear()
+    restarted = sync_for(terminal, store=BarStore(str(tmp_path)))
+    assert_same_bars(restarted.get_rates('EURUSD', M1, 500), terminal.rates[-500:])
+    assert terminal.calls == ['range']
+
+    stored = BarStore(str(tmp_path), readonly=True).series('EURUSD', 'M1')
+    assert_same_bars(stored.tail(len(stored)), terminal.rates[-503:])
+
+def test_failed_fetch_keeps_the_cached_bars():
+    terminal = Terminal()
+    sync = sync_for(terminal)
+    expected = sync.get_rates('EURUSD', M1, 500)
+    terminal.fetch_range = lambda *args: None
+    assert_same_bars(sync.get_rates('EURUSD', M1, 500), expected)
+
+    terminal.fetch_latest = lambda *args: None
+    assert sync_for(terminal).get_rates('EURUSD', M1, 500) is None
+
+def test_short_terminal_history_is_only_topped_up():
+    terminal = Terminal(300)
+    sync = sync_for(terminal)
+    assert_same_bars(sync.get_rates('EURUSD', M1, 1000), terminal.rates)
+
+    terminal.advance(2)
+    assert_same_bars(sync.get_rates('EURUSD', M1, 1000), terminal.rates)
+    assert_same_bars(sync.get_rates('EURUSD', M1, 500), terminal.rates)
+    assert terminal.calls == ['latest', 'range', 'range']
+
+    # A larger request than the terminal failed to fill is tried once more
+    sync.get_rates('EURUSD', M1, 2000)
+    sync.get_rates('EURUSD', M1, 2000)
+    assert terminal.calls[3:] == ['latest', 'range']
+
+    sync.invalidate()
+    sync.get_rates('EURUSD', M1, 1000)
+    assert terminal.calls[-1] == 'latest'
+
+def test_requests_beyond_max_bars_are_clamped(caplog):
+    terminal = Terminal()
+    sync = sync_for(terminal, max_bars=1000)
+    with caplog.at_level('WARNING', logger='backend.history_sync'):
+        rates = sync.get_rates('EURUSD', M1, 2500)
+    assert_same_bars(rates, terminal.rates[-1000:])
+    assert 'max_bars' in caplog.text
+    # Clamped before fetching, so the full cache is reused afterwards
+    assert_same_bars(sync.get_rates('EURUSD', M1, 2500), terminal.rates[-1000:])
+    assert terminal.calls == ['latest', 'range']
@@ -0,0 +1,95 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+
+# Seconds allowed for each import in a fresh interpreter (best of RUNS).
+# Wall-clock times depend on the machine, so pytest only enforces them with
+# CHECK_IMPORT_BUDGETS=1; running this file as a script reports them.
+CHECK_BUDGETS = os.getenv('CHECK_IMPORT_BUDGETS') == '1'
+IMPORT_BUDGETS = {
+    'backend.main': 1.0,
+    'data_processor': 1.0,
+    'ml_model': 0.5,
+    'risk_manager': 1.0,
+    'portfolio_risk': 0.5,
+    'sentiment_analyzer': 0.2,
+}
+RUNS = 3
+
+# Must only be imported when actually used
+HEAVY_MODULES = ('tensorflow', 'talib', 'scipy', 'sklearn', 'nltk')
+# The API serves numpy arrays and does not need pandas (which loads pyarrow) either
+API_HEAVY_MODULES = HEAVY_MODULES + ('pandas', 'pyarrow')
+
+# Only the constants main.py reads at import time; any terminal call during
+# import fails with AttributeError
+MT5_STUB = """
+import sys, types
+mt5 = types.ModuleType('MetaTrader5')
+mt5.TIMEFRAME_M1, mt5.TIMEFRAME_M5, mt5.TIMEFRAME_M15, mt5.TIMEFRAME_M30 = 1, 5, 15, 30
+mt5.TIMEFRAME_H1, mt5.TIMEFRAME_H4, mt5.TIMEFRAME_D1 = 16385, 16388, 16408
+sys.modules['MetaTrader5'] = mt5
+"""
+
+def measure_import(module, heavy=HEAVY_MODULES):
+    """
+    Import `module` in a new interpreter; returns (seconds, modules of `heavy` loaded)
+    """
+    code = MT5_STUB + f"""
+import json, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {tuple(heavy)!r} if m in sys.modules]}}))
+"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT_DIR, BACKEND_DIR]))
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise AssertionError(f"import {module} failed:\n{result.stderr}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return report['seconds'], report['loaded']
+
+def check_import(module, runs=RUNS, check_budget=True):
+    """
+    Best import time of `module` over `runs` fresh interpreters; fails if it
+    loads a heavy module or, with check_budget, exceeds its budget
+    """
+    heavy = API_HEAVY_MODULES if module == 'backend.main' else HEAVY_MODULES
+    best = None
+    for _ in range(runs):
+        seconds, loaded = measure_import(module, heavy)
+        assert not loaded, f"import {module} loaded {', '.join(loaded)}"
+        best = seconds if best is None else min(best, seconds)
+    if check_budget:
+        budget = IMPORT_BUDGETS[module]
+        assert best <= budget, f"import {module} took {best:.2f}s (budget {budget:.2f}s)"
+    return best
+
+def check_imports(modules):
+    for module in modules:
+        check_import(module, RUNS if CHECK_BUDGETS else 1, CHECK_BUDGETS)
+
+def test_api_import_is_light():
+    check_imports(['backend.main'])
+
+def test_model_and_risk_imports_are_light():
+    check_imports(['data_processor', 'ml_model', 'risk_manager', 'portfolio_risk', 'sentiment_analyzer'])
+
+if __name__ == "__main__":
+    # Report only: times over budget are flagged, heavy imports fail
+    failed = False
+    for module in IMPORT_BUDGETS:
+        try:
+            seconds = check_import(module, check_budget=False)
+        except AssertionError as e:
+            print(f"{module}: FALHOU - {e}")
+            failed = True
+            continue
+        flag = " ACIMA DO ORÇAMENTO" if seconds > IMPORT_BUDGETS[module] else ""
+        print(f"{module}: {seconds:.3f}s (budget {IMPORT_BUDGETS[module]:.2f}s){flag}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,85 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.module_families import use_family
+
+use_family('backend')
+
+from indicator_state import IndicatorState, INDICATOR_PARAMS
+
+def ohlcv(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 1e-3, n)))
+    open_ = np.concatenate([[1.1], close[:-1]])
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + np.abs(rng.normal(0, 5e-4, n)),
+        'low': np.minimum(open_, close) - np.abs(rng.normal(0, 5e-4, n)),
+        'close': close,
+        'volume': rng.integers(1, 500, n).astype(np.float64),
+    })
+
+def run_state(df, params=None):
+    """
+    Feed df bar by bar; returns {indicator name: array of per-bar values}
+    """
+    state = IndicatorState(params)
+    columns = {}
+    for bar in df.itertuples(index=False):
+        snapshot = state.update(open=bar.open, high=bar.high, low=bar.low, close=bar.close, volume=bar.volume)
+        values = {'sma': snapshot.sma, 'ema': snapshot.ema, 'rsi': snapshot.rsi, 'atr': snapshot.atr, 'adx': snapshot.adx}
+        values.update({f'macd_{k}': v for k, v in snapshot.macd.items()})
+        values.update({f'bbands_{k}': v for k, v in snapshot.bollinger.items()})
+        values.update({f'stoch_{k}': v for k, v in snapshot.stoch.items()})
+        for name, value in values.items():
+            columns.setdefault(name, []).append(value)
+    return {name: np.array(values) for name, values in columns.items()}
+
+def test_matches_talib():
+    talib = pytest.importorskip('talib')
+    df = ohlcv()
+    high, low, close = (df[c].to_numpy() for c in ('high', 'low', 'close'))
+    p = INDICATOR_PARAMS
+    macd, signal, hist = talib.MACD(close, **p['macd'])
+    upper, middle, lower = talib.BBANDS(close, **p['bbands'])
+    slowk, slowd = talib.STOCH(high, low, close, **p['stoch'])
+    expected = {
+        'sma': talib.SMA(close, **p['sma']),
+        'ema': talib.EMA(close, **p['ema']),
+        'rsi': talib.RSI(close, **p['rsi']),
+        'atr': talib.ATR(high, low, close, **p['atr']),
+        'adx': talib.ADX(high, low, close, **p['adx']),
+        'macd_macd': macd, 'macd_signal': signal, 'macd_histogram': hist,
+        'bbands_upper': upper, 'bbands_middle': middle, 'bbands_lower': lower,
+        'stoch_k': slowk, 'stoch_d': slowd,
+    }
+    actual = run_state(df)
+    for name, values in expected.items():
+        np.testing.assert_allclose(actual[name], values, rtol=1e-9, atol=1e-12, equal_nan=True, err_msg=name)
+
+def test_sma_and_bollinger_match_pandas():
+    df = ohlcv()
+    period = INDICATOR_PARAMS['bbands']['timeperiod']
+    rolling = df['close'].rolling(period)
+    actual = run_state(df)
+    np.testing.assert_allclose(actual['sma'], df['close'].rolling(INDICATOR_PARAMS['sma']['timeperiod']).mean(),
+                               rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(actual['bbands_middle'], rolling.mean(), rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(actual['bbands_upper'], rolling.mean() + 2 * rolling.std(ddof=0),
+                               rtol=1e-9, equal_nan=True)
+
+def test_from_frame_uses_params():
+    df = ohlcv(200)
+    params = copy.deepcopy(INDICATOR_PARAMS)
+    params['sma']['timeperiod'] = 5
+    params['rsi']['timeperiod'] = 7
+
+    state = IndicatorState.from_frame(df, params)
+    assert state.sma.period == 5 and state.rsi.period == 7
+    assert np.isclose(state.sma.value, df['close'].iloc[-5:].mean())
+    assert np.isclose(state.rsi.value, run_state(df, params)['rsi'][-1])
+    # The defaults are not modified by a custom state
+    assert IndicatorState.from_frame(df).sma.period == INDICATOR_PARAMS['sma']['timeperiod'] == 20
@@ -0,0 +1,134 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.module_families import use_family
+
+use_family('backend')
+
+from inference_service import BatchedPredictor, _PendingRequest
+from ml_model import TradingLSTM
+
+class FakeLSTM:
+    """
+    Stands in for TradingLSTM: the prediction of a window is the sum of its values
+    """
+    sequence_length = 4
+    n_features = 2
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def forward(self, X):
+        self.batches.append(len(X))
+        if self.fail:
+            raise RuntimeError("forward failed")
+        return X.reshape(len(X), -1).sum(axis=1, keepdims=True)
+
+class LastTargetModel:
+    """
+    Stands in for the Keras model: predicts the last scaled target in each window
+    """
+    class Output:
+        def __init__(self, values):
+            self.values = values
+
+        def numpy(self):
+            return self.values
+
+    def __call__(self, X, training=False):
+        return self.Output(self.predict(X))
+
+    def predict(self, X, verbose=0):
+        return np.asarray(X)[:, -1, :1]
+
+def window(value):
+    return np.full((FakeLSTM.sequence_length, FakeLSTM.n_features), value, dtype=np.float32)
+
+async def started(lstm, **kwargs):
+    predictor = BatchedPredictor(lstm, max_wait_ms=20, **kwargs)
+    await predictor.start(warmup=False)
+    return predictor
+
+def test_concurrent_requests_share_one_forward_pass():
+    async def main():
+        lstm = FakeLSTM()
+        predictor = await started(lstm)
+        results = await asyncio.gather(*(predictor.predict('EURUSD', window(i)) for i in range(10)))
+        await predictor.stop()
+        return lstm, results
+
+    lstm, results = asyncio.run(main())
+    assert lstm.batches == [10]
+    for i, result in enumerate(results):
+        np.testing.assert_allclose(result, [[8.0 * i]])
+
+def test_malformed_input_is_rejected_without_stopping_the_service():
+    async def main():
+        predictor = await started(FakeLSTM())
+        with pytest.raises(ValueError):
+            await predictor.predict('EURUSD', np.zeros((3, 2)))
+        with pytest.raises(ValueError):
+            await predictor.predict('EURUSD', np.zeros((1, 2, 4, 2)))
+        result = await asyncio.wait_for(predictor.predict('EURUSD', window(1)), 1)
+        await predictor.stop()
+        return result
+
+    np.testing.assert_allclose(asyncio.run(main()), [[8.0]])
+
+def test_failed_batch_fails_its_own_requests_only():
+    async def main():
+        lstm = FakeLSTM(fail=True)
+        predictor = await started(lstm)
+        with pytest.raises(RuntimeError):
+            await predictor.predict('EURUSD', window(1))
+
+        # A request that slipped past validation fails its batch but not the loop
+        future = asyncio.get_running_loop().create_future()
+        await predictor.queue.put(_PendingRequest('EURUSD', np.zeros((1, 3, 2), np.float32), future, 0.0))
+        lstm.fail = False
+        good = predictor.predict('EURUSD', window(2))
+        results = await asyncio.wait_for(asyncio.gather(future, good, return_exceptions=True), 1)
+        later = await asyncio.wait_for(predictor.predict('EURUSD', window(3)), 1)
+        assert not predictor._task.done()
+        await predictor.stop()
+        return results, later
+
+    (bad, good), later = asyncio.run(main())
+    assert isinstance(bad, ValueError)
+    assert isinstance(good, ValueError)
+    np.testing.assert_allclose(later, [[24.0]])
+
+def fitted_lstm():
+    """
+    A TradingLSTM with its 6-feature scaler fitted by prepare_data
+    """
+    pytest.importorskip('sklearn')
+    rng = np.random.default_rng(0)
+    data = np.column_stack([1.1 + np.cumsum(rng.normal(0, 1e-3, 300)), rng.normal(size=(300, 5)) * 50])
+    lstm = TradingLSTM(sequence_length=10, n_features=6)
+    X, _ = lstm.prepare_data(data)
+    lstm.model = LastTargetModel()
+    # Window i ends on row i + 9
+    return lstm, X, data[9:len(X) + 9, :1]
+
+def test_forward_returns_prices_with_a_fitted_scaler():
+    lstm, X, expected = fitted_lstm()
+    predictions = lstm.forward(X)
+    assert predictions.shape == (len(X), 1)
+    np.testing.assert_allclose(predictions, expected)
+    np.testing.assert_allclose(lstm.predict(X[:5]), expected[:5])
+
+def test_batched_predictor_with_a_fitted_scaler():
+    lstm, X, expected = fitted_lstm()
+
+    async def main():
+        predictor = BatchedPredictor(lstm, max_wait_ms=20)
+        await predictor.start(warmup=True)
+        results = await asyncio.gather(*(predictor.predict('EURUSD', X[i]) for i in range(8)))
+        await predictor.stop()
+        return results
+
+    np.testing.assert_allclose(np.concatenate(asyncio.run(main())), expected[:8])
@@ -0,0 +1,62 @@
+import json
+
+import numpy as np
+import pytest
+
+from backend import market_data_encoding
+from backend.benchmarks import synthetic_rates
+from backend.market_data_encoding import (
+    FIELDS, MarketDataSnapshot, binary_headers, encode_arrow, encode_binary,
+    encode_columnar, encode_records, negotiate_format
+)
+
+@pytest.fixture
+def rates():
+    return synthetic_rates(500, end=1_700_000_000)
+
+def assert_same_bars(columns, rates):
+    assert list(columns) == [name for name, _ in FIELDS]
+    for name, field in FIELDS:
+        np.testing.assert_array_equal(np.asarray(columns[name]), rates[field])
+
+def test_records_round_trip(rates):
+    payload = json.loads(encode_records(rates, 'EURUSD', 'M1'))
+    assert payload['symbol'] == 'EURUSD' and payload['timeframe'] == 'M1'
+    records = payload['market_data']
+    assert len(records) == len(rates)
+    assert_same_bars({name: [record[name] for record in records] for name, _ in FIELDS}, rates)
+
+def test_columnar_round_trip(rates):
+    payload = json.loads(encode_columnar(rates, 'EURUSD', 'M1'))
+    assert payload['length'] == len(rates)
+    assert_same_bars(payload['columns'], rates)
+
+def test_arrow_round_trip(rates):
+    pa = pytest.importorskip('pyarrow')
+    table = pa.ipc.open_stream(encode_arrow(rates, 'EURUSD', 'M1')).read_all()
+    assert table.schema.metadata == {b'symbol': b'EURUSD', b'timeframe': b'M1'}
+    assert_same_bars({name: table.column(name).to_numpy() for name in table.column_names}, rates)
+
+def test_binary_round_trip(rates):
+    headers = binary_headers(rates)
+    dtype = np.dtype([tuple(field) for field in json.loads(headers['X-Rates-Dtype'])])
+    decoded = np.frombuffer(encode_binary(rates, 'EURUSD', 'M1'), dtype=dtype)
+    assert len(decoded) == int(headers['X-Rates-Count'])
+    np.testing.assert_array_equal(decoded, rates)
+
+def test_snapshot_encodes_each_format_once(rates):
+    snapshot = MarketDataSnapshot(rates, 'EURUSD', 'M1')
+    assert snapshot.body('columnar') is snapshot.body('columnar')
+    assert json.loads(snapshot.body('records'))['market_data'][0]['close'] == rates['close'][0]
+
+def test_negotiate_json_and_binary():
+    assert negotiate_format(None) == 'records'
+    assert negotiate_format('application/json', 'columnar') == 'columnar'
+    assert negotiate_format('application/octet-stream', 'columnar') == 'binary'
+
+def test_negotiate_arrow(monkeypatch):
+    pytest.importorskip('pyarrow')
+    assert negotiate_format('application/vnd.apache.arrow.stream') == 'arrow'
+    # Without pyarrow the client gets JSON instead
+    monkeypatch.setattr(market_data_encoding, '_pyarrow', lambda: None)
+    assert negotiate_format('application/vnd.apache.arrow.stream', 'columnar') == 'columnar'
@@ -0,0 +1,80 @@
+import asyncio
+import sys
+
+import pandas as pd
+import pytest
+
+from backend.benchmarks import stub_mt5, synthetic_rates
+
+sys.modules.setdefault('MetaTrader5', stub_mt5(synthetic_rates(10)))
+
+from backend import market_data_fetcher
+from backend.market_data_fetcher import MarketDataFetcher
+from backend.mt5_gateway import MT5Gateway
+
+@pytest.fixture
+def terminal(monkeypatch):
+    """
+    A stub terminal that records copy_rates_from_pos calls and has no data for 'MISSING'
+    """
+    mt5 = stub_mt5(synthetic_rates(3000, end=1_700_000_000))
+    calls = []
+    copy_rates = mt5.copy_rates_from_pos
+
+    def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+        calls.append((symbol, timeframe, count))
+        return None if symbol == 'MISSING' else copy_rates(symbol, timeframe, start_pos, count)
+
+    mt5.copy_rates_from_pos = copy_rates_from_pos
+    monkeypatch.setattr(market_data_fetcher, 'mt5', mt5)
+    return mt5, calls
+
+def test_fetch_many_matches_separate_fetches(terminal):
+    mt5, calls = terminal
+    requests = [('EURUSD', mt5.TIMEFRAME_M1, 100), ('EURUSD', mt5.TIMEFRAME_M1, 2000),
+                ('EURUSD', mt5.TIMEFRAME_M5, 500), ('GBPUSD', mt5.TIMEFRAME_M1, 300),
+                ('MISSING', mt5.TIMEFRAME_M1, 50)]
+    gateway = MT5Gateway()
+    fetcher = MarketDataFetcher(gateway)
+
+    async def main():
+        batched = await fetcher.fetch_many(requests, max_concurrency=2)
+        batched_calls = list(calls)
+        separate = {request: await fetcher.fetch_ohlcv(*request) for request in requests}
+        return batched, batched_calls, separate
+
+    batched, batched_calls, separate = asyncio.run(main())
+    gateway.stop()
+
+    # One terminal call per symbol/timeframe, for the largest count requested
+    assert sorted(batched_calls) == sorted([('EURUSD', mt5.TIMEFRAME_M1, 2000), ('EURUSD', mt5.TIMEFRAME_M5, 500),
+                                            ('GBPUSD', mt5.TIMEFRAME_M1, 300), ('MISSING', mt5.TIMEFRAME_M1, 50)])
+    assert list(batched) == requests
+    for request in requests:
+        if separate[request] is None:
+            assert batched[request] is None
+        else:
+            pd.testing.assert_frame_equal(batched[request], separate[request])
+
+def test_fetch_many_tails_and_rejects_negative_counts(terminal):
+    mt5, calls = terminal
+    gateway = MT5Gateway()
+    fetcher = MarketDataFetcher(gateway)
+    requests = [('EURUSD', mt5.TIMEFRAME_M1, 0), ('EURUSD', mt5.TIMEFRAME_M1, 1), ('EURUSD', mt5.TIMEFRAME_M1, 10)]
+
+    async def main():
+        batched = await fetcher.fetch_many(requests)
+        with pytest.raises(ValueError):
+            await fetcher.fetch_many([('EURUSD', mt5.TIMEFRAME_M1, 10), ('GBPUSD', mt5.TIMEFRAME_M1, -1)])
+        return batched
+
+    batched = asyncio.run(main())
+    gateway.stop()
+
+    full = batched[requests[2]]
+    assert len(full) == 10
+    assert len(batched[requests[0]]) == 0
+    assert list(batched[requests[0]].columns) == list(full.columns)
+    pd.testing.assert_frame_equal(batched[requests[1]], full.iloc[-1:].reset_index(drop=True))
+    # The invalid batch was rejected before reaching the terminal
+    assert calls == [('EURUSD', mt5.TIMEFRAME_M1, 10)]
@@ -0,0 +1,143 @@
+import asyncio
+import json
+
+import numpy as np
+
+from backend.benchmarks import synthetic_rates, synthetic_ticks
+from backend.market_stream import MarketStream
+
+KEY = ('EURUSD', 'M1')
+
+class Terminal:
+    """
+    Fake fetch_rates/fetch_ticks coroutines over bars and ticks the test edits
+    """
+    def __init__(self, n=50):
+        self.rates = synthetic_rates(n, end=1_700_000_000)
+        self.ticks = synthetic_ticks(20, start_msc=1_700_000_000_000)
+        self.gate = None  # when set, window loads wait for it
+
+    async def fetch_rates(self, symbol, tf, count):
+        if count > 2 and self.gate is not None:
+            await self.gate.wait()
+        return self.rates[-count:].copy()
+
+    async def fetch_ticks(self, symbol, since_msc):
+        return self.ticks[self.ticks['time_msc'] > since_msc]
+
+    def new_bar(self):
+        bar = self.rates[-1:].copy()
+        bar['time'] += 60
+        self.rates = np.concatenate([self.rates, bar])
+
+def messages(subscription):
+    received = []
+    while not subscription.queue.empty():
+        received.append(json.loads(subscription.queue.get_nowait()))
+    return received
+
+def stream_of(terminal, **kwargs):
+    # The pollers sleep between polls; tests drive _poll_once themselves
+    return MarketStream(terminal.fetch_rates, terminal.fetch_ticks, poll_interval=3600, **kwargs)
+
+def test_subscriber_gets_snapshot_then_bar_updates():
+    terminal = Terminal()
+
+    async def main():
+        stream = stream_of(terminal)
+        subscription = await stream.subscribe(*KEY, tf=1, num_candles=5)
+        feed = stream._feeds[KEY]
+        await asyncio.sleep(0)  # first poll: nothing changed, only the ticks
+        [snapshot, ticks] = messages(subscription)
+        assert snapshot['type'] == 'snapshot'
+        assert snapshot['columns']['time'] == terminal.rates['time'][-5:].tolist()
+        assert ticks['type'] == 'ticks' and len(ticks['columns']['time_msc']) == 20
+
+        # Update of the forming bar
+        terminal.rates['close'][-1] += 0.001
+        await stream._poll_once(feed)
+        [update] = messages(subscription)
+        assert update['type'] == 'bar' and not update['new']
+        assert update['bar']['close'] == terminal.rates['close'][-1]
+
+        # A new bar slides the window
+        terminal.new_bar()
+        await stream._poll_once(feed)
+        [bar] = messages(subscription)
+        assert bar['type'] == 'bar' and bar['new']
+        assert feed.rates['time'].tolist() == terminal.rates['time'][-5:].tolist()
+
+        # Nothing new: nothing sent
+        await stream._poll_once(feed)
+        assert messages(subscription) == []
+        stream.unsubscribe(subscription)
+
+    asyncio.run(main())
+
+def test_missed_bars_resynchronize_with_a_snapshot():
+    terminal = Terminal()
+
+    async def main():
+        stream = stream_of(terminal)
+        subscription = await stream.subscribe(*KEY, tf=1, num_candles=5)
+        await asyncio.sleep(0)
+        messages(subscription)
+
+        for _ in range(3):
+            terminal.new_bar()
+        await stream._poll_once(stream._feeds[KEY])
+        [snapshot] = messages(subscription)
+        assert snapshot['type'] == 'snapshot'
+        assert snapshot['columns']['time'] == terminal.rates['time'][-5:].tolist()
+        stream.unsubscribe(subscription)
+
+    asyncio.run(main())
+
+def test_overflowing_queue_is_replaced_by_a_snapshot():
+    terminal = Terminal()
+
+    async def main():
+        stream = stream_of(terminal, queue_size=3)
+        subscription = await stream.subscribe(*KEY, tf=1, num_candles=5)
+        await asyncio.sleep(0)
+        messages(subscription)
+
+        feed = stream._feeds[KEY]
+        for _ in range(4):
+            terminal.new_bar()
+            await stream._poll_once(feed)
+        # Three bars filled the queue; the fourth replaced the backlog
+        [snapshot] = messages(subscription)
+        assert snapshot['type'] == 'snapshot'
+        assert snapshot['columns']['time'] == terminal.rates['time'][-5:].tolist()
+        stream.unsubscribe(subscription)
+
+    asyncio.run(main())
+
+def test_last_unsubscribe_during_a_subscribe_keeps_the_feed():
+    terminal = Terminal()
+
+    async def main():
+        stream = stream_of(terminal)
+        first = await stream.subscribe(*KEY, tf=1, num_candles=5)
+
+        # A larger window has to be loaded; the first subscriber leaves meanwhile
+        terminal.gate = asyncio.Event()
+        pending = asyncio.create_task(stream.subscribe(*KEY, tf=1, num_candles=10))
+        await asyncio.sleep(0)
+        stream.unsubscribe(first)
+        terminal.gate.set()
+        second = await pending
+
+        feed = stream._feeds.get(KEY)
+        assert feed is second.feed
+        assert feed.task is not None and not feed.task.done()
+        [snapshot] = [m for m in messages(second) if m['type'] == 'snapshot']
+        assert len(snapshot['columns']['time']) == 10
+
+        stream.unsubscribe(second)
+        assert KEY not in stream._feeds
+        await asyncio.sleep(0)
+        assert feed.task is None
+
+    asyncio.run(main())
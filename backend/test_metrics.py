@@ -0,0 +1,46 @@
+import threading
+import time
+
+import pytest
+
+from backend.metrics import SamplingProfiler
+
+def recurse(depth, stop):
+    if depth:
+        return recurse(depth - 1, stop)
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_profile_can_be_read_while_sampling():
+    stop = threading.Event()
+    # Threads at different depths keep adding new stacks to the counts
+    workers = [threading.Thread(target=recurse, args=(depth, stop)) for depth in range(1, 9)]
+    for worker in workers:
+        worker.start()
+    profiler = SamplingProfiler(interval=SamplingProfiler.MIN_INTERVAL)
+    profiler.start()
+    try:
+        deadline = time.monotonic() + 1
+        while time.monotonic() < deadline:
+            profiler.folded()
+            profiler.top_functions()
+    finally:
+        profiler.stop()
+        stop.set()
+        for worker in workers:
+            worker.join()
+    assert profiler.total > 0
+    assert sum(profiler.snapshot().values()) >= profiler.total
+    assert any(row['function'].startswith('recurse') for row in profiler.top_functions(50))
+
+    profiler.reset()
+    assert profiler.folded() == '' and profiler.total == 0
+
+@pytest.mark.parametrize('interval', [0, -1, 1e-5, float('nan')])
+def test_intervals_below_the_minimum_are_rejected(interval):
+    with pytest.raises(ValueError):
+        SamplingProfiler(interval=interval)
+    profiler = SamplingProfiler()
+    with pytest.raises(ValueError):
+        profiler.start(interval)
+    assert not profiler.running and profiler.interval == 0.01
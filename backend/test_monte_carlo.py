@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from backend.module_families import use_family
+
+use_family('backend')
+
+from monte_carlo import STATISTICS, block_bootstrap_paths, path_statistics, run_monte_carlo
+from risk_manager import RiskManager
+
+@pytest.mark.filterwarnings('ignore:Mean of empty slice:RuntimeWarning')
+def test_path_statistics_match_calculate_metrics():
+    rng = np.random.default_rng(0)
+    paths = rng.normal(0.001, 0.02, (20, 250))
+    # Include a path with no losses, whose Kelly fraction is undefined in both
+    paths[-1] = np.abs(paths[-1])
+    statistics = path_statistics(paths.copy())
+
+    manager = RiskManager()
+    for i, returns in enumerate(paths):
+        with np.errstate(all='ignore'):
+            expected = manager.calculate_metrics(returns)
+        assert statistics['total_return'][i] == pytest.approx(np.prod(1 + returns) - 1, rel=1e-12)
+        for name in ('max_drawdown', 'var_95', 'cvar_95', 'kelly_fraction'):
+            assert statistics[name][i] == pytest.approx(getattr(expected, name), rel=1e-9, abs=1e-12, nan_ok=True), name
+
+def test_same_seed_gives_the_same_paths_for_any_worker_count():
+    returns = np.random.default_rng(1).normal(0.0005, 0.01, 300)
+    kwargs = dict(n_paths=2000, seed=42, chunk_paths=500, return_paths_stats=True)
+    for method in ('bootstrap', 'parametric'):
+        serial = run_monte_carlo(returns, method=method, max_workers=1, **kwargs)
+        parallel = run_monte_carlo(returns, method=method, max_workers=3, **kwargs)
+        for name in STATISTICS:
+            np.testing.assert_array_equal(parallel['paths'][name], serial['paths'][name])
+        assert parallel['statistics'] == serial['statistics']
+
+    other = run_monte_carlo(returns, max_workers=1, **{**kwargs, 'seed': 43})
+    assert not np.array_equal(other['paths']['total_return'], serial['paths']['total_return'])
+
+def test_block_bootstrap_keeps_blocks_contiguous():
+    n, block_size, horizon = 50, 7, 40
+    # Each return is its own index, so a path shows where every draw came from
+    returns = np.arange(n, dtype=np.float64)
+    paths = block_bootstrap_paths(returns, 100, horizon, block_size, np.random.default_rng(2))
+    assert paths.shape == (100, horizon)
+
+    steps = (np.diff(paths, axis=1) % n).astype(int)
+    within_block = (np.arange(1, horizon) % block_size) != 0
+    # Consecutive draws within a block wrap around the end of the sample
+    assert (steps[:, within_block] == 1).all()
+    assert (steps[:, ~within_block] != 1).any()
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.mt5_gateway import MT5Gateway, GatewayBusy, PRIORITY_HISTORY, PRIORITY_REALTIME
+
+def blocked(gateway):
+    """
+    Occupy the worker until the returned event is set
+    """
+    release = threading.Event()
+    future = gateway.submit(release.wait)
+    return release, future
+
+def test_realtime_calls_overtake_queued_history():
+    gateway = MT5Gateway()
+    release, _ = blocked(gateway)
+    order = []
+    futures = [gateway.submit(order.append, 'history', priority=PRIORITY_HISTORY),
+               gateway.submit(order.append, 'realtime', priority=PRIORITY_REALTIME)]
+    release.set()
+    for future in futures:
+        future.result(timeout=1)
+    gateway.stop()
+    assert order == ['realtime', 'history']
+
+def test_waiting_callers_get_freed_slots():
+    gateway = MT5Gateway(max_pending=2)
+
+    async def main():
+        release, _ = blocked(gateway)
+        calls = [asyncio.ensure_future(gateway.call(lambda i=i: i)) for i in range(6)]
+        await asyncio.sleep(0.05)
+        # One slot is taken by the blocker, one by the first call; the rest wait
+        assert gateway.pending == 1 and len(gateway._waiters) == 5
+        with pytest.raises(GatewayBusy):
+            gateway.submit(lambda: None)
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(*calls), 1)
+
+    assert asyncio.run(main()) == list(range(6))
+    gateway.stop()
+    assert gateway._slots._value == 2
+
+def test_cancelled_waiter_does_not_leak_its_slot():
+    gateway = MT5Gateway(max_pending=1)
+
+    async def main():
+        release, _ = blocked(gateway)
+        waiter = asyncio.ensure_future(gateway.call(lambda: 'first'))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        release.set()
+        await asyncio.sleep(0.05)
+        return waiter, await asyncio.wait_for(gateway.call(lambda: 'second'), 1)
+
+    waiter, result = asyncio.run(main())
+    gateway.stop()
+    assert waiter.cancelled() and result == 'second'
+    assert gateway._slots._value == 1 and not gateway._waiters
+
+def test_call_sync_runs_on_the_worker_thread():
+    gateway = MT5Gateway()
+    assert gateway.call_sync(threading.current_thread) is gateway._thread
+    # Nested calls from the worker run inline instead of deadlocking
+    assert gateway.call_sync(lambda: gateway.call_sync(lambda: 42)) == 42
+    gateway.stop()
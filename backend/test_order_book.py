@@ -0,0 +1,93 @@
+from collections import namedtuple
+
+import numpy as np
+
+from backend.order_book import BOOK_TYPE_BUY, BOOK_TYPE_SELL, OrderBookRing
+
+BookInfo = namedtuple('BookInfo', 'type price volume volume_dbl')
+
+def random_books(n, levels=15, seed=0):
+    """
+    (bid_prices, bid_volumes, ask_prices, ask_volumes) per snapshot, best first
+    """
+    rng = np.random.default_rng(seed)
+    mid = 1.1 + np.cumsum(rng.choice([-1e-5, 0, 1e-5], n))
+    books = []
+    for m in mid:
+        half = rng.integers(1, 3) * 1e-5
+        bids = m - half - 1e-5 * np.arange(levels)
+        asks = m + half + 1e-5 * np.arange(levels)
+        books.append((bids, rng.integers(1, 50, levels).astype(float), asks, rng.integers(1, 50, levels).astype(float)))
+    return books
+
+def mt5_book(bids, bid_volumes, asks, ask_volumes):
+    """
+    market_book_get order: from the highest price down
+    """
+    return tuple([BookInfo(BOOK_TYPE_SELL, p, v, v) for p, v in zip(asks[::-1], ask_volumes[::-1])] +
+                 [BookInfo(BOOK_TYPE_BUY, p, v, v) for p, v in zip(bids, bid_volumes)])
+
+def reference_features(books, depth):
+    bid = np.array([b[0][0] for b in books])
+    bid_vol = np.array([b[1][0] for b in books])
+    ask = np.array([b[2][0] for b in books])
+    ask_vol = np.array([b[3][0] for b in books])
+    bid_depth = np.array([b[1][:depth].sum() for b in books])
+    ask_depth = np.array([b[3][:depth].sum() for b in books])
+
+    ofi = np.zeros(len(books))
+    prev_bid, prev_bid_vol, prev_ask, prev_ask_vol = bid[:-1], bid_vol[:-1], ask[:-1], ask_vol[:-1]
+    ofi[1:] = (np.where(bid[1:] >= prev_bid, bid_vol[1:], 0) - np.where(bid[1:] <= prev_bid, prev_bid_vol, 0)
+               - np.where(ask[1:] <= prev_ask, ask_vol[1:], 0) + np.where(ask[1:] >= prev_ask, prev_ask_vol, 0))
+    return {
+        'spread': ask - bid,
+        'mid': (ask + bid) / 2,
+        'microprice': (ask * bid_vol + bid * ask_vol) / (bid_vol + ask_vol),
+        'imbalance': (bid_vol - ask_vol) / (bid_vol + ask_vol),
+        'depth_imbalance': (bid_depth - ask_depth) / (bid_depth + ask_depth),
+        'ofi': ofi,
+    }
+
+def test_mt5_books_match_per_side_levels():
+    books = random_books(300)
+    from_mt5, from_levels = OrderBookRing(capacity=512, depth=10), OrderBookRing(capacity=512, depth=10)
+    for i, book in enumerate(books):
+        from_mt5.append_book(mt5_book(*book), time_msc=i)
+        from_levels.append(*book, time_msc=i)
+
+    for name, values in from_levels.levels().items():
+        np.testing.assert_array_equal(from_mt5.levels()[name], values, err_msg=name)
+    for name, values in from_levels.history().items():
+        np.testing.assert_array_equal(from_mt5.history()[name], values, err_msg=name)
+    np.testing.assert_array_equal(from_mt5.levels()['ask_price'][0], books[0][2][:10])
+
+def test_features_match_reference():
+    books = random_books(300, seed=1)
+    ring = OrderBookRing(capacity=512, depth=10)
+    for i, book in enumerate(books):
+        ring.append(*book, time_msc=i)
+    history = ring.history()
+    for name, expected in reference_features(books, 10).items():
+        np.testing.assert_allclose(history[name], expected, err_msg=name)
+
+def test_ring_keeps_the_newest_snapshots():
+    books = random_books(100, seed=2)
+    ring = OrderBookRing(capacity=32, depth=5)
+    for i, book in enumerate(books):
+        ring.append(*book, time_msc=i)
+    assert len(ring) == 32
+    np.testing.assert_array_equal(ring.history()['time_msc'], np.arange(68, 100))
+    np.testing.assert_array_equal(ring.history(3)['time_msc'], [97, 98, 99])
+    # Features carry across the wrap: the last OFI still compares with snapshot 98
+    np.testing.assert_allclose(ring.history(1)['ofi'], reference_features(books, 5)['ofi'][-1:])
+
+    latest = ring.latest()
+    assert latest['time_msc'] == 99 and latest['bid'] == books[-1][0][0]
+
+def test_one_sided_and_shallow_books():
+    ring = OrderBookRing(depth=5)
+    ring.append([1.1], [3.0], [], [], time_msc=1)
+    latest = ring.latest()
+    assert np.isnan(latest['ask']) and np.isnan(latest['spread'])
+    assert latest['depth_imbalance'] == 1.0
+    assert np.isnan(ring.levels()['bid_price'][0, 1:]).all()
@@ -0,0 +1,88 @@
+import gc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.module_families import use_family
+
+# Same module family as the backtester: src/data_processor first
+use_family('src')
+
+from backtester import normalize_columns, run_vectorized_backtest
+from data_processor import process_data
+import parameter_sweep
+from parameter_sweep import parameter_grid, run_parameter_sweep
+from signal_generator import generate_signals
+
+GRID = {'sma_fast': [10, 20], 'sma_slow': [40, 60], 'exit_threshold': [0.01, 0.02]}
+
+def price_data(n=2000, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    return pd.DataFrame({
+        'Date': pd.date_range('2015-01-01', periods=n, freq='D'),
+        'Open': open_,
+        'High': np.maximum(open_, close) * 1.005,
+        'Low': np.minimum(open_, close) * 0.995,
+        'Close': close,
+        'Volume': rng.integers(100, 1000, n).astype(np.float64),
+    })
+
+def expected_capital(data, params):
+    df = process_data(data.copy(), sma_fast=params['sma_fast'], sma_slow=params['sma_slow'])
+    df = generate_signals(df.reset_index(drop=True), sma_fast=params['sma_fast'], sma_slow=params['sma_slow'],
+                          exit_threshold=params['exit_threshold'])
+    trades, capital = run_vectorized_backtest(df.set_index('Date', drop=False))
+    return len(trades), capital
+
+def test_sweep_runs_grid_end_to_end():
+    data = price_data()
+    results = run_parameter_sweep(data, GRID, max_workers=2)
+    assert len(results) == len(parameter_grid(GRID)) == 8
+    assert results['sharpe_ratio'].is_monotonic_decreasing
+
+    for row in results.to_dict('records'):
+        num_trades, capital = expected_capital(data, row)
+        assert row['num_trades'] == num_trades
+        assert np.isclose(row['final_capital'], capital, rtol=1e-12)
+    assert (results['num_trades'] > 0).all()
+
+def test_sweep_accepts_mt5_layout():
+    data = price_data(800)
+    expected = run_parameter_sweep(data, GRID, max_workers=1)
+    mt5_layout = data.rename(columns=str.lower).rename(columns={'date': 'time'})
+    results = run_parameter_sweep(mt5_layout, GRID, max_workers=1)
+    pd.testing.assert_frame_equal(results, expected)
+
+def test_unknown_parameter_is_rejected():
+    with pytest.raises(ValueError):
+        parameter_grid({'sma_fast': [10], 'stop_loss': [0.01]})
+
+def test_worker_frame_is_a_view_of_shared_memory():
+    data = price_data(800)
+    shm, columns, n = parameter_sweep._share_frame(normalize_columns(data))
+    block = np.ndarray((len(columns) + 1, n), dtype=np.float64, buffer=shm.buf)
+    before = block.copy()
+    try:
+        # What each pool worker does, run in this process
+        parameter_sweep._init_worker(shm.name, columns, n)
+        base = parameter_sweep._base_frame
+        mapped = np.frombuffer(parameter_sweep._shm.buf, dtype=np.uint8)
+        for column in columns:
+            assert np.shares_memory(base[column].to_numpy(), mapped)
+
+        params = {'sma_fast': 10, 'sma_slow': 40, 'exit_threshold': 0.01}
+        row = parameter_sweep._run_combination(params, 10000)
+        assert (row['num_trades'], row['final_capital']) == expected_capital(data, params)
+        np.testing.assert_array_equal(block, before)
+        assert list(parameter_sweep._base_frame.columns) == ['Date'] + columns
+    finally:
+        # The mapping can only be closed once no array views of it are left
+        block = base = mapped = parameter_sweep._base_frame = None
+        gc.collect()
+        parameter_sweep._shm.close()
+        parameter_sweep._shm = None
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.portfolio_risk import PortfolioRisk, RollingCovariance
+
+SYMBOLS = ['EURUSD', 'GBPUSD', 'USDJPY', 'XAUUSD']
+
+@pytest.fixture(scope='module')
+def returns():
+    rng = np.random.default_rng(0)
+    mixing = rng.normal(size=(len(SYMBOLS), len(SYMBOLS)))
+    return rng.normal(0, 0.001, (700, len(SYMBOLS))) @ mixing
+
+def fed(returns, **kwargs):
+    risk = PortfolioRisk(SYMBOLS, **kwargs)
+    for row in returns:
+        risk.update(row)
+    return risk
+
+def test_rolling_covariance_matches_np_cov(returns):
+    estimator = RollingCovariance(len(SYMBOLS), window=100)
+    for i, row in enumerate(returns):
+        estimator.update(row)
+        # Checks fall before, on and after the periodic re-sum
+        if i in (1, 50, 99, 100, 101, 250, 699):
+            window = returns[max(i + 1 - 100, 0):i + 1]
+            np.testing.assert_array_equal(estimator.observations(), window)
+            np.testing.assert_allclose(estimator.covariance(), np.cov(window, rowvar=False), rtol=1e-9, atol=1e-18)
+
+def test_ewm_covariance_matches_pandas(returns):
+    estimator = RollingCovariance(len(SYMBOLS), halflife=20)
+    for row in returns:
+        estimator.update(row)
+    expected = pd.DataFrame(returns).ewm(halflife=20, adjust=False).cov(bias=True).iloc[-len(SYMBOLS):]
+    np.testing.assert_allclose(estimator.covariance(), expected.to_numpy(), rtol=1e-9)
+    with pytest.raises(ValueError):
+        estimator.observations()
+
+def test_ledoit_wolf_matches_sklearn(returns):
+    covariance = pytest.importorskip('sklearn.covariance')
+    risk = fed(returns, window=200, shrinkage='ledoit_wolf')
+    np.testing.assert_allclose(risk.covariance(), covariance.ledoit_wolf(returns[-200:])[0], rtol=1e-9)
+
+def test_batched_exposures_match_one_at_a_time(returns):
+    risk = fed(returns, window=300)
+    batch = np.random.default_rng(1).normal(0, 1e5, (20, len(SYMBOLS)))
+    var, cvar = risk.historical_var_cvar(batch)
+    for i, w in enumerate(batch):
+        assert risk.var(batch)[i] == pytest.approx(risk.var(w))
+        assert risk.cvar(batch)[i] == pytest.approx(risk.cvar(w))
+        assert (var[i], cvar[i]) == pytest.approx(risk.historical_var_cvar(w))
+
+    # Parametric VaR against the textbook formula
+    cov = np.cov(returns[-300:], rowvar=False)
+    assert risk.var(batch[0]) == pytest.approx(risk.z * np.sqrt(batch[0] @ cov @ batch[0]))
+
+    pnl = returns[-300:] @ batch[0]
+    expected_var = -np.percentile(pnl, 5)
+    assert var[0] == pytest.approx(expected_var)
+    assert cvar[0] == pytest.approx(-pnl[pnl <= -expected_var].mean())
+
+def test_component_var_sums_to_var(returns):
+    risk = fed(returns)
+    exposures = {'EURUSD': 2e5, 'XAUUSD': -5e4}
+    contributions = risk.contributions(exposures)
+    assert contributions['component'].sum() == pytest.approx(contributions['var'])
+    assert contributions['var'] == pytest.approx(risk.var(exposures))
+    assert contributions['component'][1] == 0.0
+
+def test_max_order_reaches_the_limit(returns):
+    risk = fed(returns)
+    exposures = risk.vector({'EURUSD': 1e5})
+    limit = 2 * risk.var(exposures)
+    for side in (1, -1):
+        size = risk.max_order(exposures, 'GBPUSD', limit, side)
+        order = risk.vector({'GBPUSD': side * size})
+        assert risk.var(exposures + order) == pytest.approx(limit)
+        ok, _ = risk.check_orders(exposures, np.stack([order * 0.99, order * 1.01]), limit)
+        assert ok.tolist() == [True, False]
+    assert risk.max_order(exposures, 'GBPUSD', risk.var(exposures) / 2) == 0.0
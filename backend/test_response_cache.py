@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from backend.response_cache import ResponseCache, next_bar_close
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def test_concurrent_misses_share_one_load():
+    async def main():
+        cache = ResponseCache(clock=Clock())
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'bars'
+
+        results = await asyncio.gather(*(cache.get_or_load('EURUSD', loader, 2000) for _ in range(5)))
+        return cache, calls, results
+
+    cache, calls, results = asyncio.run(main())
+    assert results == ['bars'] * 5
+    assert len(calls) == 1
+    assert cache.stats() == {'entries': 1, 'hits': 4, 'misses': 1}
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def main():
+        cache = ResponseCache(clock=Clock())
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            return 'bars'
+
+        leader = asyncio.create_task(cache.get_or_load('EURUSD', loader, 2000))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_load('EURUSD', loader, 2000))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return cache, leader, await asyncio.wait_for(follower, 1)
+
+    cache, leader, value = asyncio.run(main())
+    assert leader.cancelled()
+    assert value == 'bars'
+    # The load finished for the follower and was cached
+    assert cache.get('EURUSD') == 'bars'
+
+def test_loader_errors_reach_every_caller_and_are_not_cached():
+    async def main():
+        cache = ResponseCache(clock=Clock())
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("terminal disconnected")
+
+        results = await asyncio.gather(*(cache.get_or_load('EURUSD', failing, 2000) for _ in range(3)),
+                                       return_exceptions=True)
+
+        async def loader():
+            return 'bars'
+        return results, await cache.get_or_load('EURUSD', loader, 2000)
+
+    results, value = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert value == 'bars'
+
+def test_entries_expire_and_are_evicted_lru():
+    clock = Clock()
+    cache = ResponseCache(max_entries=2, clock=clock)
+    cache.set('a', 1, 1010)
+    cache.set('b', 2, 1010)
+    assert cache.get('a') == 1
+    cache.set('c', 3, 1010)
+    assert cache.get('b') is None and cache.get('a') == 1
+
+    clock.now = 1010
+    assert cache.get('a') is None
+
+def test_next_bar_close():
+    assert next_bar_close('M5', now=1000) == 1200
+    assert next_bar_close('H1', now=3600) == 7200
+    # Unknown timeframes fall back to M5
+    assert next_bar_close('W1', now=1000) == 1200
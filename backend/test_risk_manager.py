@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+import pytest
+
+from backend.module_families import use_family
+
+use_family('backend')
+
+from risk_manager import RiskManager, RollingRiskState
+
+def assert_metrics_close(actual, expected):
+    for name in ('var_95', 'cvar_95', 'volatility', 'sharpe_ratio', 'max_drawdown', 'kelly_fraction'):
+        assert getattr(actual, name) == pytest.approx(getattr(expected, name), rel=1e-9, abs=1e-12), name
+    assert actual.risk_level == expected.risk_level
+
+def test_rolling_state_matches_calculate_metrics():
+    returns = np.random.default_rng(0).normal(0.0005, 0.01, 700)
+    manager = RiskManager()
+    state = RollingRiskState(window=100)
+    for i, r in enumerate(returns):
+        state.update(r)
+        if i >= 20 and i % 7 == 0:
+            window = returns[max(i + 1 - 100, 0):i + 1]
+            assert_metrics_close(state.metrics(), manager.calculate_metrics(window))
+
+def test_run_drawdown_covers_the_whole_run():
+    returns = np.array([0.1, -0.5, 0.2, 0.2, 0.2])
+    state = RollingRiskState(window=2)
+    for r in returns:
+        state.update(r)
+    equity = np.cumprod(1 + returns)
+    assert state.equity == pytest.approx(equity[-1])
+    assert state.current_drawdown == pytest.approx(1 - equity[-1] / equity.max())
+
+@pytest.mark.parametrize('ruin', [-1.0, -1.5])
+def test_ruin_is_recorded_instead_of_raising(ruin):
+    returns = np.random.default_rng(1).normal(0.0, 0.01, 60)
+    returns[30] = ruin
+    state = RollingRiskState(window=20)
+    for i, r in enumerate(returns):
+        state.update(r)
+        drawdown = state.max_drawdown()
+        if 30 <= i < 50:
+            assert drawdown == 1.0
+        elif i >= 50:
+            # The ruinous return left the window: back to calculate_metrics
+            expected = RiskManager().calculate_metrics(returns[i + 1 - 20:i + 1]).max_drawdown
+            assert drawdown == pytest.approx(expected)
+        assert not math.isnan(drawdown)
+    assert state.equity == 0.0 and state.current_drawdown == 1.0
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.module_families import use_family
+
+use_family('backend')
+
+from data_processor import DataProcessor
+from ml_model import TradingLSTM
+from sequence_builder import build_sequences, iter_sequence_batches
+
+def loop_sequences(values, sequence_length):
+    """
+    The original list-of-slices construction
+    """
+    X, y = [], []
+    for i in range(sequence_length, len(values)):
+        X.append(values[i-sequence_length:i])
+        y.append(values[i, 0])
+    return np.array(X), np.array(y)
+
+def test_build_sequences_matches_loop():
+    values = np.random.default_rng(0).normal(size=(300, 6))
+    for sequence_length in (1, 10, 60, 299):
+        expected, _ = loop_sequences(values, sequence_length)
+        windows = build_sequences(values, sequence_length)
+        np.testing.assert_array_equal(windows, expected)
+        # A view over values, not a copy
+        assert np.shares_memory(windows, values)
+
+    assert build_sequences(values, 300).shape == (0, 300, 6)
+    assert build_sequences(values[:, 0], 5).shape == (295, 5, 1)
+
+def test_iter_sequence_batches_covers_every_window():
+    values = np.random.default_rng(1).normal(size=(250, 3))
+    expected_X, expected_y = loop_sequences(values, 20)
+    targets = values[20:, 0]
+
+    batches = list(iter_sequence_batches(values, targets, 20, batch_size=32))
+    np.testing.assert_array_equal(np.concatenate([X for X, _ in batches]), expected_X)
+    np.testing.assert_array_equal(np.concatenate([y for _, y in batches]), expected_y)
+
+    shuffled = list(iter_sequence_batches(values, targets, 20, batch_size=32, shuffle=True, seed=3))
+    X = np.concatenate([X for X, _ in shuffled])
+    y = np.concatenate([y for _, y in shuffled])
+    order = np.argsort(y)
+    np.testing.assert_array_equal(X[order], expected_X[np.argsort(expected_y)])
+
+def test_trading_lstm_prepare_data_matches_loop():
+    pytest.importorskip('sklearn')
+    data = np.random.default_rng(2).normal(size=(200, 6))
+    lstm = TradingLSTM(sequence_length=30)
+    X, y = lstm.prepare_data(data)
+    expected_X, expected_y = loop_sequences(lstm.scaler.transform(data), 30)
+    np.testing.assert_allclose(X, expected_X)
+    np.testing.assert_allclose(y, expected_y)
+
+def test_prepare_model_data_matches_loop():
+    pytest.importorskip('talib')
+    rng = np.random.default_rng(4)
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 1e-3, 400)))
+    df = pd.DataFrame({'open': close, 'high': close * 1.001, 'low': close * 0.999, 'close': close,
+                       'volume': rng.integers(1, 500, 400).astype(np.float64)})
+    processor = DataProcessor()
+    indicators = processor.calculate_indicators(df)
+    sequences, targets = processor.prepare_model_data(df, indicators, sequence_length=60)
+
+    feature_data = processor.feature_frame(df, indicators)
+    expected = [feature_data.iloc[i:i+60].values for i in range(len(feature_data) - 60)]
+    np.testing.assert_array_equal(sequences, np.array(expected))
+    np.testing.assert_array_equal(targets, feature_data['close'].iloc[60:].to_numpy())
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from backend.module_families import use_family
+
+# generate_signals runs on src/data_processor output (CSV layout)
+use_family('src')
+
+from data_processor import process_data
+from signal_generator import find_first_crossing, generate_signals
+
+def price_data(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 1.5e-3, n)))
+    open_ = np.concatenate([[1.1], close[:-1]])
+    return pd.DataFrame({
+        'Date': pd.date_range('2020-01-01', periods=n, freq='h'),
+        'Open': open_,
+        'High': np.maximum(open_, close) + np.abs(rng.normal(0, 1e-3, n)),
+        'Low': np.minimum(open_, close) - np.abs(rng.normal(0, 1e-3, n)),
+        'Close': close,
+        'Volume': rng.integers(1, 500, n).astype(np.float64),
+    })
+
+def baseline_generate_signals(df):
+    """
+    The original generate_signals: a forward scan from every entry
+    """
+    df['Signal'] = 0
+    df['Signal'] = np.where(df['SMA_20'] > df['SMA_50'], 1, 0)
+    df['Signal'] = df['Signal'].diff()
+
+    df.loc[(df['Signal'] == 1) & (df['RSI'] > 70), 'Signal'] = 0
+    df.loc[(df['Signal'] == -1) & (df['RSI'] < 30), 'Signal'] = 0
+
+    exit_threshold = 0.01
+    for i in range(len(df)):
+        if df['Signal'].iloc[i] == 1:
+            entry_price = df['Close'].iloc[i]
+            exit_price = entry_price * (1 + exit_threshold)
+            for j in range(i + 1, len(df)):
+                if df['High'].iloc[j] >= exit_price:
+                    df.loc[j, 'Signal'] = -1
+                    break
+
+    min_distance = 0.0010
+    for i in range(1, len(df)):
+        if df['Signal'].iloc[i] != 0:
+            if abs(df['Close'].iloc[i] - df['Close'].iloc[i-1]) < min_distance:
+                df.loc[i, 'Signal'] = 0
+    return df
+
+def scan_first_crossing(values, starts, levels):
+    result = []
+    for start, level in zip(starts, levels):
+        hits = [j for j in range(start, len(values)) if values[j] >= level]
+        result.append(hits[0] if hits else -1)
+    return np.array(result, dtype=np.int64)
+
+def test_find_first_crossing_matches_scan():
+    rng = np.random.default_rng(1)
+    for n in (1, 2, 7, 64, 65, 500):
+        values = rng.normal(0, 1, n).cumsum()
+        values[rng.random(n) < 0.05] = np.nan
+        starts = rng.integers(0, n + 1, 200)
+        levels = np.nan_to_num(values, nan=0.0)[np.minimum(starts, n - 1)] + rng.normal(0, 2, 200)
+        expected = scan_first_crossing(np.where(np.isnan(values), -np.inf, values), starts, levels)
+        np.testing.assert_array_equal(find_first_crossing(values, starts, levels), expected)
+
+    assert len(find_first_crossing(np.array([]), [], [])) == 0
+    np.testing.assert_array_equal(find_first_crossing(np.array([]), [0], [1.0]), [-1])
+
+def test_generate_signals_matches_baseline():
+    for seed in range(3):
+        df = process_data(price_data(seed=seed))
+        expected = baseline_generate_signals(df.copy())['Signal'].to_numpy(dtype=np.float64)
+        signal = generate_signals(df.copy())['Signal'].to_numpy(dtype=np.float64)
+        np.testing.assert_array_equal(signal, expected)
+        assert (expected == 1).any() and (expected == -1).any()
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from backend.benchmarks import synthetic_ticks
+from backend.tick_aggregator import BarRing, TickAggregator, aggregate_ticks
+
+BAR_SPECS = [('time', 1), ('time', 5), ('time', 0.25), ('tick', 1), ('tick', 7), ('volume', 25), ('volume', 3.5)]
+
+@pytest.fixture(scope='module')
+def ticks():
+    return synthetic_ticks(5000, start_msc=1_700_000_000_123)
+
+def stream(ticks, kind, size, chunks=1, **kwargs):
+    aggregator = TickAggregator(kind, size, capacity=len(ticks), **kwargs)
+    for chunk in np.array_split(ticks, chunks):
+        aggregator.update_many(chunk)
+    return aggregator
+
+@pytest.mark.parametrize('kind,size', BAR_SPECS)
+def test_streaming_matches_batch(ticks, kind, size):
+    aggregator = stream(ticks, kind, size, chunks=7)
+    # Only closed bars so far: the batch version without its trailing bar
+    np.testing.assert_array_equal(aggregator.bars.last(), aggregate_ticks(ticks, kind, size, include_last=False))
+
+    aggregator.flush()
+    np.testing.assert_array_equal(aggregator.bars.last(), aggregate_ticks(ticks, kind, size))
+
+def test_time_bars_close_on_flush_after_their_bucket(ticks):
+    aggregator = stream(ticks, 'time', 5)
+    end = aggregator.current['time_msc'] + 5000
+    assert not aggregator.flush(end - 1)
+    assert aggregator.flush(end)
+    assert aggregator.current is None
+
+def test_on_bar_sees_every_closed_bar(ticks):
+    seen = []
+    aggregator = stream(ticks, 'tick', 50, on_bar=lambda bar, snapshot: seen.append(bar))
+    np.testing.assert_array_equal(np.array(seen), aggregator.bars.last())
+    assert len(seen) == len(ticks) // 50
+
+def test_bar_ring_keeps_the_newest_bars(ticks):
+    bars = aggregate_ticks(ticks, 'tick', 10)
+    ring = BarRing(capacity=64)
+    for bar in bars:
+        ring.append(*bar.tolist())
+    assert len(ring) == 64
+    np.testing.assert_array_equal(ring.last(), bars[-64:])
+    np.testing.assert_array_equal(ring.last(5), bars[-5:])
+
+def test_invalid_bar_specs():
+    with pytest.raises(ValueError):
+        TickAggregator('range', 5)
+    with pytest.raises(ValueError):
+        aggregate_ticks(synthetic_ticks(10), 'tick', 0)
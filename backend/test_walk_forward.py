@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.benchmarks import synthetic_ohlcv
+from backend.module_families import use_family
+
+use_family('backend')
+
+pytest.importorskip('talib')
+pytest.importorskip('sklearn')
+
+import walk_forward
+from data_processor import DataProcessor
+from walk_forward import FeatureCache, fold_arrays, walk_forward_folds
+
+@pytest.fixture(scope='module')
+def ohlcv():
+    return synthetic_ohlcv(600, seed=3)
+
+def test_feature_cache_computes_once_per_dataset(tmp_path, ohlcv, monkeypatch):
+    cache = FeatureCache(str(tmp_path))
+    path = cache.load_or_compute(ohlcv)
+    processor = DataProcessor()
+    expected = processor.feature_frame(ohlcv, processor.calculate_indicators(ohlcv)).to_numpy()
+    np.testing.assert_array_equal(cache.load(path), expected)
+
+    def fail(self, df):
+        raise AssertionError("cache hit recomputed the indicators")
+    monkeypatch.setattr(walk_forward.DataProcessor, 'calculate_indicators', fail)
+    assert cache.load_or_compute(ohlcv.copy()) == path
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+def test_feature_cache_key_follows_data_and_params(ohlcv, monkeypatch):
+    key = FeatureCache.key(ohlcv)
+    changed = ohlcv.copy()
+    changed.loc[10, 'close'] += 1e-5
+    assert FeatureCache.key(changed) != key
+    assert FeatureCache.key(ohlcv.iloc[1:]) != key
+
+    monkeypatch.setitem(walk_forward.INDICATOR_PARAMS, 'rsi', {'timeperiod': 21})
+    assert FeatureCache.key(ohlcv) != key
+
+def test_walk_forward_folds():
+    rolling = walk_forward_folds(100, train_size=40, test_size=20)
+    assert [(f.train_start, f.train_end, f.test_start, f.test_end) for f in rolling] == \
+        [(0, 40, 40, 60), (20, 60, 60, 80), (40, 80, 80, 100)]
+
+    expanding = walk_forward_folds(100, train_size=40, test_size=20, step=10, expanding=True, max_folds=2)
+    assert [(f.index, f.train_start, f.train_end, f.test_end) for f in expanding] == [(3, 0, 70, 90), (4, 0, 80, 100)]
+    assert walk_forward_folds(50, train_size=40, test_size=20) == []
+
+def test_fold_arrays_scale_on_train_rows_only():
+    features = np.random.default_rng(0).normal(size=(200, 5)).cumsum(axis=0)
+    fold = walk_forward_folds(200, train_size=100, test_size=50)[1]
+    X_train, y_train, X_test, y_test, scaler = fold_arrays(features, fold, sequence_length=10)
+
+    train = features[fold.train_start:fold.train_end]
+    np.testing.assert_allclose(scaler.data_min_, train.min(axis=0))
+    np.testing.assert_allclose(scaler.data_max_, train.max(axis=0))
+
+    scaled = (features - scaler.data_min_) / scaler.data_range_
+    assert len(X_train) == len(y_train) == 90
+    np.testing.assert_allclose(X_train[0], scaled[fold.train_start:fold.train_start + 10])
+    # One target per test row, each with the 10 rows before it as context
+    assert len(X_test) == len(y_test) == fold.test_end - fold.test_start
+    np.testing.assert_allclose(y_test, scaled[fold.test_start:fold.test_end, 0])
+    for i in (0, 25, 49):
+        row = fold.test_start + i
+        np.testing.assert_allclose(X_test[i], scaled[row - 10:row])
@@ -0,0 +1,240 @@
+import logging
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+from backend.indicator_state import IndicatorState, IndicatorSnapshot
+
+logger = logging.getLogger(__name__)
+
+BAR_DTYPE = np.dtype([
+    ('time_msc', '<i8'),    # bar start: bucket start for time bars, first tick otherwise
+    ('end_msc', '<i8'),     # last tick in the bar
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('tick_volume', '<i8'),
+    ('volume', '<f8'),
+])
+
+BAR_KINDS = ('time', 'tick', 'volume')
+
+OnBar = Callable[[np.void, Optional[IndicatorSnapshot]], None]
+
+class BarRing:
+    """
+    Fixed-capacity ring of closed bars in one preallocated structured array
+    """
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._bars = np.zeros(capacity, dtype=BAR_DTYPE)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, time_msc: int, end_msc: int, open: float, high: float, low: float,
+               close: float, tick_volume: int, volume: float):
+        self._bars[self._next] = (time_msc, end_msc, open, high, low, close, tick_volume, volume)
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def last(self, count: Optional[int] = None) -> np.ndarray:
+        """
+        Copy of the newest `count` bars (all by default), oldest first
+        """
+        count = self._count if count is None else min(count, self._count)
+        start = (self._next - count) % self.capacity
+        if start + count <= self.capacity:
+            return self._bars[start:start + count].copy()
+        return np.concatenate([self._bars[start:], self._bars[:self._next]])
+
+    def to_frame(self, count: Optional[int] = None) -> pd.DataFrame:
+        return bars_to_frame(self.last(count))
+
+def bars_to_frame(bars: np.ndarray) -> pd.DataFrame:
+    """
+    Bars as a DataFrame shaped like MarketDataFetcher.fetch_ohlcv output
+    """
+    df = pd.DataFrame(bars)
+    df['time'] = pd.to_datetime(df.pop('time_msc'), unit='ms')
+    df['end_msc'] = pd.to_datetime(df['end_msc'], unit='ms')
+    return df[['time', 'open', 'high', 'low', 'close', 'tick_volume', 'volume', 'end_msc']]
+
+def _bar_size(kind: str, size: float) -> float:
+    if kind not in BAR_KINDS:
+        raise ValueError(f"Unknown bar kind {kind!r}; expected one of {BAR_KINDS}")
+    if size <= 0:
+        raise ValueError("Bar size must be positive")
+    # Time bars are given in seconds and bucketed in milliseconds
+    return int(size * 1000) if kind == 'time' else size
+
+class TickAggregator:
+    """
+    Streaming tick -> bar builder for sub-minute timeframes.
+
+    kind='time' makes bars of `size` seconds (aligned to the epoch), 'tick'
+    bars of `size` ticks and 'volume' bars of `size` traded volume. Every tick
+    is assigned a bar key (time bucket, tick count // size, or volume traded
+    before it // size) and a bar closes when the key changes, so each update
+    is O(1) and aggregate_ticks() can rebuild the same bars in batch.
+
+    Tick and volume bars close as soon as they are full; time bars close on
+    the first tick of the next bucket or on flush(now_msc). Closed bars go to
+    a BarRing, to the optional IndicatorState and to on_bar(bar, snapshot).
+    """
+    def __init__(self,
+                 kind: str = 'time',
+                 size: float = 5,
+                 capacity: int = 10000,
+                 indicators: Optional[IndicatorState] = None,
+                 on_bar: Optional[OnBar] = None):
+        self.kind = kind
+        self.size = _bar_size(kind, size)
+        self.bars = BarRing(capacity)
+        self.indicators = indicators
+        self.on_bar = on_bar
+        self.last_snapshot: Optional[IndicatorSnapshot] = None
+        self._ticks = 0
+        self._traded = 0.0
+        self._key = None
+        self._open = self._high = self._low = self._close = 0.0
+        self._start = self._end = 0
+        self._count = 0
+        self._volume = 0.0
+
+    def _key_of(self, time_msc: int):
+        if self.kind == 'time':
+            return time_msc // self.size
+        if self.kind == 'tick':
+            return self._ticks // self.size
+        return self._traded // self.size
+
+    def update(self, time_msc: int, price: float, volume: float = 0.0) -> bool:
+        """
+        Add one tick; returns True when it closed a bar
+        """
+        key = self._key_of(time_msc)
+        closed = False
+        if self._key is not None and key != self._key:
+            self._close_bar()
+            closed = True
+
+        if self._key is None:
+            self._key = key
+            self._start = key * self.size if self.kind == 'time' else time_msc
+            self._open = self._high = self._low = price
+            self._count = 0
+            self._volume = 0.0
+        elif price > self._high:
+            self._high = price
+        elif price < self._low:
+            self._low = price
+        self._close = price
+        self._end = time_msc
+        self._count += 1
+        self._volume += volume
+        self._ticks += 1
+        self._traded += volume
+
+        # A full tick/volume bar can close now instead of waiting for the next tick
+        if self.kind != 'time' and self._key_of(time_msc) != self._key:
+            self._close_bar()
+            closed = True
+        return closed
+
+    def update_many(self, ticks: np.ndarray, price: str = 'bid', volume: str = 'volume') -> int:
+        """
+        Feed an MT5 ticks array (copy_ticks_*); returns the number of bars closed
+        """
+        volumes = ticks[volume] if volume in ticks.dtype.names else np.zeros(len(ticks))
+        closed = 0
+        for time_msc, p, v in zip(ticks['time_msc'].tolist(), ticks[price].tolist(), volumes.tolist()):
+            closed += self.update(time_msc, p, v)
+        return closed
+
+    def flush(self, now_msc: Optional[int] = None) -> bool:
+        """
+        Close the forming bar: always when now_msc is None, otherwise only if
+        now_msc is past the end of its time bucket
+        """
+        if self._key is None:
+            return False
+        if now_msc is not None and (self.kind != 'time' or now_msc // self.size == self._key):
+            return False
+        self._close_bar()
+        return True
+
+    @property
+    def current(self) -> Optional[dict]:
+        """
+        The forming bar, or None between bars
+        """
+        if self._key is None:
+            return None
+        return {'time_msc': self._start, 'end_msc': self._end, 'open': self._open, 'high': self._high,
+                'low': self._low, 'close': self._close, 'tick_volume': self._count, 'volume': self._volume}
+
+    def _close_bar(self):
+        self.bars.append(self._start, self._end, self._open, self._high, self._low,
+                         self._close, self._count, self._volume)
+        self._key = None
+        snapshot = None
+        if self.indicators is not None:
+            snapshot = self.last_snapshot = self.indicators.update(
+                open=self._open, high=self._high, low=self._low, close=self._close, volume=self._volume
+            )
+        if self.on_bar is not None:
+            try:
+                self.on_bar(self.bars.last(1)[0], snapshot)
+            except Exception as e:
+                logger.error(f"on_bar callback failed: {str(e)}")
+
+def aggregate_ticks(ticks: np.ndarray, kind: str = 'time', size: float = 5,
+                    price: str = 'bid', volume: str = 'volume', include_last: bool = True) -> np.ndarray:
+    """
+    Batch version of TickAggregator for stored ticks: same bar keys, with the
+    OHLC/volume reductions done by np.*.reduceat over the bar boundaries.
+    With include_last=False the trailing (possibly incomplete) bar is dropped.
+    """
+    size = _bar_size(kind, size)
+    n = len(ticks)
+    if not n:
+        return np.zeros(0, dtype=BAR_DTYPE)
+
+    times = ticks['time_msc'].astype(np.int64)
+    prices = ticks[price].astype(np.float64)
+    volumes = ticks[volume].astype(np.float64) if volume in ticks.dtype.names else np.zeros(n)
+
+    if kind == 'time':
+        keys = times // size
+    elif kind == 'tick':
+        keys = np.arange(n) // size
+    else:
+        traded_before = np.concatenate([[0.0], np.cumsum(volumes)[:-1]])
+        keys = traded_before // size
+
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    ends = np.concatenate([starts[1:], [n]]) - 1
+
+    bars = np.zeros(len(starts), dtype=BAR_DTYPE)
+    bars['time_msc'] = keys[starts] * size if kind == 'time' else times[starts]
+    bars['end_msc'] = times[ends]
+    bars['open'] = prices[starts]
+    bars['high'] = np.maximum.reduceat(prices, starts)
+    bars['low'] = np.minimum.reduceat(prices, starts)
+    bars['close'] = prices[ends]
+    bars['tick_volume'] = ends - starts + 1
+    bars['volume'] = np.add.reduceat(volumes, starts)
+
+    if not include_last and kind != 'time':
+        # Tick/volume bars are complete when the next key was reached
+        last_full = (kind == 'tick' and bars['tick_volume'][-1] == size) or \
+                    (kind == 'volume' and (traded_before[-1] + volumes[-1]) // size != keys[-1])
+        if not last_full:
+            bars = bars[:-1]
+    elif not include_last:
+        bars = bars[:-1]
+    return bars
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+from data_processor import DataProcessor
+from indicator_state import INDICATOR_PARAMS
+from sequence_builder import build_sequences
+
+# Bump when DataProcessor.feature_frame changes, so old cache entries are not reused
+FEATURE_VERSION = 1
+
+@dataclass
+class Fold:
+    index: int
+    train_start: int
+    train_end: int
+    test_start: int
+    test_end: int
+
+class FeatureCache:
+    """
+    On-disk cache of LSTM feature matrices (DataProcessor.feature_frame) as .npy files.
+
+    Entries are keyed by a hash of the OHLCV data and INDICATOR_PARAMS, so
+    experiments on the same data reuse the talib output and any change to the
+    data or the indicator settings computes a new entry. Cached matrices are
+    opened memory-mapped, which lets parallel fold workers share one copy
+    through the page cache.
+    """
+    def __init__(self, root: str = 'feature_cache'):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(df: pd.DataFrame) -> str:
+        digest = hashlib.sha256()
+        rows = pd.util.hash_pandas_object(df[DataProcessor().required_columns], index=True)
+        digest.update(rows.to_numpy().tobytes())
+        digest.update(json.dumps({'params': INDICATOR_PARAMS, 'version': FEATURE_VERSION}, sort_keys=True).encode())
+        return digest.hexdigest()[:32]
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, f'{key}.npy')
+
+    def load_or_compute(self, df: pd.DataFrame) -> str:
+        """
+        Path of the cached feature matrix for df, computing it on a miss
+        """
+        path = self.path(self.key(df))
+        if os.path.exists(path):
+            return path
+
+        processor = DataProcessor()
+        indicators = processor.calculate_indicators(df)
+        if indicators is None:
+            raise ValueError("Failed to calculate indicators")
+        features = processor.feature_frame(df, indicators).to_numpy(dtype=np.float64)
+
+        tmp_path = path + f'.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, features)
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, path: str) -> np.ndarray:
+        return np.load(path, mmap_mode='r')
+
+def walk_forward_folds(n_rows: int, train_size: int, test_size: int,
+                       step: Optional[int] = None, expanding: bool = False,
+                       max_folds: Optional[int] = None) -> List[Fold]:
+    """
+    Consecutive train/test windows over n_rows, advancing by step (default
+    test_size). With expanding=True every train window starts at row 0.
+    """
+    step = step or test_size
+    folds = []
+    start = 0
+    while start + train_size + test_size <= n_rows:
+        train_start = 0 if expanding else start
+        train_end = start + train_size
+        folds.append(Fold(len(folds), train_start, train_end, train_end, train_end + test_size))
+        start += step
+    return folds[-max_folds:] if max_folds else folds
+
+def fold_arrays(features: np.ndarray, fold: Fold, sequence_length: int):
+    """
+    Scaled sequences for one fold. The scaler is fitted on the training rows
+    only; test sequences may look back into the training rows for context
+    but their targets all lie in the test window.
+    """
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    train = scaler.fit_transform(features[fold.train_start:fold.train_end])
+    context_start = max(fold.test_start - sequence_length, 0)
+    test = scaler.transform(features[context_start:fold.test_end])
+
+    X_train = build_sequences(train, sequence_length)
+    y_train = train[sequence_length:, 0]
+    X_test = build_sequences(test, sequence_length)
+    y_test = test[sequence_length:, 0]
+    return X_train, y_train, X_test, y_test, scaler
+
+def _run_fold(args) -> Dict:
+    cache_path, fold, sequence_length, train_kwargs, model_dir = args
+    # TensorFlow is only needed (and imported) in the workers
+    from ml_model import TradingLSTM
+
+    features = np.load(cache_path, mmap_mode='r')
+    X_train, y_train, X_test, y_test, scaler = fold_arrays(features, fold, sequence_length)
+
+    lstm = TradingLSTM(sequence_length=sequence_length, n_features=features.shape[1])
+    lstm.scaler = scaler
+    lstm.build_model()
+    checkpoint_dir = model_dir or os.path.dirname(cache_path)
+    history = lstm.train(X_train, y_train,
+                         checkpoint_path=os.path.join(checkpoint_dir, f'fold_{fold.index}_best.h5'),
+                         verbose=0, **train_kwargs)
+
+    # The target is column 0 of the fold's feature scaler
+    scale, offset = scaler.data_range_[0], scaler.data_min_[0]
+    predicted = lstm.model.predict(X_test, verbose=0).reshape(-1) * scale + offset
+    actual = y_test * scale + offset
+    previous = np.concatenate([[features[fold.test_start - 1, 0]], actual[:-1]])
+
+    if model_dir:
+        lstm.save(os.path.join(model_dir, f'fold_{fold.index}_model'),
+                  os.path.join(model_dir, f'fold_{fold.index}_scaler.pkl'))
+
+    result = asdict(fold)
+    result.update({
+        'epochs': len(history.history['loss']),
+        'train_loss': float(history.history['loss'][-1]),
+        'val_loss': float(history.history['val_loss'][-1]) if 'val_loss' in history.history else np.nan,
+        'test_mse': float(np.mean((predicted - actual) ** 2)),
+        'test_mae': float(np.mean(np.abs(predicted - actual))),
+        'direction_accuracy': float(np.mean(np.sign(predicted - previous) == np.sign(actual - previous))),
+    })
+    return result
+
+def run_walk_forward(df: pd.DataFrame,
+                     train_size: int,
+                     test_size: int,
+                     step: Optional[int] = None,
+                     expanding: bool = False,
+                     max_folds: Optional[int] = None,
+                     sequence_length: int = 60,
+                     epochs: int = 100,
+                     batch_size: int = 32,
+                     validation_split: float = 0.2,
+                     cache_dir: str = 'feature_cache',
+                     model_dir: Optional[str] = None,
+                     max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Walk-forward evaluation of TradingLSTM on an OHLCV DataFrame.
+
+    Features are computed once (or loaded from the FeatureCache) and every
+    fold trains a fresh model on its own train window with its own scaler,
+    then scores the following test window. train_size/test_size/step count
+    feature rows, i.e. bars after the indicator warm-up. Folds run in a
+    process pool; pass model_dir to keep each fold's model and scaler.
+    Returns one row of metrics per fold.
+    """
+    cache = FeatureCache(cache_dir)
+    cache_path = cache.load_or_compute(df)
+    n_rows = cache.load(cache_path).shape[0]
+
+    folds = walk_forward_folds(n_rows, train_size, test_size, step, expanding, max_folds)
+    if not folds:
+        raise ValueError(f"Not enough rows ({n_rows}) for train_size={train_size} and test_size={test_size}")
+    if train_size <= sequence_length:
+        raise ValueError("train_size must be larger than sequence_length")
+    if model_dir:
+        os.makedirs(model_dir, exist_ok=True)
+
+    train_kwargs = {'epochs': epochs, 'batch_size': batch_size, 'validation_split': validation_split}
+    tasks = [(cache_path, fold, sequence_length, train_kwargs, model_dir) for fold in folds]
+    if max_workers == 1:
+        results = [_run_fold(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_run_fold, tasks))
+
+    return pd.DataFrame(results).set_index('index')
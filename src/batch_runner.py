@@ -0,0 +1,176 @@
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+from data_processor import process_data
+from signal_generator import generate_signals, SignalCarry
+from chart_generator import create_chart, ChartAccumulator
+from performance_analyzer import analyze_performance, PerformanceAccumulator
+from bar_store import BarSeries
+
+# Explicit dtypes: pandas does not have to infer them, and floats stay float64
+CSV_DTYPES = {'Open': 'float64', 'High': 'float64', 'Low': 'float64', 'Close': 'float64', 'Volume': 'float64'}
+CSV_COLUMNS = ('Date',) + tuple(CSV_DTYPES)
+
+CHUNK_ROWS = 1_000_000
+# Files up to this size are processed in one pass
+IN_MEMORY_BYTES = 256 * 2**20
+
+# Rows of the previous chunk kept as context: the longest rolling window
+# in process_data (RSI needs one extra row for its diff) plus the row
+# before the chunk for the crossover diff
+OVERLAP_ROWS = max(20, 50, 14 + 1) + 1
+
+def read_csv_typed(path, chunk_rows=None):
+    return pd.read_csv(path, usecols=lambda c: c in CSV_COLUMNS, dtype=CSV_DTYPES,
+                       parse_dates=['Date'], chunksize=chunk_rows)
+
+def read_prices(path, chunk_rows=None):
+    """
+    A CSV export or a bar store file (.bars) in the CSV layout; with chunk_rows,
+    an iterator of consecutive chunks
+    """
+    if path.endswith('.bars'):
+        series = BarSeries(path, readonly=True)
+        return series.to_frame(csv=True) if chunk_rows is None else series.iter_frames(chunk_rows, csv=True)
+    return read_csv_typed(path, chunk_rows)
+
+def process_file_in_memory(path, chart_file=None):
+    df = read_prices(path)
+    df = process_data(df)
+    df = generate_signals(df)
+    performance_metrics = analyze_performance(df)
+
+    if chart_file:
+        create_chart(df, performance_metrics, chart_file)
+    return performance_metrics, len(df), 1
+
+def process_file_chunked(path, chunk_rows=CHUNK_ROWS, chart_file=None):
+    """
+    Same results as the single-pass pipeline with memory bounded by chunk_rows.
+
+    Each chunk is processed together with the last OVERLAP_ROWS raw rows of
+    the previous one, so rolling indicators and the crossover see the same
+    history; entries still waiting for their exit move to the next chunk in
+    a SignalCarry, and performance and the chart are accumulated
+    incrementally. The file must already be sorted by Date.
+    """
+    carry = SignalCarry()
+    performance = PerformanceAccumulator()
+    chart = ChartAccumulator() if chart_file else None
+    tail = None
+    rows = chunks = 0
+
+    for chunk in read_prices(path, chunk_rows):
+        dates = chunk['Date']
+        if not dates.is_monotonic_increasing or (tail is not None and dates.iloc[0] < tail['Date'].iloc[-1]):
+            raise ValueError("File is not sorted by Date; chunked processing needs sorted input")
+
+        raw_columns = list(chunk.columns)
+        start = 0 if tail is None else len(tail)
+        frame = chunk if tail is None else pd.concat([tail, chunk], ignore_index=True)
+        # From the joined frame: a chunk shorter than the overlap keeps older context too
+        tail = frame[raw_columns].iloc[-OVERLAP_ROWS:].reset_index(drop=True)
+
+        frame = process_data(frame)
+        frame = generate_signals(frame, carry=carry, start=start)
+        new_rows = frame.iloc[start:]
+        performance.update(new_rows['Signal'].to_numpy(), new_rows['Close'].to_numpy())
+        if chart is not None:
+            chart.update(new_rows)
+
+        rows += len(chunk)
+        chunks += 1
+
+    performance_metrics = performance.result()
+    if chart is not None and len(chart):
+        chart.write(performance_metrics, chart_file)
+    return performance_metrics, rows, chunks
+
+def process_file(path, charts_path=None, chunk_rows=CHUNK_ROWS, in_memory_bytes=IN_MEMORY_BYTES):
+    """
+    Run the pipeline on one CSV and return a summary row; errors are reported, not raised
+    """
+    started = time.perf_counter()
+    result = {'file': os.path.basename(path), 'bytes': os.path.getsize(path)}
+    chart_file = None
+    if charts_path:
+        chart_file = os.path.join(charts_path, f'{os.path.splitext(result["file"])[0]}.html')
+    try:
+        if result['bytes'] <= in_memory_bytes:
+            result['mode'] = 'full'
+            metrics, rows, chunks = process_file_in_memory(path, chart_file)
+        else:
+            result['mode'] = 'chunked'
+            metrics, rows, chunks = process_file_chunked(path, chunk_rows, chart_file)
+        result.update({'status': 'ok', 'rows': rows, 'chunks': chunks, 'chart': chart_file})
+        result.update(metrics)
+    except Exception as e:
+        result.update({'status': 'failed', 'error': f'{type(e).__name__}: {e}',
+                       'traceback': traceback.format_exc()})
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+def run_batch(csv_path='csvs', charts_path='charts', max_workers=None, chunk_rows=CHUNK_ROWS,
+              in_memory_bytes=IN_MEMORY_BYTES, report_file=None):
+    """
+    Process every CSV (and bar store .bars file) in csv_path across a process
+    pool and write a summary report.
+
+    Largest files are scheduled first so the pool stays busy. A file that
+    fails (or kills its worker) is marked as failed in the report without
+    stopping the rest of the batch.
+    """
+    if charts_path and not os.path.exists(charts_path):
+        os.makedirs(charts_path)
+
+    files = [os.path.join(csv_path, f) for f in os.listdir(csv_path) if f.endswith(('.csv', '.bars'))]
+    files.sort(key=os.path.getsize, reverse=True)
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(process_file, path, charts_path, chunk_rows, in_memory_bytes): path
+                   for path in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                result = {'file': os.path.basename(path), 'status': 'failed',
+                          'error': f'Worker process died: {e}'}
+            results.append(result)
+            if result['status'] == 'ok':
+                print(f"Processed {result['file']} ({result['rows']} rows, {result['mode']}) "
+                      f"in {result['seconds']:.1f}s: total return {result['total_return']:.2f}%")
+            else:
+                print(f"Failed {result['file']}: {result['error']}")
+
+    report = pd.DataFrame(results)
+    elapsed = time.perf_counter() - started
+    if not report.empty:
+        report = report.sort_values('file').reset_index(drop=True)
+        report_file = report_file or os.path.join(charts_path or csv_path, 'batch_summary.csv')
+        report.drop(columns=['traceback'], errors='ignore').to_csv(report_file, index=False)
+
+    ok = int((report['status'] == 'ok').sum()) if not report.empty else 0
+    print(f'Batch finished in {elapsed:.1f}s: {ok} ok, {len(report) - ok} failed')
+    if report_file:
+        print(f'Summary report: {report_file}')
+    return report
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Process CSV exports in parallel')
+    parser.add_argument('--csv-path', default='csvs')
+    parser.add_argument('--charts-path', default='charts')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--in-memory-mb', type=int, default=IN_MEMORY_BYTES // 2**20)
+    args = parser.parse_args()
+
+    run_batch(args.csv_path, args.charts_path, args.workers, args.chunk_rows, args.in_memory_mb * 2**20)
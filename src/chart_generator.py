@@ -1,30 +1,85 @@
+import numpy as np
 import plotly.graph_objects as go
 
-def create_chart(df, performance_metrics, output_file):
+# Candles drawn at most; longer series are aggregated into OHLC buckets
+MAX_CANDLES = 2000
+# Points kept per indicator line
+MAX_LINE_POINTS = 4000
+# (column, trace name, color)
+LINES = (('SMA_20', 'SMA 20', 'blue'), ('SMA_50', 'SMA 50', 'orange'))
+
+def epoch_ms(dates):
+    """
+    Dates as float milliseconds since the epoch. Plotly encodes numeric numpy
+    arrays as compact binary blocks, while datetimes become one string each.
+    """
+    return np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[ms]').astype(np.int64).astype(np.float64)
+
+def bucket_starts(n, n_buckets):
+    """
+    First row of each of n_buckets near-equal, contiguous row buckets
+    """
+    n_buckets = min(n, n_buckets)
+    return np.unique(np.arange(n_buckets) * n // n_buckets)
+
+def bucket_ohlc(time, open_, high, low, close, starts):
+    ends = np.append(starts[1:], len(time)) - 1
+    return {
+        'time': time[starts],
+        'end': time[ends],
+        'open': open_[starts],
+        'high': np.fmax.reduceat(high, starts),
+        'low': np.fmin.reduceat(low, starts),
+        'close': close[ends],
+    }
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: keeps the n_out points that best preserve
+    the line's visual shape (first and last points always kept)
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype(np.int64), n)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2]
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return x[selected], y[selected]
+
+def _write_figure(candles, lines, buys, sells, performance_metrics, output_file):
     fig = go.Figure()
 
     # Candlestick chart
     fig.add_trace(go.Candlestick(
-        x=df['Date'],
-        open=df['Open'],
-        high=df['High'],
-        low=df['Low'],
-        close=df['Close'],
+        x=candles['time'],
+        open=candles['open'],
+        high=candles['high'],
+        low=candles['low'],
+        close=candles['close'],
         name='Candlestick'
     ))
 
-    # Add buy and sell signals
-    fig.add_trace(go.Scatter(
-        x=df.loc[df['Signal'] == 1, 'Date'],
-        y=df.loc[df['Signal'] == 1, 'Close'],
+    # Add buy and sell signals (WebGL, so thousands of markers stay responsive)
+    fig.add_trace(go.Scattergl(
+        x=buys[0],
+        y=buys[1],
         mode='markers',
         name='Buy',
         marker=dict(color='green', size=10, symbol='triangle-up'),
         showlegend=True
     ))
-    fig.add_trace(go.Scatter(
-        x=df.loc[df['Signal'] == -1, 'Date'],
-        y=df.loc[df['Signal'] == -1, 'Close'],
+    fig.add_trace(go.Scattergl(
+        x=sells[0],
+        y=sells[1],
         mode='markers',
         name='Sell',
         marker=dict(color='red', size=10, symbol='triangle-down'),
@@ -32,28 +87,150 @@ def create_chart(df, performance_metrics, output_file):
     ))
 
     # Add moving averages
-    fig.add_trace(go.Scatter(
-        x=df['Date'],
-        y=df['SMA_20'],
-        mode='lines',
-        name='SMA 20',
-        line=dict(color='blue', width=2)
-    ))
-    fig.add_trace(go.Scatter(
-        x=df['Date'],
-        y=df['SMA_50'],
-        mode='lines',
-        name='SMA 50',
-        line=dict(color='orange', width=2)
-    ))
+    for (column, name, color), (x, y) in zip(LINES, lines):
+        fig.add_trace(go.Scattergl(
+            x=x,
+            y=y,
+            mode='lines',
+            name=name,
+            line=dict(color=color, width=2)
+        ))
 
     # Update layout
     fig.update_layout(
         title=f'Candlestick Chart - Performance: {performance_metrics["total_return"]:.2f}%',
         xaxis_title='Date',
         yaxis_title='Price',
+        xaxis_type='date',
         xaxis_rangeslider_visible=True
     )
 
     # Save the chart as an interactive HTML file
-    fig.write_html(output_file)
\ No newline at end of file
+    fig.write_html(output_file)
+
+def create_chart(df, performance_metrics, output_file, max_candles=MAX_CANDLES, max_line_points=MAX_LINE_POINTS):
+    """
+    Series longer than max_candles are drawn as max_candles OHLC buckets and
+    the moving averages are reduced with LTTB, so the HTML size and render
+    time stay bounded whatever the input length. Every signal is kept.
+    """
+    time = epoch_ms(df['Date'])
+    close = df['Close'].to_numpy(dtype=np.float64)
+    candles = bucket_ohlc(time, df['Open'].to_numpy(dtype=np.float64), df['High'].to_numpy(dtype=np.float64),
+                          df['Low'].to_numpy(dtype=np.float64), close, bucket_starts(len(df), max_candles))
+
+    lines = []
+    for column, _, _ in LINES:
+        values = df[column].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        lines.append(lttb(time[valid], values[valid], max_line_points))
+
+    signal = df['Signal'].to_numpy()
+    buys = (time[signal == 1], close[signal == 1])
+    sells = (time[signal == -1], close[signal == -1])
+    _write_figure(candles, lines, buys, sells, performance_metrics, output_file)
+
+class ChartAccumulator:
+    """
+    Builds the create_chart figure from consecutive chunks in bounded memory.
+
+    Rows are aggregated into buckets of bucket_rows rows; whenever there are
+    more than max_candles buckets, neighbours are merged pairwise and the
+    bucket size doubles, so between max_candles / 2 and max_candles candles
+    are kept. Lines keep the min and max of each bucket (LTTB needs the whole
+    series). Accumulators of consecutive parts of a series can be combined
+    with merge().
+    """
+    def __init__(self, max_candles=MAX_CANDLES):
+        self.max_candles = max_candles
+        self.bucket_rows = 1
+        self.buckets = None
+        self.buys = ([], [])
+        self.sells = ([], [])
+
+    def __len__(self):
+        return 0 if self.buckets is None else len(self.buckets['time'])
+
+    def update(self, df):
+        if not len(df):
+            return self
+        time = epoch_ms(df['Date'])
+        close = df['Close'].to_numpy(dtype=np.float64)
+        starts = np.arange(0, len(df), self.bucket_rows)
+        ends = np.append(starts[1:], len(df)) - 1
+        new = bucket_ohlc(time, df['Open'].to_numpy(dtype=np.float64), df['High'].to_numpy(dtype=np.float64),
+                          df['Low'].to_numpy(dtype=np.float64), close, starts)
+        for column, _, _ in LINES:
+            values = df[column].to_numpy(dtype=np.float64)
+            new[f'{column}_min'] = np.fmin.reduceat(values, starts)
+            new[f'{column}_max'] = np.fmax.reduceat(values, starts)
+            new[f'{column}_first'] = values[starts]
+            new[f'{column}_last'] = values[ends]
+
+        signal = df['Signal'].to_numpy()
+        self.buys[0].append(time[signal == 1])
+        self.buys[1].append(close[signal == 1])
+        self.sells[0].append(time[signal == -1])
+        self.sells[1].append(close[signal == -1])
+
+        self._extend(new)
+        return self
+
+    def merge(self, other):
+        """
+        Append an accumulator built from the rows following this one's
+        """
+        if other.buckets is None:
+            return self
+        self.bucket_rows = max(self.bucket_rows, other.bucket_rows)
+        for mine, theirs in ((self.buys, other.buys), (self.sells, other.sells)):
+            mine[0].extend(theirs[0])
+            mine[1].extend(theirs[1])
+        self._extend(other.buckets)
+        return self
+
+    def _extend(self, new):
+        if self.buckets is None:
+            self.buckets = dict(new)
+        else:
+            self.buckets = {key: np.concatenate([self.buckets[key], new[key]]) for key in self.buckets}
+        while len(self) > self.max_candles:
+            self._halve()
+
+    def _halve(self):
+        b = self.buckets
+        paired = len(self) // 2 * 2
+        left, right = slice(0, paired, 2), slice(1, paired, 2)
+        merged = {
+            'time': b['time'][left],
+            'end': b['end'][right],
+            'open': b['open'][left],
+            'high': np.fmax(b['high'][left], b['high'][right]),
+            'low': np.fmin(b['low'][left], b['low'][right]),
+            'close': b['close'][right],
+        }
+        for column, _, _ in LINES:
+            merged[f'{column}_min'] = np.fmin(b[f'{column}_min'][left], b[f'{column}_min'][right])
+            merged[f'{column}_max'] = np.fmax(b[f'{column}_max'][left], b[f'{column}_max'][right])
+            merged[f'{column}_first'] = b[f'{column}_first'][left]
+            merged[f'{column}_last'] = b[f'{column}_last'][right]
+        if paired < len(self):
+            merged = {key: np.append(values, b[key][-1]) for key, values in merged.items()}
+        self.buckets = merged
+        self.bucket_rows *= 2
+
+    def write(self, performance_metrics, output_file):
+        b = self.buckets
+        lines = []
+        for column, _, _ in LINES:
+            # Two points per bucket, in the order the line moved through them
+            rising = b[f'{column}_last'] >= b[f'{column}_first']
+            low, high = b[f'{column}_min'], b[f'{column}_max']
+            x = np.column_stack([b['time'], b['end']]).ravel()
+            y = np.column_stack([np.where(rising, low, high), np.where(rising, high, low)]).ravel()
+            valid = ~np.isnan(y)
+            lines.append((x[valid], y[valid]))
+
+        buys = tuple(np.concatenate(part) for part in self.buys)
+        sells = tuple(np.concatenate(part) for part in self.sells)
+        _write_figure(b, lines, buys, sells, performance_metrics, output_file)
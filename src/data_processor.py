@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 
-def process_data(df):
+def process_data(df, sma_fast=20, sma_slow=50, rsi_period=14):
     # Ensure 'Date' is in datetime format
     df['Date'] = pd.to_datetime(df['Date'])
     
@@ -12,11 +12,11 @@ def process_data(df):
     df['Return'] = df['Close'].pct_change()
     
     # Calculate RSI
-    df['RSI'] = calculate_rsi(df['Close'])
+    df['RSI'] = calculate_rsi(df['Close'], rsi_period)
     
     # Calculate moving averages
-    df['SMA_20'] = df['Close'].rolling(window=20).mean()
-    df['SMA_50'] = df['Close'].rolling(window=50).mean()
+    df[f'SMA_{sma_fast}'] = df['Close'].rolling(window=sma_fast).mean()
+    df[f'SMA_{sma_slow}'] = df['Close'].rolling(window=sma_slow).mean()
     
     return df
 
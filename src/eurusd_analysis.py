@@ -6,12 +6,11 @@ import pandas_ta as ta
 
 # Função para obter e processar dados
 def get_data(symbol, timeframe, num_candles):
-    if not mt5.initialize():
-        print("Inicialização falhou")
-        mt5.shutdown()
+    rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, num_candles)
+    if rates is None:
+        print(f"Falha ao obter dados de {symbol}: {mt5.last_error()}")
         return None
 
-    rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, num_candles)
     df = pd.DataFrame(rates)
     df['time'] = pd.to_datetime(df['time'], unit='s')
     df.set_index('time', inplace=True)
@@ -42,6 +41,12 @@ def plot_chart(df, ax, title):
     ax.legend(loc='upper left')
     ax.grid(True)
 
+# Inicializar o MetaTrader5 uma única vez para todas as coletas
+if not mt5.initialize():
+    print("Inicialização falhou")
+    mt5.shutdown()
+    raise SystemExit(1)
+
 # Obter dados para diferentes timeframes
 symbol = "EURUSD"
 df_daily = get_data(symbol, mt5.TIMEFRAME_D1, 365)  # 1 ano de dados diários
@@ -28,4 +28,88 @@ def analyze_performance(df):
         'win_rate': win_rate,
         'profit_factor': profit_factor,
         'sharpe_ratio': sharpe_ratio
-    }
\ No newline at end of file
+    }
+
+class PerformanceAccumulator:
+    """
+    analyze_performance computed chunk by chunk with constant memory.
+
+    Feed the Signal/Close columns of consecutive chunks to update(); a row's
+    trade return needs the next close, so the last row of each chunk is
+    settled when the next chunk (or result()) arrives. The mean and standard
+    deviation are merged across chunks (Chan et al.), so the Sharpe ratio
+    matches the single-pass value up to float rounding.
+    """
+    def __init__(self):
+        self.growth = 1.0
+        self.last_return_nan = False
+        self.num_trades = 0.0
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.win_sum = 0.0
+        self.loss_sum = 0.0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._tail_signal = None
+        self._tail_close = None
+
+    def _add_returns(self, returns):
+        valid = returns[~np.isnan(returns)]
+        if len(valid):
+            self.growth *= np.prod(1 + valid)
+            self.winning_trades += int(np.count_nonzero(valid > 0))
+            self.losing_trades += int(np.count_nonzero(valid < 0))
+            self.win_sum += valid[valid > 0].sum()
+            self.loss_sum += valid[valid < 0].sum()
+
+            n = len(valid)
+            mean = valid.mean()
+            m2 = ((valid - mean) ** 2).sum()
+            delta = mean - self.mean
+            total = self.count + n
+            self.mean += delta * n / total
+            self.m2 += m2 + delta ** 2 * self.count * n / total
+            self.count = total
+        if len(returns):
+            self.last_return_nan = bool(np.isnan(returns[-1]))
+
+    def update(self, signal, close):
+        signal = np.asarray(signal, dtype=np.float64)
+        close = np.asarray(close, dtype=np.float64)
+        if not len(close):
+            return
+        self.num_trades += np.nansum(np.abs(signal))
+
+        if self._tail_signal is not None:
+            signals = np.concatenate([[self._tail_signal], signal])
+            closes = np.concatenate([[self._tail_close], close])
+        else:
+            signals, closes = signal, close
+        next_return = closes[1:] / closes[:-1] - 1
+        self._add_returns(np.where(signals[:-1] != 0, next_return, 0))
+        self._tail_signal = signals[-1]
+        self._tail_close = closes[-1]
+
+    def result(self):
+        if self._tail_signal is not None:
+            # The final row has no next close
+            self._add_returns(np.array([np.nan if self._tail_signal != 0 else 0.0]))
+            self._tail_signal = None
+
+        total_return = np.nan if self.last_return_nan else (self.growth - 1) * 100
+        win_rate = self.winning_trades / self.num_trades if self.num_trades > 0 else 0
+        avg_win = self.win_sum / self.winning_trades if self.winning_trades > 0 else 0
+        avg_loss = self.loss_sum / self.losing_trades if self.losing_trades > 0 else 0
+        profit_factor = abs(avg_win / avg_loss) if avg_loss != 0 else np.inf
+        mean = self.mean if self.count else np.nan
+        std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+        sharpe_ratio = mean / std if std != 0 else 0
+
+        return {
+            'total_return': total_return,
+            'num_trades': self.num_trades,
+            'win_rate': win_rate,
+            'profit_factor': profit_factor,
+            'sharpe_ratio': sharpe_ratio
+        }